@@ -0,0 +1,79 @@
+"""
+End-to-end time budget of one /query request.
+
+A Deadline is created per request (QueryRequest.deadline_ms, else
+QUERY_DEADLINE_MS) and passed down the pipeline. Stages check the time
+left and degrade instead of running past it:
+
+path              when (time left before the LLM stage)      effect
+----------------  -----------------------------------------  ------------------------------------
+shrink_evidence   < DEADLINE_SHRINK_EVIDENCE_MS               evidence cut to the best
+                                                              DEADLINE_EVIDENCE_CHUNKS chunks
+fast_model        < DEADLINE_FAST_MODEL_MS, borderline         cascade starts at its cheapest tier
+                  retrieval                                   instead of the strongest
+skip_escalation   < DEADLINE_FAST_MODEL_MS when a cascade      the cheaper tier's answer is kept
+                  tier would escalate
+evidence_only     < DEADLINE_LLM_MIN_MS                       no LLM call; partial answer
+llm_timeout       the LLM call runs out of time               call abandoned; partial answer
+
+A partial answer is PARTIAL_ANSWER with the retrieved evidence, flagged
+"partial" in the response. Each path is counted as deadline_degraded in
+/metrics and listed in the response's "degradations".
+"""
+
+from typing import List, Optional
+import logging
+import os
+import time
+
+from api.metrics import Metrics, metrics as default_metrics
+
+logger = logging.getLogger(__name__)
+
+# Server default when the request sets no deadline (0 disables)
+QUERY_DEADLINE_MS = int(os.getenv("QUERY_DEADLINE_MS", "30000"))
+
+DEADLINE_LLM_MIN_MS = int(os.getenv("DEADLINE_LLM_MIN_MS", "2000"))
+DEADLINE_FAST_MODEL_MS = int(os.getenv("DEADLINE_FAST_MODEL_MS", "8000"))
+DEADLINE_SHRINK_EVIDENCE_MS = int(os.getenv("DEADLINE_SHRINK_EVIDENCE_MS", "5000"))
+DEADLINE_EVIDENCE_CHUNKS = int(os.getenv("DEADLINE_EVIDENCE_CHUNKS", "2"))
+
+PARTIAL_ANSWER = (
+    "The answer could not be generated within the time limit. "
+    "The most relevant excerpts from the documents are listed as evidence."
+)
+
+# Paths after which the answer is partial
+PARTIAL_PATHS = ("evidence_only", "llm_timeout")
+
+
+class Deadline:
+    def __init__(self, timeout_ms: float, metrics: Metrics = default_metrics):
+        self.timeout_ms = timeout_ms
+        self.expires_at = time.monotonic() + timeout_ms / 1000
+        self.metrics = metrics
+        self.degradations: List[str] = []
+
+    @classmethod
+    def for_request(cls, timeout_ms: Optional[int], default_ms: int = QUERY_DEADLINE_MS) -> Optional["Deadline"]:
+        timeout_ms = timeout_ms or default_ms
+        return cls(timeout_ms) if timeout_ms else None
+
+    def remaining_ms(self) -> float:
+        return max(0.0, (self.expires_at - time.monotonic()) * 1000)
+
+    def degrade(self, path: str) -> None:
+        self.degradations.append(path)
+        self.metrics.increment("deadline_degraded", path)
+        logger.info(
+            "deadline_degraded",
+            extra={
+                "path": path,
+                "timeout_ms": self.timeout_ms,
+                "remaining_ms": round(self.remaining_ms(), 1),
+            },
+        )
+
+    @property
+    def partial(self) -> bool:
+        return any(path in PARTIAL_PATHS for path in self.degradations)
@@ -1,9 +1,196 @@
-# api/logging.py
+"""
+Process-wide logging: structured records written off the request path.
 
+Loggers hand records to a bounded in-memory queue (QueueHandler); one
+background thread (QueueListener) formats them and writes them out, so a
+slow stderr or log collector never stalls a request. When the queue is
+full a record is dropped and counted as log_dropped in /metrics rather
+than blocking the caller.
+
+Records are one JSON object per line (LOG_FORMAT=json, the default):
+
+    {"ts": "2026-01-05T10:12:03.412Z", "level": "INFO", "logger": "finance-dis",
+     "message": "request_completed", "request_id": "…", "latency_ms": 41, …}
+
+Every field passed with extra= is included. LOG_FORMAT=text keeps the
+earlier "time | level | message" lines, with the extra fields appended as
+key=value.
+
+Sampling (applied before a record is queued):
+- LOG_DEBUG_SAMPLE_RATE: fraction of DEBUG records kept
+- LOG_SAMPLE_RATES: per-message rates for high-volume events, e.g.
+  "request_completed=0.1,evidence_selected=0.5"
+Records at WARNING and above are always kept.
+
+The preloading parent of api/serve.py runs no listener thread: it writes
+its few records (worker exits) directly, and each forked worker starts
+its own queue and listener.
+"""
+
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+import atexit
+import copy
+import json
 import logging
+import os
+import queue
+import random
+import sys
+
+from api import runtime
+from api.metrics import Metrics, metrics as default_metrics
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+
+TEXT_FORMAT = "%(asctime)s | %(levelname)s | %(message)s"
+
+# Attributes every LogRecord has; anything else came from extra=
+RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_configured = False
+_listener: Optional[QueueListener] = None
+
+
+def extra_fields(record: logging.LogRecord) -> Dict:
+    return {k: v for k, v in vars(record).items() if k not in RECORD_ATTRS and not k.startswith("_")}
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """
+    "request_completed=0.1, evidence_selected=0.5" → {"request_completed": 0.1, ...}
+    """
+    rates = {}
+    for item in spec.split(","):
+        message, _, rate = item.strip().partition("=")
+        if message and rate:
+            rates[message] = float(rate)
+    return rates
+
+# -----------------------------
+# Formatters
+# -----------------------------
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **extra_fields(record),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+
+        # Values that are not JSON types (paths, numpy scalars) as strings
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = extra_fields(record)
+        if fields:
+            line += " | " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+# -----------------------------
+# Queue handler
+# -----------------------------
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, debug_rate: float = 1.0, rates: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.debug_rate = debug_rate
+        self.rates = rates or {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        rate = self.rates.get(record.msg, self.debug_rate if record.levelno < logging.INFO else 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that drops records instead of waiting for queue space.
+    """
+
+    def __init__(self, log_queue: queue.Queue, metrics: Metrics = default_metrics):
+        super().__init__(log_queue)
+        self.metrics = metrics
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback now, while args and the
+        # exception still hold their current values; formatting proper
+        # happens on the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.metrics.increment("log_dropped", record.levelname)
+
+
+def make_formatter(log_format: str = LOG_FORMAT) -> logging.Formatter:
+    return TextFormatter() if log_format == "text" else JsonFormatter()
+
+
+def setup_logging(stream=None) -> None:
+    """
+    Route the root logger through the background queue. Idempotent: the
+    app and the model server both call it at startup.
+    """
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(make_formatter())
+
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    handler.addFilter(SamplingFilter(LOG_DEBUG_SAMPLE_RATE, parse_sample_rates(LOG_SAMPLE_RATES)))
+
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+
+    def start_listener() -> None:
+        global _listener
+        # A fresh queue after fork(): the parent's listener may have held
+        # the old one's lock
+        handler.queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+        _listener.start()
+        root.removeHandler(output)
+        root.addHandler(handler)
+
+    if runtime.SERVE_PRELOAD:
+        root.addHandler(output)
+    runtime.start_threads(start_listener)
+
+    def stop_listener() -> None:
+        # Write out what is still queued on shutdown
+        if _listener is not None:
+            _listener.stop()
 
-def setup_logging():
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s | %(levelname)s | %(message)s",
-    )
\ No newline at end of file
+    atexit.register(stop_listener)
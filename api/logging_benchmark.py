@@ -0,0 +1,147 @@
+"""
+Logging overhead per /query request (api/logging.py).
+
+Replays the records one /query emits (retrieval stages, evidence
+selection, LLM start / completion, request_completed, all with their
+extra fields) through each logging setup, from --threads request threads,
+and times the logging calls only:
+
+- sync_text: the earlier logging.basicConfig stream handler (extras lost)
+- sync_json: JSON records, formatted and written on the request thread
+- queue_json: JSON records through the background queue (the default)
+
+--sink-delay-ms slows every write, like a blocked pipe or a log collector
+under back-pressure.
+
+Reports per setup: p50 / p99 logging time per request (µs), total
+throughput (requests/s) and records dropped by the full queue.
+
+Usage:
+    python -m api.logging_benchmark --requests 2000 --threads 8 --sink-delay-ms 0 1
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueListener
+from typing import Dict, List
+import argparse
+import io
+import json
+import logging
+import queue
+import time
+import uuid
+
+from api.logging import (
+    TEXT_FORMAT,
+    JsonFormatter,
+    NonBlockingQueueHandler,
+    SamplingFilter,
+)
+from api.metrics import Metrics
+from llm.backend_benchmark import percentile
+
+SETUPS = ("sync_text", "sync_json", "queue_json")
+
+
+class SlowSink(io.TextIOBase):
+    """
+    Discards output after delay_s per write.
+    """
+
+    def __init__(self, delay_s: float):
+        self.delay_s = delay_s
+
+    def write(self, s: str) -> int:
+        if self.delay_s:
+            time.sleep(self.delay_s)
+        return len(s)
+
+
+def query_records(log: logging.Logger) -> None:
+    """
+    The records of one retrieval + LLM /query request.
+    """
+    request_id = str(uuid.uuid4())
+    filters = {"company": "HSBC", "fiscal_year": 2023}
+
+    log.info("retrieve_started", extra={"request_id": request_id, "component": "retrieval", "top_k": 5, "filters": filters})
+    log.info("evidence_selected", extra={"request_id": request_id, "selected": 3, "candidates": 5, "prompt_tokens_saved": 412})
+    log.info("retrieve_completed", extra={"request_id": request_id, "component": "retrieval", "latency_ms": 18.4, "results": 3})
+    log.info("LLM generation started", extra={"request_id": request_id, "component": "llm", "backend": "openai", "model": None})
+    log.info(
+        "LLM generation completed",
+        extra={
+            "request_id": request_id,
+            "component": "llm",
+            "latency_ms": 812.3,
+            "backend": "openai",
+            "model": "gpt-4.1-mini",
+            "usage": {"input_tokens": 1830, "cached_input_tokens": 1024, "output_tokens": 96},
+            "cached": False,
+        },
+    )
+    log.info(
+        "request_completed",
+        extra={"request_id": request_id, "path": "/query", "method": "POST", "status": 200, "latency_ms": 845},
+    )
+
+
+def run_setup(setup: str, requests: int, threads: int, delay_s: float) -> Dict:
+    log = logging.getLogger(f"logging_benchmark.{setup}")
+    log.propagate = False
+    log.setLevel(logging.INFO)
+
+    output = logging.StreamHandler(SlowSink(delay_s))
+    output.setFormatter(logging.Formatter(TEXT_FORMAT) if setup == "sync_text" else JsonFormatter())
+
+    metrics = Metrics()
+    listener = None
+    if setup == "queue_json":
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=10000), metrics=metrics)
+        handler.addFilter(SamplingFilter())
+        listener = QueueListener(handler.queue, output)
+        listener.start()
+    else:
+        handler = output
+    log.addHandler(handler)
+
+    def one(_) -> float:
+        start = time.perf_counter()
+        query_records(log)
+        return time.perf_counter() - start
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            timings: List[float] = list(pool.map(one, range(requests)))
+        elapsed = time.perf_counter() - start
+    finally:
+        log.removeHandler(handler)
+        if listener is not None:
+            # Not timed: the listener drains in the background while serving
+            listener.stop()
+
+    return {
+        "setup": setup,
+        "p50_us": round(percentile(timings, 0.5) * 1e6, 1),
+        "p99_us": round(percentile(timings, 0.99) * 1e6, 1),
+        "requests_per_s": round(requests / elapsed, 1),
+        "dropped": sum(metrics.snapshot()["counters"].get("log_dropped", {}).values()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--sink-delay-ms", type=float, nargs="+", default=[0.0, 1.0])
+    args = parser.parse_args()
+
+    for delay_ms in args.sink_delay_ms:
+        for setup in SETUPS:
+            result = run_setup(setup, args.requests, args.threads, delay_ms / 1000)
+            print(json.dumps({"sink_delay_ms": delay_ms, **result}))
+
+
+if __name__ == "__main__":
+    main()
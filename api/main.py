@@ -6,6 +6,11 @@ from fastapi.responses import HTMLResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 
+from api.runtime import apply_request_threads, apply_thread_budget, thread_budget
+
+# Before the routes module loads the embedder and the index
+apply_thread_budget(thread_budget)
+
 from api.routes import router
 from api.logging import setup_logging
 
@@ -30,6 +35,10 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    @app.on_event("startup")
+    async def size_request_threads():
+        apply_request_threads(thread_budget)
+
     BASE_DIR = Path(__file__).resolve().parent.parent
     UI_DIR = BASE_DIR / "ui"
     STATIC_DIR = UI_DIR / "static"
@@ -54,10 +63,14 @@ def create_app() -> FastAPI:
     async def root():
         return serve_index()
 
+    # API routes must be registered before the SPA catch-all below,
+    # otherwise every GET endpoint is shadowed by index.html
+    app.include_router(router)
+
     @app.get("/{full_path:path}", response_class=HTMLResponse)
     async def spa_fallback(full_path: str):
         # Allow API and docs routes to behave normally
-        if full_path.startswith(("query", "docs", "openapi", "static")):
+        if full_path.startswith(("query", "docs", "openapi", "static", "admin", "documents", "metrics", "jobs")):
             return HTMLResponse(status_code=404)
 
         return serve_index()
@@ -97,8 +110,6 @@ def create_app() -> FastAPI:
 
         return response
 
-    app.include_router(router)
-
     return app
 
 
@@ -0,0 +1,121 @@
+"""
+In-process metrics, exposed as JSON on GET /metrics.
+
+Counters are optionally split by one label:
+
+    metrics.increment("router_rule_hits", "catalog_miss")
+    metrics.snapshot()
+    → {"counters": {"router_rule_hits": {"catalog_miss": 1}}}
+
+Histograms count observations into fixed buckets (cumulative, as in
+Prometheus) and report approximate quantiles from them:
+
+    metrics.observe("embed_batch_size", 12, buckets=BATCH_SIZE_BUCKETS)
+    → {"histograms": {"embed_batch_size": {"count": 1, "sum": 12,
+                                           "buckets": {"16": 1, ...},
+                                           "p50": 16, "p95": 16, "p99": 16}}}
+
+Values are per process and reset on restart.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Optional, Sequence
+import threading
+
+# Milliseconds, for latencies and queueing delays
+LATENCY_MS_BUCKETS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        # One slot per bucket plus +Inf
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Upper bound of the bucket holding the q-quantile (None above the
+        last bucket or when empty).
+        """
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def snapshot(self) -> Dict:
+        cumulative, seen = {}, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            cumulative[f"{bound:g}"] = seen
+        cumulative["+Inf"] = self.count
+
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": cumulative,
+            **{f"p{int(q * 100)}": self.quantile(q) for q in QUANTILES},
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self._histograms: Dict[str, Histogram] = {}
+
+    def increment(self, name: str, label: Optional[str] = None, amount: float = 1) -> None:
+        with self._lock:
+            self._counters[name][label or "total"] += amount
+
+    def counter(self, name: str, label: Optional[str] = None) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(label or "total", 0)
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = LATENCY_MS_BUCKETS) -> None:
+        """
+        Record `value` in histogram `name`; `buckets` applies when the
+        histogram is first created.
+        """
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(buckets)
+            histogram.observe(value)
+
+    def histogram(self, name: str) -> Optional[Dict]:
+        with self._lock:
+            histogram = self._histograms.get(name)
+            return histogram.snapshot() if histogram else None
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "counters": {
+                    name: dict(values) for name, values in self._counters.items()
+                },
+                "histograms": {
+                    name: histogram.snapshot() for name, histogram in self._histograms.items()
+                },
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+metrics = Metrics()
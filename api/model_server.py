@@ -0,0 +1,332 @@
+"""
+Optional model server: one process owns the query embedder and the vector
+store and serves them to API workers over a Unix domain socket.
+
+    python -m api.model_server                          # MODEL_SERVER_SOCKET
+    MODEL_SERVER_SOCKET=/tmp/finance-dis.sock uvicorn api.main:app --workers 4
+
+With MODEL_SERVER_SOCKET set, RAGService embeds and searches through
+ModelServerClient instead of loading the model and index itself, so HTTP
+workers stay small and scale independently of model memory. The server
+embeds through an EmbeddingBatcher, so queries from all workers share
+forward passes. Index snapshots are reloaded by the server (its own
+INDEX_WATCH_INTERVAL_S watcher, or RELOAD forwarded by a worker); workers
+notice the new version on their next poll.
+
+Client calls time out after MODEL_SERVER_TIMEOUT_S (connect and each
+read), or sooner when the caller passes a request deadline, and fail with
+ModelServerError rather than holding the request thread on a hung server.
+
+Protocol: length-prefixed binary frames, little-endian.
+
+    request   u8 version | u8 op     | u32 length | payload
+    response  u8 version | u8 status | u32 length | payload   (status 0 = ok,
+                                                               else utf-8 error)
+
+op            request payload                           response payload
+------------  ----------------------------------------  --------------------------------
+EMBED         utf-8 query                               f32[dim]
+EMBED_BATCH   u32 n, then n × (u32 length, utf-8)       u32 n, u32 dim, f32[n × dim]
+SEARCH        u16 top_k, u32 filters length, filters    u32 n, f32[n] scores,
+              JSON, f32[dim] query embedding            JSON list of n chunk metadata
+INFO          —                                         JSON {version, manifest, catalog}
+RELOAD        utf-8 version (empty = CURRENT)           JSON {version}
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MODEL_SERVER_SOCKET = os.getenv("MODEL_SERVER_SOCKET")
+MODEL_SERVER_TIMEOUT_S = float(os.getenv("MODEL_SERVER_TIMEOUT_S", "10"))
+
+PROTOCOL_VERSION = 1
+
+OP_EMBED = 1
+OP_EMBED_BATCH = 2
+OP_SEARCH = 3
+OP_INFO = 4
+OP_RELOAD = 5
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+HEADER = struct.Struct("<BBI")
+U32 = struct.Struct("<I")
+SEARCH_HEADER = struct.Struct("<HI")
+
+
+class ModelServerError(RuntimeError):
+    """
+    Error reported by the model server for one request.
+    """
+
+# -----------------------------
+# Framing
+# -----------------------------
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:], size - received)
+        if n == 0:
+            raise ConnectionError("model server connection closed")
+        received += n
+    return bytes(buffer)
+
+
+def send_frame(sock: socket.socket, code: int, payload: bytes) -> None:
+    sock.sendall(HEADER.pack(PROTOCOL_VERSION, code, len(payload)) + payload)
+
+
+def recv_frame(sock: socket.socket) -> Tuple[int, bytes]:
+    version, code, length = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    if version != PROTOCOL_VERSION:
+        raise ConnectionError(f"unsupported protocol version {version}")
+    return code, _recv_exact(sock, length)
+
+
+def encode_results(results: List[Dict]) -> bytes:
+    scores = np.array([r["score"] for r in results], dtype="<f4")
+    metadata = [{k: v for k, v in r.items() if k != "score"} for r in results]
+    return U32.pack(len(results)) + scores.tobytes() + json.dumps(metadata).encode("utf-8")
+
+
+def decode_results(payload: bytes) -> List[Dict]:
+    (n,) = U32.unpack_from(payload)
+    scores = np.frombuffer(payload, dtype="<f4", count=n, offset=U32.size)
+    metadata = json.loads(payload[U32.size + 4 * n:])
+    return [{**m, "score": float(s)} for m, s in zip(metadata, scores)]
+
+# -----------------------------
+# Server
+# -----------------------------
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        rag = self.server.rag_service
+
+        while True:
+            try:
+                op, payload = recv_frame(self.request)
+            except ConnectionError:
+                return
+
+            try:
+                response = self.server.dispatch(rag, op, payload)
+            except Exception as e:
+                logger.exception("model_server_request_failed", extra={"op": op})
+                send_frame(self.request, STATUS_ERROR, str(e).encode("utf-8"))
+                continue
+
+            send_frame(self.request, STATUS_OK, response)
+
+
+class ModelServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, rag_service):
+        self.rag_service = rag_service
+        super().__init__(socket_path, _Handler)
+
+    @staticmethod
+    def dispatch(rag, op: int, payload: bytes) -> bytes:
+        if op == OP_EMBED:
+            return np.asarray(rag.embedder.embed(payload.decode("utf-8")), dtype="<f4").tobytes()
+
+        if op == OP_EMBED_BATCH:
+            (n,) = U32.unpack_from(payload)
+            queries, offset = [], U32.size
+            for _ in range(n):
+                (length,) = U32.unpack_from(payload, offset)
+                offset += U32.size
+                queries.append(payload[offset:offset + length].decode("utf-8"))
+                offset += length
+            embeddings = np.asarray(rag.embedder.embed_batch(queries), dtype="<f4").reshape(n, -1)
+            return struct.pack("<II", *embeddings.shape) + embeddings.tobytes()
+
+        if op == OP_SEARCH:
+            top_k, filters_length = SEARCH_HEADER.unpack_from(payload)
+            offset = SEARCH_HEADER.size
+            filters = json.loads(payload[offset:offset + filters_length])
+            query_embedding = np.frombuffer(payload, dtype="<f4", offset=offset + filters_length)
+            results = rag.index_state.store.search(query_embedding, top_k=top_k, filters=filters)
+            return encode_results(results)
+
+        if op == OP_INFO:
+            return json.dumps({
+                "version": rag.index_version,
+                "manifest": rag.index_manifest,
+                "catalog": sorted(rag.catalog()),
+            }).encode("utf-8")
+
+        if op == OP_RELOAD:
+            version = rag.reload(payload.decode("utf-8") or None)
+            return json.dumps({"version": version}).encode("utf-8")
+
+        raise ValueError(f"unknown op {op}")
+
+
+def serve(socket_path: str) -> None:
+    from api.logging import setup_logging
+    from api.services.rag_service import RAGService
+
+    setup_logging()
+
+    # This process owns the model and the index
+    rag_service = RAGService(model_server_socket=None)
+
+    path = Path(socket_path)
+    if path.exists():
+        path.unlink()
+
+    with ModelServer(socket_path, rag_service) as server:
+        logger.info(
+            "model_server_started",
+            extra={"socket": socket_path, "index_version": rag_service.index_version},
+        )
+        server.serve_forever()
+
+# -----------------------------
+# Client
+# -----------------------------
+
+class ModelServerClient:
+    """
+    One persistent connection per calling thread; a broken connection is
+    reopened once per call.
+
+    deadline (time.monotonic() value, see api/deadline.py) shortens the
+    timeout of one call to the time left.
+    """
+
+    def __init__(self, socket_path: str, timeout_s: float = MODEL_SERVER_TIMEOUT_S):
+        self.socket_path = socket_path
+        self.timeout_s = timeout_s
+        self._reset()
+        # Connections opened before fork() must not be shared with workers
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        self._local = threading.local()
+
+    def _connect(self, timeout_s: float) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._local.sock = sock
+        sock.settimeout(timeout_s)
+        sock.connect(self.socket_path)
+        return sock
+
+    def _drop(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+        self._local.sock = None
+
+    def call(self, op: int, payload: bytes = b"", deadline: Optional[float] = None) -> bytes:
+        timeout_s = self.timeout_s
+        if deadline is not None:
+            timeout_s = min(timeout_s, deadline - time.monotonic())
+            if timeout_s <= 0:
+                raise ModelServerError("request deadline passed before the model server call")
+
+        for attempt in range(2):
+            try:
+                sock = getattr(self._local, "sock", None)
+                if sock is None:
+                    sock = self._connect(timeout_s)
+                else:
+                    sock.settimeout(timeout_s)
+                send_frame(sock, op, payload)
+                status, response = recv_frame(sock)
+                break
+            except socket.timeout as e:
+                # A late reply must not be read as the answer to the next call
+                self._drop()
+                logger.warning("model_server_timeout", extra={"op": op, "timeout_s": round(timeout_s, 3)})
+                raise ModelServerError(f"model server did not answer within {timeout_s:.3f}s") from e
+            except (ConnectionError, OSError):
+                self._drop()
+                if attempt:
+                    raise
+
+        if status != STATUS_OK:
+            raise ModelServerError(response.decode("utf-8"))
+        return response
+
+    def embed(self, query: str, deadline: Optional[float] = None) -> np.ndarray:
+        return np.frombuffer(self.call(OP_EMBED, query.encode("utf-8"), deadline), dtype="<f4")
+
+    def embed_batch(self, queries: List[str]) -> np.ndarray:
+        encoded = [q.encode("utf-8") for q in queries]
+        payload = U32.pack(len(encoded)) + b"".join(U32.pack(len(e)) + e for e in encoded)
+        response = self.call(OP_EMBED_BATCH, payload)
+        n, dim = struct.unpack_from("<II", response)
+        return np.frombuffer(response, dtype="<f4", offset=8).reshape(n, dim)
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int = 5,
+        filters: Optional[Dict] = None,
+        deadline: Optional[float] = None,
+    ) -> List[Dict]:
+        filters_json = json.dumps(filters or {}).encode("utf-8")
+        payload = (
+            SEARCH_HEADER.pack(top_k, len(filters_json))
+            + filters_json
+            + np.asarray(query_embedding, dtype="<f4").tobytes()
+        )
+        return decode_results(self.call(OP_SEARCH, payload, deadline))
+
+    def info(self) -> Dict:
+        return json.loads(self.call(OP_INFO))
+
+    def reload(self, version: Optional[str] = None) -> str:
+        return json.loads(self.call(OP_RELOAD, (version or "").encode("utf-8")))["version"]
+
+
+class RemoteStore:
+    """
+    Vector store interface (search / catalog) backed by the model server,
+    pinned to the catalog of one index version.
+    """
+
+    def __init__(self, client: ModelServerClient, catalog):
+        self.client = client
+        self._catalog = {tuple(pair) for pair in catalog}
+
+    def catalog(self):
+        return set(self._catalog)
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int = 5,
+        filters: Optional[Dict] = None,
+        deadline: Optional[float] = None,
+    ) -> List[Dict]:
+        return self.client.search(query_embedding, top_k=top_k, filters=filters, deadline=deadline)
+
+
+# -----------------------------
+# Entry Point
+# -----------------------------
+
+if __name__ == "__main__":
+    if not MODEL_SERVER_SOCKET:
+        raise SystemExit("Set MODEL_SERVER_SOCKET to the socket path to serve on")
+    serve(MODEL_SERVER_SOCKET)
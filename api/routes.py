@@ -1,12 +1,55 @@
-from fastapi import APIRouter
-from api.schemas import QueryRequest, QueryResponse, EvidenceBlock
+from functools import lru_cache
+from typing import Optional
+import math
+import os
+
+from fastapi import APIRouter, Header, HTTPException
+from api.schemas import (
+    QueryRequest,
+    QueryResponse,
+    EvidenceBlock,
+    IndexReloadRequest,
+    IndexStatusResponse,
+    PageResponse,
+    JobRequest,
+    JobCreatedResponse,
+    JobResponse,
+)
 from api.services.rag_service import RAGService
 from api.services.llm_service import LLMService
+from api.services.query_router import QueryRouter
+from api.services import job_service
+from api.services.admission import (
+    ADMISSION_MAX_CONCURRENCY,
+    AdmissionController,
+    AdmissionRejected,
+    AdmittedLLM,
+)
+from api.deadline import QUERY_DEADLINE_MS, Deadline
+from api.metrics import metrics
+from api.runtime import thread_budget
+from llm.backends import get_backend
+from vectorstore.snapshots import list_snapshots
+from processing.page_index import PAGE_INDEX_DIR, PageStore
 
 router = APIRouter()
 rag_service = RAGService()
 llm_service = LLMService()
 
+# LLM calls go through admission control, one queue per priority lane
+admission = AdmissionController() if ADMISSION_MAX_CONCURRENCY else None
+
+
+def admitted_llm(lane: str):
+    return AdmittedLLM(llm_service, admission, lane) if admission else llm_service
+
+
+query_routers = {
+    lane: QueryRouter(rag_service, admitted_llm(lane)) for lane in ("interactive", "batch")
+}
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
 # in api/main.py
 
 @router.get("/")
@@ -22,8 +65,30 @@ def root():
 def health_check():
     return {"status": "ok"}
 
-@router.post("/query", response_model=QueryResponse)
-def query_endpoint(request: QueryRequest):
+@router.get("/metrics")
+def get_metrics():
+    snapshot = {**metrics.snapshot(), "runtime": thread_budget.as_dict()}
+    if admission is not None:
+        snapshot["admission"] = admission.snapshot()
+    return snapshot
+
+def answer_query(
+    request: QueryRequest,
+    router: Optional[QueryRouter] = None,
+    default_deadline_ms: int = QUERY_DEADLINE_MS,
+) -> QueryResponse:
+    """
+    Shared by /query and job workers. Raises ValueError for requests the
+    router rejects (e.g. too many comparison targets) and AdmissionRejected
+    when the LLM queue of the request's lane is full.
+    """
+    router = router or query_routers[request.priority]
+
+    # Started before any work so validation and retrieval count against it
+    deadline = Deadline.for_request(request.deadline_ms, default_deadline_ms)
+
+    if request.backend:
+        get_backend(request.backend)  # ValueError for unknown backends
 
     filters = {}
 
@@ -35,20 +100,17 @@ def query_endpoint(request: QueryRequest):
 
     filters["report_type"] = "annual_report"
 
-    result = rag_service.retrieve(
+    # Refuses, answers from facts, or skips the LLM where possible
+    result = router.run(
         query=request.query,
         filters=filters,
         top_k=request.top_k,
+        companies=request.companies,
+        fiscal_years=request.fiscal_years,
+        backend=request.backend,
+        deadline=deadline,
     )
-
-    if not result["raw_chunks"] or not result["evidence_context"]:
-        answer = "I do not have enough information in the provided documents."
-    else:
-        # Generate answer
-        answer = llm_service.answer(
-            question=request.query,
-            evidence_context=result["evidence_context"],
-        )
+    answer = result["answer"]
 
     # 🔹 Build evidence blocks
     evidence = []
@@ -66,4 +128,128 @@ def query_endpoint(request: QueryRequest):
     return QueryResponse(
         answer=answer,
         evidence=evidence,
-    )
\ No newline at end of file
+        partial=result["partial"],
+        degradations=result["degradations"],
+    )
+
+
+@router.post("/query", response_model=QueryResponse)
+def query_endpoint(request: QueryRequest):
+    try:
+        return answer_query(request)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after_s))},
+        )
+
+
+# -----------------------------
+# Jobs: bulk / long-running questions
+# -----------------------------
+
+# Job workers share one LLM rate limit and queue for the LLM behind both
+# /query lanes; /query itself is not rate limited
+job_router = QueryRouter(
+    rag_service,
+    job_service.RateLimitedLLM(
+        admitted_llm("jobs"),
+        job_service.RateLimiter(job_service.JOBS_LLM_RATE_PER_S, job_service.JOBS_LLM_BURST),
+    ),
+)
+
+jobs = job_service.JobService(
+    store=job_service.JOB_STORES[job_service.JOBS_BACKEND](),
+    # Jobs have no server-default deadline, only one set in the request
+    handler=lambda request: answer_query(QueryRequest(**request), job_router, default_deadline_ms=0).model_dump(),
+)
+
+
+@router.post("/jobs", response_model=JobCreatedResponse, status_code=202)
+def create_job(request: JobRequest):
+    requests = [q.model_dump() for q in request.queries]
+    job_id = jobs.submit(requests)
+    return JobCreatedResponse(job_id=job_id, status=job_service.PENDING, total=len(requests))
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobResponse(**job)
+
+
+# -----------------------------
+# Documents: page lookup
+# -----------------------------
+
+@lru_cache(maxsize=1)
+def get_page_store() -> PageStore:
+    return PageStore(PAGE_INDEX_DIR)
+
+
+@router.get("/documents/{document_id}/pages/{page}", response_model=PageResponse)
+def get_document_page(document_id: str, page: int):
+    try:
+        page_store = get_page_store()
+    except FileNotFoundError:
+        raise HTTPException(status_code=503, detail="Page index not available")
+
+    result = page_store.page(document_id, page)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Page not found")
+
+    return PageResponse(**result)
+
+
+# -----------------------------
+# Admin: index snapshots
+# -----------------------------
+
+def require_admin(token):
+    # Admin endpoints are disabled unless a token is configured
+    if not ADMIN_TOKEN or token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin access denied")
+
+
+def index_status() -> IndexStatusResponse:
+    return IndexStatusResponse(
+        version=rag_service.index_version,
+        manifest=rag_service.index_manifest,
+        history=rag_service.index_history,
+        reload=rag_service.reload_status,
+        available=list_snapshots(),
+    )
+
+
+@router.get("/admin/index", response_model=IndexStatusResponse)
+def get_index_status(x_admin_token: str = Header(None)):
+    require_admin(x_admin_token)
+    return index_status()
+
+
+@router.post("/admin/index/reload", response_model=IndexStatusResponse, status_code=202)
+def reload_index(
+    request: IndexReloadRequest,
+    x_admin_token: str = Header(None),
+):
+    require_admin(x_admin_token)
+    try:
+        rag_service.reload_in_background(request.version)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return index_status()
+
+
+@router.post("/admin/index/rollback", response_model=IndexStatusResponse, status_code=202)
+def rollback_index(x_admin_token: str = Header(None)):
+    require_admin(x_admin_token)
+    try:
+        rag_service.rollback_in_background()
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return index_status()
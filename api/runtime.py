@@ -0,0 +1,147 @@
+"""
+Thread budget for the serving process.
+
+Left alone, torch (intra-op pool), FAISS (OpenMP) and the request
+threadpool each size themselves to every core of the machine, and several
+concurrent requests then oversubscribe the CPU. The budget splits the
+cores available to the container between worker processes and assigns:
+
+embed_threads    torch / onnxruntime intra-op threads. Queries are embedded
+                 by one batcher thread (retrieval/embed_batcher.py), so it
+                 gets the worker's whole share of cores.
+faiss_threads    OpenMP threads per FAISS search. Searches are single
+                 queries over a small index and already run concurrently,
+                 one per request thread, so 1.
+request_threads  FastAPI threadpool for sync endpoints. These mostly wait
+                 on the LLM, so the pool is sized for concurrency rather
+                 than cores.
+
+Each value can be overridden (EMBED_THREADS, FAISS_THREADS,
+REQUEST_THREADS). apply_thread_budget() must run before torch and FAISS
+do any work; api/main.py calls it before importing the routes. The
+applied budget is reported under "runtime" on GET /metrics.
+
+Components that own background threads start them through start_threads(),
+which also restarts them in forked workers and leaves the preloading
+parent of api/serve.py without any.
+"""
+
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+CGROUP_CPU_MAX = Path("/sys/fs/cgroup/cpu.max")
+
+DEFAULT_REQUEST_THREADS = 40  # anyio's default
+
+# Set by api/serve.py while the parent preloads the app for its workers
+SERVE_PRELOAD = os.getenv("SERVE_PRELOAD") == "1"
+
+
+@dataclass(frozen=True)
+class ThreadBudget:
+    cores: int
+    workers: int
+    embed_threads: int
+    faiss_threads: int
+    request_threads: int
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+def available_cores() -> int:
+    """
+    CPUs this process may use: affinity mask, capped by a cgroup v2 CPU
+    quota (e.g. a Cloud Run or Docker --cpus limit).
+    """
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+
+    try:
+        quota, period = CGROUP_CPU_MAX.read_text().split()
+        if quota != "max":
+            cores = min(cores, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+
+    return cores
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+def compute_thread_budget(cores: Optional[int] = None, workers: Optional[int] = None) -> ThreadBudget:
+    cores = cores or _env_int("RUNTIME_CORES") or available_cores()
+    # SERVE_WORKERS is set by api/serve.py, WEB_CONCURRENCY read by uvicorn --workers
+    workers = workers or _env_int("SERVE_WORKERS") or _env_int("WEB_CONCURRENCY") or 1
+    cores_per_worker = max(1, cores // workers)
+
+    return ThreadBudget(
+        cores=cores,
+        workers=workers,
+        embed_threads=_env_int("EMBED_THREADS") or cores_per_worker,
+        faiss_threads=_env_int("FAISS_THREADS") or 1,
+        request_threads=_env_int("REQUEST_THREADS") or DEFAULT_REQUEST_THREADS,
+    )
+
+
+def apply_thread_budget(budget: ThreadBudget) -> None:
+    """
+    Configure torch and FAISS thread pools for this process. The request
+    threadpool is set from the running event loop (apply_request_threads).
+    """
+    # Read by OpenMP / BLAS runtimes that have not been loaded yet
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ.setdefault(name, str(budget.embed_threads))
+
+    from retrieval.embed_query import EMBEDDER_BACKEND
+
+    if EMBEDDER_BACKEND == "sentence_transformers":
+        import torch
+
+        torch.set_num_threads(budget.embed_threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass  # only settable before torch's first parallel work
+
+    import faiss
+
+    faiss.omp_set_num_threads(budget.faiss_threads)
+
+    logger.info("thread_budget_applied", extra=budget.as_dict())
+
+
+def apply_request_threads(budget: ThreadBudget) -> None:
+    """
+    Size the threadpool FastAPI runs sync endpoints on. Must be called
+    from inside the event loop (the app's startup hook).
+    """
+    import anyio.to_thread
+
+    anyio.to_thread.current_default_thread_limiter().total_tokens = budget.request_threads
+
+
+def start_threads(start: Callable[[], None]) -> None:
+    """
+    Run `start` (which starts a component's background threads) now and
+    in every child forked from this process, since threads do not survive
+    fork(). Under SERVE_PRELOAD it runs in the children only: the parent
+    stays idle, so no thread of its can hold a lock across fork() or write
+    to the pages the workers share with it.
+    """
+    if not SERVE_PRELOAD:
+        start()
+    os.register_at_fork(after_in_child=start)
+
+
+thread_budget = compute_thread_budget()
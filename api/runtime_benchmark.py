@@ -0,0 +1,189 @@
+"""
+Sweep thread budgets (api/runtime.py) over the /query pipeline.
+
+Each configuration runs --workers processes side by side, like the
+workers of api/serve.py on one machine. Every process loads the embedder
+and the index, applies its thread budget, then sends the benchmark
+questions (tests/test_queries.json) through QueryRouter at each
+concurrency level. Answers come from the stub LLM backend, so the numbers
+are embedding + search + routing cost only.
+
+Reports, per configuration and concurrency (per worker):
+- total throughput across workers (requests/s)
+- p50 / p99 request latency
+
+Usage:
+    python -m api.runtime_benchmark --workers 2 --concurrency 1 4 16
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from api.runtime import available_cores
+from llm.backend_benchmark import percentile
+
+QUERIES_PATH = Path("tests/test_queries.json")
+
+ROUNDS = 5
+
+
+def configs(cores: int) -> Dict[str, Dict[str, str]]:
+    """
+    Environment overrides per configuration.
+    """
+    return {
+        # What torch / OpenMP pick on their own: every process uses every core
+        "unbounded": {
+            "EMBED_THREADS": str(cores),
+            "FAISS_THREADS": str(cores),
+            "OMP_NUM_THREADS": str(cores),
+        },
+        "budget": {},
+        "single": {"EMBED_THREADS": "1", "FAISS_THREADS": "1", "OMP_NUM_THREADS": "1"},
+    }
+
+
+def load_requests() -> List[Dict]:
+    return [
+        {
+            "query": q["llm_request"]["query"],
+            "filters": {
+                k: q["llm_request"][k]
+                for k in ("company", "fiscal_year")
+                if q["llm_request"].get(k) is not None
+            },
+            "top_k": q["llm_request"].get("top_k") or 5,
+        }
+        for q in json.loads(QUERIES_PATH.read_text(encoding="utf-8"))
+    ]
+
+# -----------------------------
+# Worker process
+# -----------------------------
+
+def run_worker(concurrency_levels: List[int]) -> None:
+    """
+    Load, report ready, wait for the start line on stdin, then print one
+    JSON line per concurrency level.
+    """
+    from api.runtime import apply_thread_budget, thread_budget
+
+    apply_thread_budget(thread_budget)
+
+    from api.services.llm_service import LLMService
+    from api.services.query_router import QueryRouter
+    from api.services.rag_service import RAGService
+
+    router = QueryRouter(RAGService(model_server_socket=None), LLMService())
+    requests = load_requests()
+
+    def call(request: Dict) -> float:
+        start = time.perf_counter()
+        router.run(request["query"], request["filters"], request["top_k"], backend="stub")
+        return (time.perf_counter() - start) * 1000
+
+    call(requests[0])  # warm-up
+    print(json.dumps({"ready": True, "budget": thread_budget.as_dict()}), flush=True)
+    sys.stdin.readline()
+
+    for concurrency in concurrency_levels:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            start = time.perf_counter()
+            latencies = list(pool.map(call, requests * ROUNDS))
+            elapsed_s = time.perf_counter() - start
+        print(json.dumps({"concurrency": concurrency, "elapsed_s": elapsed_s, "latencies_ms": latencies}), flush=True)
+
+# -----------------------------
+# Sweep
+# -----------------------------
+
+def _json_lines(stream):
+    # Libraries may print progress to stdout as well
+    for line in stream:
+        if line.startswith("{"):
+            yield json.loads(line)
+
+
+def run_config(env: Dict[str, str], workers: int, concurrency_levels: List[int]) -> List[Dict]:
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-m", "api.runtime_benchmark", "--worker",
+             "--concurrency", *map(str, concurrency_levels)],
+            env={**os.environ, **env, "SERVE_WORKERS": str(workers)},
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(workers)
+    ]
+
+    # Start together so the workers compete for cores as in production
+    budget = None
+    for proc in procs:
+        ready = next(_json_lines(proc.stdout), None)
+        if ready is None:
+            for p in procs:
+                p.kill()
+            raise RuntimeError("benchmark worker failed to load")
+        budget = ready["budget"]
+    for proc in procs:
+        proc.stdin.write("go\n")
+        proc.stdin.flush()
+
+    outputs = [list(_json_lines(proc.stdout)) for proc in procs]
+    for proc in procs:
+        if proc.wait() != 0:
+            raise RuntimeError("benchmark worker failed")
+
+    rows = []
+    for level, results in zip(concurrency_levels, zip(*outputs)):
+        latencies = [ms for r in results for ms in r["latencies_ms"]]
+        rows.append({
+            "budget": budget,
+            "concurrency": level,
+            "throughput_rps": sum(len(r["latencies_ms"]) / r["elapsed_s"] for r in results),
+            "p50_ms": percentile(latencies, 0.50),
+            "p99_ms": percentile(latencies, 0.99),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SERVE_WORKERS", "1")))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.concurrency)
+        return
+
+    cores = available_cores()
+    print(f"{cores} cores, {args.workers} worker(s)")
+    print(f"\n{'config':<12}{'embed':>7}{'faiss':>7}{'conc':>6}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}")
+
+    for name, env in configs(cores).items():
+        try:
+            rows = run_config(env, args.workers, args.concurrency)
+        except RuntimeError as e:
+            print(f"{name:<12}failed: {e}")
+            continue
+
+        for r in rows:
+            b = r["budget"]
+            print(
+                f"{name:<12}{b['embed_threads']:>7}{b['faiss_threads']:>7}{r['concurrency']:>6}"
+                f"{r['throughput_rps']:>9.1f}{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,28 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 
 
 class QueryRequest(BaseModel):
     query: str = Field(..., description="User question")
     company: Optional[str] = Field(None, description="Company filter")
     fiscal_year: Optional[int] = Field(None, description="Fiscal year filter")
+    companies: Optional[List[str]] = Field(
+        None, description="Companies to compare (one retrieval per company)"
+    )
+    fiscal_years: Optional[List[int]] = Field(
+        None, description="Fiscal years to compare (one retrieval per year)"
+    )
     top_k: int = Field(5, ge=1, le=20)
+    backend: Optional[str] = Field(
+        None, description="LLM backend for this request (openai, local, stub); defaults to LLM_BACKEND"
+    )
+    priority: Literal["interactive", "batch"] = Field(
+        "interactive", description="Admission lane: UI traffic (interactive) is served before batch / eval traffic"
+    )
+    deadline_ms: Optional[int] = Field(
+        None, ge=100, le=300000,
+        description="Time budget for the whole request; defaults to QUERY_DEADLINE_MS",
+    )
 
 
 class EvidenceBlock(BaseModel):
@@ -19,4 +35,62 @@ class EvidenceBlock(BaseModel):
 
 class QueryResponse(BaseModel):
     answer: str
-    evidence: List[EvidenceBlock]
\ No newline at end of file
+    evidence: List[EvidenceBlock]
+    partial: bool = Field(False, description="Deadline reached: evidence only, no generated answer")
+    degradations: List[str] = Field(
+        default_factory=list, description="Deadline degradation paths taken (api/deadline.py)"
+    )
+
+
+class IndexReloadRequest(BaseModel):
+    version: Optional[str] = Field(
+        None, description="Snapshot version to load (defaults to CURRENT)"
+    )
+
+
+class IndexStatusResponse(BaseModel):
+    version: str
+    manifest: Dict
+    history: List[str]
+    reload: Dict
+    available: List[Dict]
+
+
+class PageResponse(BaseModel):
+    document_id: str
+    company: str
+    fiscal_year: int
+    page: int
+    text: str
+    chunk_ids: List[str]
+    first_page: int
+    page_count: int
+
+
+class JobRequest(BaseModel):
+    queries: List[QueryRequest] = Field(..., min_length=1, max_length=500)
+
+
+class JobCreatedResponse(BaseModel):
+    job_id: str
+    status: str
+    total: int
+
+
+class JobItem(BaseModel):
+    index: int
+    query: str
+    status: str
+    result: Optional[QueryResponse] = None
+    error: Optional[str] = None
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    created_at: float
+    updated_at: float
+    total: int
+    completed: int
+    failed: int
+    items: List[JobItem]
@@ -0,0 +1,227 @@
+"""
+Preload-and-fork launcher: load the app once, then fork HTTP workers.
+
+    python -m api.serve --workers 4 --port 8000
+    python -m api.serve --memory-report <parent pid>
+
+The parent imports api.main, which builds RAGService (MiniLM weights,
+FAISS index, chunk metadata), LLM and job services, binds the listening
+socket and forks the workers. Workers share the loaded pages
+copy-on-write instead of each loading their own copy.
+
+Copy-on-write only holds while pages are not written. CPython's cyclic GC
+writes to the header of every tracked object it scans, so the parent
+disables GC while loading, then calls gc.freeze() and re-enables it:
+everything loaded so far moves to a permanent generation that no later
+collection (in the parent or a worker) touches. Large buffers (numpy
+arrays, FAISS and torch storage) are not refcounted per element and stay
+shared.
+
+The parent only supervises: with SERVE_PRELOAD set while it imports the
+app, components that own background threads (EmbeddingBatcher, JobService
+workers and lease renewal, the index watcher, the logging listener) start
+them in the forked workers only (api.runtime.start_threads). So the parent
+never claims jobs or answers requests, and no thread of its holds a lock
+(a reload, metrics or logging queue lock) when a worker is forked.
+
+The parent restarts workers that exit unexpectedly and forwards SIGTERM /
+SIGINT. --memory-report prints unique (private) vs shared memory per
+process, from /proc/<pid>/smaps_rollup.
+"""
+
+from pathlib import Path
+from typing import Dict, List
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+logger = logging.getLogger("finance-dis")
+
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", "2"))
+
+# Minimum seconds between restarts of a crashing worker slot
+RESTART_BACKOFF_S = 1.0
+
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+# -----------------------------
+# Memory report
+# -----------------------------
+
+def smaps_rollup(pid: int) -> Dict[str, int]:
+    """
+    Memory totals of a process in kB (Linux only).
+    """
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in SMAPS_FIELDS:
+                values[name] = int(rest.split()[0])
+    return values
+
+
+def child_pids(pid: int) -> List[int]:
+    children = []
+    for task in Path(f"/proc/{pid}/task").iterdir():
+        text = (task / "children").read_text().split()
+        children.extend(int(c) for c in text)
+    return sorted(children)
+
+
+def memory_report(parent_pid: int) -> str:
+    rows = [("parent", parent_pid)] + [("worker", pid) for pid in child_pids(parent_pid)]
+
+    lines = [f"{'process':<8}{'pid':>8}{'rss MB':>10}{'pss MB':>10}{'shared MB':>11}{'unique MB':>11}"]
+    total_unique = 0
+    for role, pid in rows:
+        m = smaps_rollup(pid)
+        shared = m["Shared_Clean"] + m["Shared_Dirty"]
+        unique = m["Private_Clean"] + m["Private_Dirty"]
+        total_unique += unique
+        lines.append(
+            f"{role:<8}{pid:>8}{m['Rss'] / 1024:>10.1f}{m['Pss'] / 1024:>10.1f}"
+            f"{shared / 1024:>11.1f}{unique / 1024:>11.1f}"
+        )
+
+    total_pss = sum(smaps_rollup(pid)["Pss"] for _, pid in rows)
+    lines.append(f"\nTotal PSS: {total_pss / 1024:.1f} MB, total unique: {total_unique / 1024:.1f} MB")
+    return "\n".join(lines)
+
+# -----------------------------
+# Launcher
+# -----------------------------
+
+def bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock: socket.socket) -> None:
+    import uvicorn
+
+    # Handlers installed by the parent must not run in workers
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    # Components created from here on are the worker's own
+    from api import runtime
+
+    runtime.SERVE_PRELOAD = False
+    os.environ.pop("SERVE_PRELOAD", None)
+
+    server = uvicorn.Server(uvicorn.Config(app, log_config=None))
+    server.run(sockets=[sock])
+
+
+def spawn(app, sock: socket.socket) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(app, sock)
+        except BaseException:
+            logger.exception("worker_failed")
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def serve(host: str, port: int, workers: int) -> None:
+    # No cyclic GC while loading: collections would touch every object
+    gc.disable()
+    start = time.time()
+
+    # Read by api.runtime to split cores between the workers, and to
+    # leave background threads to the workers
+    os.environ["SERVE_WORKERS"] = str(workers)
+    os.environ["SERVE_PRELOAD"] = "1"
+
+    from api.main import app
+
+    gc.collect()
+    gc.freeze()
+    # Later collections skip the frozen objects
+    gc.enable()
+
+    sock = bind(host, port)
+    logger.info(
+        "serve_preloaded",
+        extra={
+            "load_s": round(time.time() - start, 2),
+            "frozen_objects": gc.get_freeze_count(),
+            "workers": workers,
+            "port": port,
+        },
+    )
+
+    slots: Dict[int, float] = {}  # pid -> start time
+    for _ in range(workers):
+        slots[spawn(app, sock)] = time.time()
+
+    stopping = False
+
+    def stop(signum, _frame):
+        nonlocal stopping
+        stopping = True
+        for pid in slots:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while slots:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+
+        started = slots.pop(pid, None)
+        if stopping or started is None:
+            continue
+
+        logger.warning(
+            "worker_exited",
+            extra={"pid": pid, "exit_code": os.waitstatus_to_exitcode(status)},
+        )
+
+        # A worker dying right after start would otherwise spin
+        time.sleep(max(0.0, RESTART_BACKOFF_S - (time.time() - started)))
+        slots[spawn(app, sock)] = time.time()
+
+    sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS)
+    parser.add_argument("--memory-report", type=int, metavar="PID",
+                        help="print unique vs shared memory of a running launcher and its workers")
+    args = parser.parse_args()
+
+    if args.memory_report:
+        print(memory_report(args.memory_report))
+        return
+
+    serve(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
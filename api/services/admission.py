@@ -0,0 +1,247 @@
+"""
+Admission control for the LLM stage.
+
+At most ADMISSION_MAX_CONCURRENCY LLM calls run at once. Requests beyond
+that wait in a bounded queue per lane; a free slot goes to the waiting
+request of the highest-priority lane (FIFO within a lane):
+
+lane         priority  queue limit                    max wait
+-----------  --------  -----------------------------  ----------------------------
+interactive  0         ADMISSION_QUEUE_INTERACTIVE    ADMISSION_WAIT_INTERACTIVE_S
+batch        1         ADMISSION_QUEUE_BATCH          ADMISSION_WAIT_BATCH_S
+jobs         2         JOBS_WORKERS (never full)      unbounded
+
+/query picks its lane from QueryRequest.priority; job workers use "jobs".
+A full queue is rejected at once with 429, a request that waited its
+lane's maximum with 503, both with Retry-After estimated from queue depth
+and recent LLM call durations. A request whose deadline (api/deadline.py)
+would pass in the queue answers from evidence only instead.
+
+Requests the router answers without the LLM never queue. Threads waiting
+here are FastAPI threadpool threads, so the queue limits plus
+ADMISSION_MAX_CONCURRENCY should stay below REQUEST_THREADS
+(api/runtime.py).
+"""
+
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+import logging
+import math
+import os
+import threading
+import time
+
+from api.deadline import DEADLINE_LLM_MIN_MS, PARTIAL_ANSWER
+from api.metrics import Metrics, metrics as default_metrics
+from api.services.job_service import JOBS_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# LLM calls in flight (0 disables admission control)
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "8"))
+
+ADMISSION_QUEUE_INTERACTIVE = int(os.getenv("ADMISSION_QUEUE_INTERACTIVE", "16"))
+ADMISSION_QUEUE_BATCH = int(os.getenv("ADMISSION_QUEUE_BATCH", "8"))
+ADMISSION_WAIT_INTERACTIVE_S = float(os.getenv("ADMISSION_WAIT_INTERACTIVE_S", "10"))
+ADMISSION_WAIT_BATCH_S = float(os.getenv("ADMISSION_WAIT_BATCH_S", "30"))
+
+# Assumed LLM call duration until calls have been measured
+INITIAL_SERVICE_S = 2.0
+# Weight of the latest call in the running average
+SERVICE_EWMA_ALPHA = 0.2
+
+QUEUE_DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64)
+
+
+@dataclass(frozen=True)
+class Lane:
+    name: str
+    priority: int  # lower is served first
+    queue_limit: int
+    max_wait_s: Optional[float]  # None waits as long as it takes
+
+
+LANES = (
+    Lane("interactive", 0, ADMISSION_QUEUE_INTERACTIVE, ADMISSION_WAIT_INTERACTIVE_S),
+    Lane("batch", 1, ADMISSION_QUEUE_BATCH, ADMISSION_WAIT_BATCH_S),
+    Lane("jobs", 2, JOBS_WORKERS, None),
+)
+
+
+class AdmissionRejected(Exception):
+    """
+    reason: queue_full (429), queue_timeout (503) or deadline (the request's
+    own deadline would pass while queued).
+    """
+
+    STATUS = {"queue_full": 429, "queue_timeout": 503, "deadline": 503}
+
+    def __init__(self, lane: str, reason: str, retry_after_s: float):
+        super().__init__(f"LLM capacity exhausted ({lane} lane: {reason})")
+        self.lane = lane
+        self.reason = reason
+        self.status_code = self.STATUS[reason]
+        self.retry_after_s = retry_after_s
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrency: int = ADMISSION_MAX_CONCURRENCY,
+        lanes: List[Lane] = LANES,
+        metrics: Metrics = default_metrics,
+    ):
+        self.max_concurrency = max_concurrency
+        self.lanes: Dict[str, Lane] = {lane.name: lane for lane in lanes}
+        self.metrics = metrics
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._queues: Dict[str, deque] = {lane.name: deque() for lane in lanes}
+        self._service_s = INITIAL_SERVICE_S
+
+    def _head(self) -> Optional[object]:
+        """
+        Ticket of the next request to admit.
+        """
+        for lane in sorted(self.lanes.values(), key=lambda l: l.priority):
+            if self._queues[lane.name]:
+                return self._queues[lane.name][0]
+        return None
+
+    def _waiting_ahead(self, lane: Lane) -> int:
+        return sum(
+            len(self._queues[other.name])
+            for other in self.lanes.values()
+            if other.priority <= lane.priority
+        )
+
+    def retry_after_s(self, lane: Lane) -> float:
+        """
+        Time until the requests queued ahead in this or higher lanes and
+        the current calls are likely done.
+        """
+        waiting = self._waiting_ahead(lane) + 1
+        return max(1.0, math.ceil(waiting * self._service_s / self.max_concurrency))
+
+    def _reject(self, lane: Lane, reason: str) -> AdmissionRejected:
+        self.metrics.increment("admission_rejected", f"{lane.name}:{reason}")
+        logger.warning(
+            "admission_rejected",
+            extra={"lane": lane.name, "reason": reason, "queued": self._waiting_ahead(lane)},
+        )
+        return AdmissionRejected(lane.name, reason, self.retry_after_s(lane))
+
+    def acquire(self, lane_name: str, timeout_s: Optional[float] = None) -> float:
+        """
+        Take one LLM slot, waiting in the lane's queue if none is free.
+        timeout_s (e.g. from the request deadline) caps the lane's maximum
+        wait. Returns the time the slot was taken, for release().
+        Raises AdmissionRejected.
+        """
+        lane = self.lanes[lane_name]
+        start = time.monotonic()
+
+        with self._cond:
+            if self._active >= self.max_concurrency or self._waiting_ahead(lane):
+                queue = self._queues[lane.name]
+                if len(queue) >= lane.queue_limit:
+                    raise self._reject(lane, "queue_full")
+
+                ticket = object()
+                queue.append(ticket)
+                self.metrics.observe(
+                    f"admission_queue_depth:{lane.name}", len(queue), buckets=QUEUE_DEPTH_BUCKETS
+                )
+
+                reason, wait_s = "queue_timeout", lane.max_wait_s
+                if timeout_s is not None and (wait_s is None or timeout_s < wait_s):
+                    reason, wait_s = "deadline", timeout_s
+
+                while self._active >= self.max_concurrency or self._head() is not ticket:
+                    left_s = None if wait_s is None else start + wait_s - time.monotonic()
+                    if left_s is not None and left_s <= 0:
+                        queue.remove(ticket)
+                        self._cond.notify_all()
+                        raise self._reject(lane, reason)
+                    self._cond.wait(left_s)
+
+                queue.popleft()
+                # Another slot may be free for the next in line
+                self._cond.notify_all()
+
+            self._active += 1
+
+        admitted_at = time.monotonic()
+        self.metrics.increment("admission_admitted", lane.name)
+        self.metrics.observe(f"admission_wait_ms:{lane.name}", (admitted_at - start) * 1000)
+        return admitted_at
+
+    def release(self, admitted_at: float) -> None:
+        with self._cond:
+            self._active -= 1
+            self._service_s += SERVICE_EWMA_ALPHA * (time.monotonic() - admitted_at - self._service_s)
+            self._cond.notify_all()
+
+    @contextmanager
+    def admit(self, lane_name: str, timeout_s: Optional[float] = None) -> Iterator[None]:
+        admitted_at = self.acquire(lane_name, timeout_s)
+        try:
+            yield
+        finally:
+            self.release(admitted_at)
+
+    def snapshot(self) -> Dict:
+        with self._cond:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "active": self._active,
+                "queued": {name: len(queue) for name, queue in self._queues.items()},
+                "service_s": round(self._service_s, 3),
+            }
+
+
+class AdmittedLLM:
+    """
+    LLMService wrapper that takes an admission slot in one lane per
+    answer() call.
+    """
+
+    def __init__(self, llm_service, controller: AdmissionController, lane: str):
+        self.llm_service = llm_service
+        self.controller = controller
+        self.lane = lane
+
+    def answer(
+        self,
+        question: str,
+        evidence_context: str,
+        backend: Optional[str] = None,
+        borderline: bool = False,
+        deadline=None,
+    ) -> str:
+        # Leave the LLM call the time it needs once admitted
+        timeout_s = None
+        if deadline is not None:
+            timeout_s = max(0.0, (deadline.remaining_ms() - DEADLINE_LLM_MIN_MS) / 1000)
+
+        try:
+            admitted_at = self.controller.acquire(self.lane, timeout_s)
+        except AdmissionRejected as e:
+            if e.reason != "deadline":
+                raise
+            deadline.degrade("evidence_only")
+            return PARTIAL_ANSWER
+
+        try:
+            return self.llm_service.answer(
+                question=question,
+                evidence_context=evidence_context,
+                backend=backend,
+                borderline=borderline,
+                deadline=deadline,
+            )
+        finally:
+            self.controller.release(admitted_at)
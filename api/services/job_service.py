@@ -0,0 +1,440 @@
+"""
+Asynchronous jobs for long-running or bulk questions.
+
+POST /jobs stores one item per query and returns immediately; a pool of
+in-process worker threads answers the items and GET /jobs/{id} reports
+progress and results. State lives in a local job store (SQLite by
+default), so queued work survives a restart. A claimed item is leased
+for JOBS_LEASE_S and the lease is renewed while a worker runs it; an item
+whose lease ran out (its worker's process died) is claimed again. This
+also holds when several processes (uvicorn --workers, api/serve.py) share
+the store: none of them can take back items a sibling is running.
+
+LLM calls made by job workers go through a token-bucket RateLimiter, so a
+large batch cannot starve interactive /query traffic of provider quota.
+"""
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from api import runtime
+
+logger = logging.getLogger(__name__)
+
+JOBS_BACKEND = os.getenv("JOBS_BACKEND", "sqlite")
+JOBS_DB = Path(os.getenv("JOBS_DB", "data/jobs/jobs.sqlite3"))
+
+# Worker threads answering job items (0 disables processing)
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "2"))
+
+# LLM calls per second across all job workers, and the allowed burst
+JOBS_LLM_RATE_PER_S = float(os.getenv("JOBS_LLM_RATE_PER_S", "1.0"))
+JOBS_LLM_BURST = int(os.getenv("JOBS_LLM_BURST", "2"))
+
+# How long an idle worker sleeps before re-checking the store
+JOBS_POLL_INTERVAL_S = float(os.getenv("JOBS_POLL_INTERVAL_S", "5"))
+
+# Seconds a claimed item stays reserved without a renewal; renewed every
+# third of that while it runs
+JOBS_LEASE_S = float(os.getenv("JOBS_LEASE_S", "60"))
+
+# Item states
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# -----------------------------
+# Rate limiting
+# -----------------------------
+
+class RateLimiter:
+    """
+    Token bucket: `rate_per_s` tokens per second, at most `burst` saved up.
+    acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate_per_s: float, burst: int = 1):
+        self.rate_per_s = rate_per_s
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate_per_s <= 0:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_per_s)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait_s = (1 - self._tokens) / self.rate_per_s
+
+            time.sleep(wait_s)
+
+
+class RateLimitedLLM:
+    """
+    LLMService wrapper taking a RateLimiter token per answer() call. Routes
+    that skip the LLM (see query_router) consume no tokens.
+    """
+
+    def __init__(self, llm_service, limiter: RateLimiter):
+        self.llm_service = llm_service
+        self.limiter = limiter
+
+    def answer(
+        self,
+        question: str,
+        evidence_context: str,
+        backend: Optional[str] = None,
+        borderline: bool = False,
+        deadline=None,
+    ) -> str:
+        self.limiter.acquire()
+        return self.llm_service.answer(
+            question=question,
+            evidence_context=evidence_context,
+            backend=backend,
+            borderline=borderline,
+            deadline=deadline,
+        )
+
+# -----------------------------
+# Job stores
+# -----------------------------
+
+class JobStore(ABC):
+    """
+    Interface of a job store. Implementations must be safe to call from
+    several worker threads.
+    """
+
+    @abstractmethod
+    def create(self, job_id: str, requests: List[Dict]) -> None:
+        ...
+
+    @abstractmethod
+    def claim(self) -> Optional[Tuple[str, int, Dict]]:
+        """
+        Lease the oldest pending (or lease-expired) item and mark it
+        running; (job_id, index, request).
+        """
+
+    @abstractmethod
+    def renew(self, items: List[Tuple[str, int]]) -> None:
+        """
+        Extend the lease of items this process is still running.
+        """
+
+    @abstractmethod
+    def finish(self, job_id: str, index: int, result: Optional[Dict] = None, error: Optional[str] = None) -> None:
+        ...
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict]:
+        ...
+
+
+class SQLiteJobStore(JobStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        job_id TEXT PRIMARY KEY,
+        created_at REAL NOT NULL,
+        total INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS job_items (
+        job_id TEXT NOT NULL,
+        item_index INTEGER NOT NULL,
+        request TEXT NOT NULL,
+        status TEXT NOT NULL,
+        result TEXT,
+        error TEXT,
+        updated_at REAL NOT NULL,
+        lease_expires REAL,
+        PRIMARY KEY (job_id, item_index)
+    );
+    CREATE INDEX IF NOT EXISTS job_items_status ON job_items (status);
+    """
+
+    def __init__(self, path: Path = JOBS_DB, lease_s: float = JOBS_LEASE_S):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.lease_s = lease_s
+
+        self._connect()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self.SCHEMA)
+
+        # Stores created before leases
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(job_items)")}
+        if "lease_expires" not in columns:
+            self._conn.execute("ALTER TABLE job_items ADD COLUMN lease_expires REAL")
+
+        # A connection must not be used across fork(); workers forked by
+        # api/serve.py open their own
+        os.register_at_fork(after_in_child=self._connect)
+
+    def _connect(self) -> None:
+        self._conn = sqlite3.connect(
+            str(self.path), check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._lock = threading.Lock()
+
+    def create(self, job_id: str, requests: List[Dict]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO jobs (job_id, created_at, total) VALUES (?, ?, ?)",
+                    (job_id, now, len(requests)),
+                )
+                self._conn.executemany(
+                    "INSERT INTO job_items (job_id, item_index, request, status, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(job_id, i, json.dumps(r), PENDING, now) for i, r in enumerate(requests)],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def claim(self) -> Optional[Tuple[str, int, Dict]]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # rowid order is submission order: jobs are served FIFO
+                row = self._conn.execute(
+                    "SELECT rowid, job_id, item_index, request, status FROM job_items "
+                    "WHERE status = ? OR (status = ? AND lease_expires < ?) "
+                    "ORDER BY rowid LIMIT 1",
+                    (PENDING, RUNNING, now),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE job_items SET status = ?, updated_at = ?, lease_expires = ? WHERE rowid = ?",
+                        (RUNNING, now, now + self.lease_s, row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        if row is None:
+            return None
+
+        if row[4] == RUNNING:
+            # Its worker stopped renewing the lease, e.g. the process died
+            logger.info("job_item_reclaimed", extra={"job_id": row[1], "index": row[2]})
+        return row[1], row[2], json.loads(row[3])
+
+    def renew(self, items: List[Tuple[str, int]]) -> None:
+        if not items:
+            return
+        lease_expires = time.time() + self.lease_s
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE job_items SET lease_expires = ? "
+                "WHERE job_id = ? AND item_index = ? AND status = ?",
+                [(lease_expires, job_id, index, RUNNING) for job_id, index in items],
+            )
+
+    def finish(self, job_id: str, index: int, result: Optional[Dict] = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE job_items SET status = ?, result = ?, error = ?, updated_at = ? "
+                "WHERE job_id = ? AND item_index = ?",
+                (
+                    FAILED if error is not None else COMPLETED,
+                    json.dumps(result) if result is not None else None,
+                    error,
+                    time.time(),
+                    job_id,
+                    index,
+                ),
+            )
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._conn.execute(
+                "SELECT created_at, total FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if job is None:
+                return None
+
+            items = self._conn.execute(
+                "SELECT item_index, request, status, result, error, updated_at FROM job_items "
+                "WHERE job_id = ? ORDER BY item_index",
+                (job_id,),
+            ).fetchall()
+
+        return job_summary(
+            job_id,
+            created_at=job[0],
+            total=job[1],
+            items=[
+                {
+                    "index": index,
+                    "query": json.loads(request)["query"],
+                    "status": status,
+                    "result": json.loads(result) if result is not None else None,
+                    "error": error,
+                    "updated_at": updated_at,
+                }
+                for index, request, status, result, error, updated_at in items
+            ],
+        )
+
+
+JOB_STORES = {
+    "sqlite": SQLiteJobStore,
+}
+
+
+def job_summary(job_id: str, created_at: float, total: int, items: List[Dict]) -> Dict:
+    counts = {state: 0 for state in (PENDING, RUNNING, COMPLETED, FAILED)}
+    for item in items:
+        counts[item["status"]] += 1
+
+    done = counts[COMPLETED] + counts[FAILED]
+    if done == total:
+        status = COMPLETED
+    elif done or counts[RUNNING]:
+        status = RUNNING
+    else:
+        status = PENDING
+
+    return {
+        "job_id": job_id,
+        "status": status,
+        "created_at": created_at,
+        "updated_at": max((i["updated_at"] for i in items), default=created_at),
+        "total": total,
+        "completed": counts[COMPLETED],
+        "failed": counts[FAILED],
+        "items": [{k: v for k, v in i.items() if k != "updated_at"} for i in items],
+    }
+
+# -----------------------------
+# Service
+# -----------------------------
+
+class JobService:
+    """
+    `handler` answers one stored request dict and returns a JSON-able
+    result; exceptions mark the item failed without stopping the job.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        handler: Callable[[Dict], Dict],
+        workers: int = JOBS_WORKERS,
+        poll_interval_s: float = JOBS_POLL_INTERVAL_S,
+        renew_interval_s: float = JOBS_LEASE_S / 3,
+    ):
+        self.store = store
+        self.handler = handler
+        self.poll_interval_s = poll_interval_s
+        self.workers = workers
+        self.renew_interval_s = renew_interval_s
+
+        runtime.start_threads(self._start)
+
+    def _start(self) -> None:
+        self._wakeup = threading.Event()
+        # Items this process is running, whose leases it renews
+        self._held = set()
+        self._held_lock = threading.Lock()
+        for i in range(self.workers):
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True).start()
+        if self.workers:
+            threading.Thread(target=self._renew_leases, name="job-leases", daemon=True).start()
+
+    def submit(self, requests: List[Dict]) -> str:
+        job_id = str(uuid.uuid4())
+        self.store.create(job_id, requests)
+        self._wakeup.set()
+
+        logger.info("job_submitted", extra={"job_id": job_id, "total": len(requests)})
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self.store.get(job_id)
+
+    def run_next(self) -> bool:
+        """
+        Answer one pending item; False when the queue is empty.
+        """
+        claimed = self.store.claim()
+        if claimed is None:
+            return False
+
+        job_id, index, request = claimed
+        start_time = time.time()
+
+        with self._held_lock:
+            self._held.add((job_id, index))
+        try:
+            result = self.handler(request)
+        except Exception as e:
+            logger.exception("job_item_failed", extra={"job_id": job_id, "index": index})
+            self.store.finish(job_id, index, error=str(e) or type(e).__name__)
+        else:
+            self.store.finish(job_id, index, result=result)
+            logger.info(
+                "job_item_completed",
+                extra={
+                    "job_id": job_id,
+                    "index": index,
+                    "latency_ms": int((time.time() - start_time) * 1000),
+                },
+            )
+        finally:
+            with self._held_lock:
+                self._held.discard((job_id, index))
+
+        return True
+
+    def renew_leases(self) -> None:
+        with self._held_lock:
+            held = list(self._held)
+        self.store.renew(held)
+
+    def _renew_leases(self) -> None:
+        while True:
+            time.sleep(self.renew_interval_s)
+            try:
+                self.renew_leases()
+            except Exception:
+                logger.exception("job_lease_renewal_failed")
+
+    def _work(self) -> None:
+        while True:
+            # Cleared before checking, so a submit() racing with an empty
+            # claim still wakes this worker
+            self._wakeup.clear()
+            try:
+                if self.run_next():
+                    continue
+            except Exception:
+                logger.exception("job_worker_failed")
+
+            self._wakeup.wait(self.poll_interval_s)
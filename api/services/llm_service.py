@@ -1,14 +1,127 @@
+from typing import Dict, List, Optional, Tuple
 import logging
+import os
 import time
 import uuid
 
+from api.deadline import DEADLINE_FAST_MODEL_MS, PARTIAL_ANSWER, Deadline
+from api.metrics import metrics
+from llm.backends import ANSWER_TAG_PATTERN, REFUSAL_ANSWER
 from llm.generate_answer import generate_answer
 
 logger = logging.getLogger(__name__)
 
+# Model cascade, cheapest first: comma-separated backend:model tiers, e.g.
+#   LLM_CASCADE=local:llama3.1:8b,openai:gpt-4.1-mini
+#   LLM_CASCADE=openai:gpt-4.1-nano,openai:gpt-4.1-mini
+# Each tier's answer is kept unless it should escalate (see
+# LLMService.escalation_reason). Empty disables the cascade. A backend
+# named in the request bypasses it.
+LLM_CASCADE = os.getenv("LLM_CASCADE", "")
+
+
+def parse_cascade(spec: str) -> List[Tuple[str, Optional[str]]]:
+    """
+    "local:llama3.1:8b,openai" → [("local", "llama3.1:8b"), ("openai", None)]
+    (the model is everything after the first colon; None = backend default).
+    """
+    tiers = []
+    for tier in spec.split(","):
+        tier = tier.strip()
+        if tier:
+            backend, _, model = tier.partition(":")
+            tiers.append((backend, model or None))
+    return tiers
+
 
 class LLMService:
-    def answer(self, question: str, evidence_context: str) -> str:
+    def __init__(self, cascade: Optional[List[Tuple[str, Optional[str]]]] = None):
+        self.cascade = parse_cascade(LLM_CASCADE) if cascade is None else cascade
+
+    def answer(
+        self,
+        question: str,
+        evidence_context: str,
+        backend: Optional[str] = None,
+        borderline: bool = False,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """
+        borderline: retrieval confidence is close to the router's threshold;
+        the cascade then goes straight to its strongest tier.
+        deadline: the model call is abandoned when it runs out, and the
+        answer is PARTIAL_ANSWER (see api/deadline.py).
+        """
+        if backend or len(self.cascade) < 2:
+            tier = (backend, None) if backend or not self.cascade else self.cascade[0]
+            return self._generate(question, evidence_context, *tier, deadline)["answer"]
+
+        return self._cascade(question, evidence_context, borderline, deadline)
+
+    @staticmethod
+    def escalation_reason(result: Dict) -> Optional[str]:
+        """
+        Why a cheaper tier's result is not good enough, or None to keep it.
+        """
+        if "backend" not in result:
+            return None  # refused before any model call (no evidence)
+
+        if result.get("deadline_exceeded"):
+            return None  # no time left for another tier
+
+        if result.get("degraded"):
+            return "degraded"
+
+        raw_output = result.get("raw_output") or ""
+        if "<ANSWER>" in raw_output and not ANSWER_TAG_PATTERN.search(raw_output):
+            return "unparsable"
+
+        if result["answer"] == REFUSAL_ANSWER:
+            return "refusal"
+
+        return None
+
+    def _cascade(self, question: str, evidence_context: str, borderline: bool, deadline: Optional[Deadline]) -> str:
+        def pressed() -> bool:
+            return deadline is not None and deadline.remaining_ms() < DEADLINE_FAST_MODEL_MS
+
+        tiers = self.cascade
+        if borderline:
+            if pressed():
+                # Start from the cheapest tier anyway
+                deadline.degrade("fast_model")
+            else:
+                metrics.increment("llm_cascade_escalations", "borderline_retrieval")
+                tiers = tiers[-1:]
+
+        for i, (backend, model) in enumerate(tiers):
+            result = self._generate(question, evidence_context, backend, model, deadline)
+            tier = f"{result.get('backend', backend)}:{result.get('model', model)}"
+
+            reason = self.escalation_reason(result)
+            last = i == len(tiers) - 1
+            if reason is not None and not last and pressed():
+                deadline.degrade("skip_escalation")
+                reason = None
+
+            if reason is None or last:
+                metrics.increment("llm_cascade_answered", tier)
+                return result["answer"]
+
+            metrics.increment("llm_cascade_escalations", reason)
+            logger.info(
+                "llm_cascade_escalated",
+                extra={"component": "llm", "tier": tier, "reason": reason},
+            )
+
+    def _generate(
+        self,
+        question: str,
+        evidence_context: str,
+        backend: Optional[str],
+        model: Optional[str],
+        deadline: Optional[Deadline] = None,
+    ) -> Dict:
         request_id = str(uuid.uuid4())
         start_time = time.perf_counter()
 
@@ -17,6 +130,8 @@ class LLMService:
             extra={
                 "request_id": request_id,
                 "component": "llm",
+                "backend": backend,
+                "model": model,
             },
         )
 
@@ -24,20 +139,71 @@ class LLMService:
             result = generate_answer(
                 question=question,
                 evidence_context=evidence_context,
+                model=model,
+                backend=backend,
+                deadline=deadline.expires_at if deadline else None,
             )
 
             latency_ms = (time.perf_counter() - start_time) * 1000
 
+            if result.get("deadline_exceeded"):
+                if deadline is not None:
+                    deadline.degrade("llm_timeout")
+                logger.warning(
+                    "LLM generation abandoned at the request deadline",
+                    extra={
+                        "request_id": request_id,
+                        "component": "llm",
+                        "latency_ms": round(latency_ms, 2),
+                    },
+                )
+                return {**result, "answer": PARTIAL_ANSWER}
+
+            if result.get("degraded"):
+                # Gateway circuit open or retries exhausted (llm/gateway.py)
+                metrics.increment("llm_degraded")
+                logger.warning(
+                    "LLM provider unavailable, answered without LLM",
+                    extra={
+                        "request_id": request_id,
+                        "component": "llm",
+                        "latency_ms": round(latency_ms, 2),
+                    },
+                )
+                return result
+
+            tier = f"{result.get('backend')}:{result.get('model')}"
+            cached = result.get("cached", False)
+            if self.cascade and "backend" in result:
+                # Answer cache entries are per model, so per tier
+                metrics.increment("llm_cascade_cache", f"{tier}:{'hit' if cached else 'miss'}")
+                metrics.observe(f"llm_tier_latency_ms:{tier}", latency_ms)
+
+            usage = result.get("usage")
+            if usage:
+                # Cached answers carry the usage of the original call
+                if not cached:
+                    for kind, tokens in usage.items():
+                        metrics.increment("llm_tokens", f"{result['backend']}:{kind}", tokens)
+
+                    # Latency with and without a provider prompt cache hit
+                    prompt_cache = "hit" if usage.get("cached_input_tokens") else "miss"
+                    metrics.observe(f"llm_latency_ms_prompt_cache_{prompt_cache}", latency_ms)
+
             logger.info(
                 "LLM generation completed",
                 extra={
                     "request_id": request_id,
                     "component": "llm",
                     "latency_ms": round(latency_ms, 2),
+                    "backend": result.get("backend"),
+                    "model": result.get("model"),
+                    "usage": usage,
+                    "cached": cached,
                 },
             )
 
-            return result["answer"]
+            return result
 
         except Exception:
             latency_ms = (time.perf_counter() - start_time) * 1000
@@ -50,4 +216,4 @@ class LLMService:
                     "latency_ms": round(latency_ms, 2),
                 },
             )
-            raise
\ No newline at end of file
+            raise
@@ -0,0 +1,316 @@
+"""
+Routing stage in front of RAGService / LLMService.
+
+Each /query goes through cheap checks first and only pays for the stages
+it needs. Company / fiscal_year filters the caller left empty are first
+filled from the query text ("Barclays 2024 liquidity risk", see
+retrieval/query_understanding.py), so searches are pre-filtered.
+
+Comparison queries (several companies and/or fiscal years, given in the
+request or named in the query) become one target per (company, year);
+RAGService.retrieve_many searches them concurrently and the LLM is
+called once over the merged evidence.
+
+rule              skips                       when
+----------------  --------------------------  ---------------------------------------
+catalog_miss      embedding, search, llm      company / fiscal_year filter matches no
+                                              indexed (company, fiscal_year) pair
+facts_direct      embedding, search, llm      answered from the facts index
+facts_inject      embedding, search           facts index supplied the evidence
+empty_retrieval   llm                         no chunk survived the filters
+weak_retrieval    llm                         retrieval_is_confident() is False
+
+Hits per rule and the calls they saved are counted in api.metrics.
+
+With a request deadline (api/deadline.py), run() checks the time left
+before the LLM stage: it shrinks the evidence or answers from evidence
+only when too little is left, and passes the deadline on to RAGService
+(bounding model server calls) and LLMService.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import logging
+import os
+
+from api.deadline import (
+    DEADLINE_EVIDENCE_CHUNKS,
+    DEADLINE_LLM_MIN_MS,
+    DEADLINE_SHRINK_EVIDENCE_MS,
+    PARTIAL_ANSWER,
+    Deadline,
+)
+from api.metrics import Metrics, metrics as default_metrics
+from retrieval.build_evidence import build_evidence_context, order_for_prompt
+from retrieval.confidence import BORDERLINE_MARGIN, retrieval_is_borderline, retrieval_is_confident
+from retrieval.query_understanding import QueryMatcher
+
+logger = logging.getLogger(__name__)
+
+REFUSAL_ANSWER = "I do not have enough information in the provided documents."
+
+# Skip the LLM when retrieval is weak (see retrieval/confidence.py)
+ROUTER_SKIP_WEAK_RETRIEVAL = os.getenv("ROUTER_SKIP_WEAK_RETRIEVAL", "1") == "1"
+ROUTER_MIN_MAX_SCORE = float(os.getenv("ROUTER_MIN_MAX_SCORE", "0.55"))
+ROUTER_MIN_GAP = float(os.getenv("ROUTER_MIN_GAP", "0.05"))
+# Answers on retrieval this close above ROUTER_MIN_MAX_SCORE go straight to
+# the strongest model of the LLM cascade (api/services/llm_service.py)
+ROUTER_BORDERLINE_MARGIN = float(os.getenv("ROUTER_BORDERLINE_MARGIN", str(BORDERLINE_MARGIN)))
+
+# Fill missing company / fiscal_year filters from the query text
+QUERY_AUTO_FILTERS = os.getenv("QUERY_AUTO_FILTERS", "1") == "1"
+
+# Upper bound on (company, fiscal_year) targets in one comparison query
+MAX_COMPARE_TARGETS = int(os.getenv("MAX_COMPARE_TARGETS", "6"))
+
+SAVED_CALLS = {
+    "catalog_miss": ("embedding", "search", "llm"),
+    "facts_direct": ("embedding", "search", "llm"),
+    "facts_inject": ("embedding", "search"),
+    "empty_retrieval": ("llm",),
+    "weak_retrieval": ("llm",),
+}
+
+
+class QueryRouter:
+    def __init__(self, rag_service, llm_service, metrics: Metrics = default_metrics):
+        self.rag_service = rag_service
+        self.llm_service = llm_service
+        self.metrics = metrics
+        self._matcher = None
+
+    def _hit(self, rule: str) -> None:
+        self.metrics.increment("router_rule_hits", rule)
+        for call in SAVED_CALLS[rule]:
+            self.metrics.increment("router_saved_calls", call)
+
+    def matcher(self) -> QueryMatcher:
+        """
+        Matcher over the serving snapshot's companies and years; rebuilt
+        when a reload changes the catalog.
+        """
+        catalog = self.rag_service.catalog()
+        cached = self._matcher
+        if cached is None or cached[0] is not catalog:
+            cached = self._matcher = (catalog, QueryMatcher.from_catalog(catalog))
+        return cached[1]
+
+    def understand(
+        self,
+        query: str,
+        filters: Dict,
+        companies: Optional[List[str]] = None,
+        fiscal_years: Optional[List[int]] = None,
+    ) -> Tuple[Dict, Optional[List[str]], Optional[List[int]]]:
+        """
+        Fill what the caller left empty from the query text: one company /
+        year becomes a filter, several become comparison targets.
+        """
+        if not QUERY_AUTO_FILTERS:
+            return filters, companies, fiscal_years
+
+        matcher = self.matcher()
+        detected = matcher.detect(query)
+
+        # Explicit comparison lists win over detection
+        if companies:
+            detected["companies"] = []
+        if fiscal_years:
+            detected["fiscal_years"] = []
+
+        filters, applied = matcher.apply(query, filters, detected)
+
+        if not filters.get("company") and len(detected["companies"]) > 1:
+            companies = applied["companies"] = detected["companies"]
+
+        if not filters.get("fiscal_year") and len(detected["fiscal_years"]) > 1:
+            fiscal_years = applied["fiscal_years"] = detected["fiscal_years"]
+
+        for key in applied:
+            self.metrics.increment("query_auto_filters", key)
+
+        if applied:
+            logger.info("query_filters_detected", extra={"applied": applied})
+
+        return filters, companies, fiscal_years
+
+    @staticmethod
+    def build_targets(
+        filters: Dict,
+        companies: Optional[List[str]] = None,
+        fiscal_years: Optional[List[int]] = None,
+    ) -> List[Dict]:
+        """
+        One filter set per (company, fiscal_year) combination. Raises
+        ValueError above MAX_COMPARE_TARGETS.
+        """
+        def values(single, many):
+            merged = ([single] if single else []) + [v for v in (many or []) if v != single]
+            return list(dict.fromkeys(merged)) or [None]
+
+        targets = []
+        for company in values(filters.get("company"), companies):
+            for fiscal_year in values(filters.get("fiscal_year"), fiscal_years):
+                target = {k: v for k, v in filters.items() if k not in ("company", "fiscal_year")}
+                if company:
+                    target["company"] = company
+                if fiscal_year:
+                    target["fiscal_year"] = fiscal_year
+                targets.append(target)
+
+        if len(targets) > MAX_COMPARE_TARGETS:
+            raise ValueError(
+                f"Comparison covers {len(targets)} company/year combinations; "
+                f"the limit is {MAX_COMPARE_TARGETS}"
+            )
+
+        return targets
+
+    def check_catalog(self, filters: Dict) -> Optional[str]:
+        """
+        "catalog_miss" if the company / fiscal_year filters cannot match
+        any indexed chunk, else None.
+        """
+        company = filters.get("company")
+        fiscal_year = filters.get("fiscal_year")
+        if not company and not fiscal_year:
+            return None
+
+        for indexed_company, indexed_year in self.rag_service.catalog():
+            if company and indexed_company != company:
+                continue
+            if fiscal_year and indexed_year != fiscal_year:
+                continue
+            return None
+
+        return "catalog_miss"
+
+    def _is_confident(self, chunks) -> bool:
+        return retrieval_is_confident(
+            chunks,
+            min_max_score=ROUTER_MIN_MAX_SCORE,
+            min_gap=ROUTER_MIN_GAP,
+        )
+
+    def route(
+        self,
+        query: str,
+        filters: Dict,
+        top_k: int,
+        companies: Optional[List[str]] = None,
+        fiscal_years: Optional[List[int]] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Tuple[Optional[str], Dict]:
+        """
+        Run retrieval as far as needed. Returns (rule, result): rule is the
+        routing rule that fired (None for the full pipeline), result has
+        "raw_chunks", "evidence_context" and, if already decided, "answer".
+        """
+        filters, companies, fiscal_years = self.understand(query, filters, companies, fiscal_years)
+        targets = self.build_targets(filters, companies, fiscal_years)
+
+        known = [t for t in targets if self.check_catalog(t) is None]
+        if not known:
+            return "catalog_miss", {"raw_chunks": [], "evidence_context": "", "answer": REFUSAL_ANSWER}
+
+        if len(known) < len(targets):
+            self.metrics.increment("router_dropped_targets", amount=len(targets) - len(known))
+            logger.info(
+                "compare_targets_dropped",
+                extra={"dropped": [t for t in targets if t not in known]},
+            )
+
+        if len(known) > 1:
+            result = self.rag_service.retrieve_many(query=query, targets=known, top_k=top_k, deadline=deadline)
+            result["question"] = comparison_question(query, known)
+        else:
+            result = self.rag_service.retrieve(query=query, filters=known[0], top_k=top_k, deadline=deadline)
+
+        if "facts" in result:
+            return ("facts_direct" if result.get("answer") else "facts_inject"), result
+
+        if not result["raw_chunks"] or not result["evidence_context"]:
+            return "empty_retrieval", {**result, "answer": REFUSAL_ANSWER}
+
+        # With adaptive evidence selection, judge all candidates, not the cut
+        scored = result.get("candidates", result["raw_chunks"])
+        if ROUTER_SKIP_WEAK_RETRIEVAL and not self._is_confident(scored):
+            return "weak_retrieval", {**result, "answer": REFUSAL_ANSWER}
+
+        return None, result
+
+    def run(
+        self,
+        query: str,
+        filters: Dict,
+        top_k: int,
+        companies: Optional[List[str]] = None,
+        fiscal_years: Optional[List[int]] = None,
+        backend: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Dict:
+        rule, result = self.route(query, filters, top_k, companies, fiscal_years, deadline)
+
+        if rule is not None:
+            self._hit(rule)
+
+        answer = result.get("answer")
+        if answer is None and deadline is not None:
+            remaining_ms = deadline.remaining_ms()
+            if remaining_ms < DEADLINE_LLM_MIN_MS:
+                deadline.degrade("evidence_only")
+                answer = PARTIAL_ANSWER
+            elif remaining_ms < DEADLINE_SHRINK_EVIDENCE_MS and len(result["raw_chunks"]) > DEADLINE_EVIDENCE_CHUNKS:
+                deadline.degrade("shrink_evidence")
+                result = shrink_evidence(result, DEADLINE_EVIDENCE_CHUNKS)
+
+        if answer is None:
+            # Only search results are scored; injected facts matched a label
+            borderline = rule is None and retrieval_is_borderline(
+                result.get("candidates", result["raw_chunks"]),
+                min_max_score=ROUTER_MIN_MAX_SCORE,
+                margin=ROUTER_BORDERLINE_MARGIN,
+            )
+            answer = self.llm_service.answer(
+                question=result.get("question", query),
+                evidence_context=result["evidence_context"],
+                backend=backend,
+                borderline=borderline,
+                deadline=deadline,
+            )
+
+        logger.info("query_routed", extra={"rule": rule or "full", "filters": filters})
+
+        return {
+            "answer": answer,
+            "raw_chunks": result["raw_chunks"],
+            "route": rule or "full",
+            "partial": deadline.partial if deadline else False,
+            "degradations": list(deadline.degradations) if deadline else [],
+        }
+
+
+def shrink_evidence(result: Dict, max_chunks: int) -> Dict:
+    """
+    Keep the max_chunks best-scoring chunks of a retrieval result. Injected
+    facts have no score and keep their match order.
+    """
+    ranked = sorted(result["raw_chunks"], key=lambda c: c.get("score", 0.0), reverse=True)
+    chunks = order_for_prompt(ranked[:max_chunks])
+    return {**result, "raw_chunks": chunks, "evidence_context": build_evidence_context(chunks)}
+
+
+def comparison_question(query: str, targets: List[Dict]) -> str:
+    """
+    The system prompt only allows summarising excerpts of one company,
+    document and year; spell out that a comparison is asked for, per target.
+    """
+    names = ", ".join(
+        " ".join(str(t[k]) for k in ("company", "fiscal_year") if t.get(k))
+        for t in targets
+    )
+    return (
+        f"{query}\n\n"
+        f"This is a comparison across: {names}. Answer for each of them "
+        f"separately, using only the excerpts of that company and fiscal year, "
+        f"then compare."
+    )
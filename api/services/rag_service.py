@@ -1,58 +1,469 @@
-from typing import Dict, List
-from retrieval.embed_query import QueryEmbedder
-from retrieval.similarity_search import load_faiss, search
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import chain, zip_longest
+from typing import Dict, List, Optional, Set, Tuple
+from api.deadline import Deadline
+from api.metrics import metrics
+from api.model_server import MODEL_SERVER_SOCKET, ModelServerClient, RemoteStore
+from api import runtime
+from api.runtime import thread_budget
+from llm.backends import approx_tokens
+from retrieval.embed_query import get_query_embedder
+from retrieval.embed_batcher import EMBED_BATCHING, EmbeddingBatcher
 from retrieval.filters import apply_filters
-from retrieval.build_evidence import build_evidence_context
+from retrieval.build_evidence import build_evidence_context, order_for_prompt
+from retrieval.confidence import MIN_GAP, MIN_RELATIVE_SCORE, adaptive_cutoff
+from retrieval.facts_index import (
+    FACTS_DIR,
+    FACTS_FILENAME,
+    FactsIndex,
+    direct_answer_fact,
+    fact_to_chunk,
+    format_fact_answer,
+)
+from vectorstore import snapshots
+from vectorstore.faiss_store import INDEX_PATH, FAISSVectorStore
+from vectorstore.sharded_store import SHARDS_DIR, ShardedVectorStore, is_sharded
 
 import logging
+import os
+import threading
 import time
 import uuid
 
 logger = logging.getLogger(__name__)
 
+LEGACY_VERSION = "legacy"
+
+# Seconds between checks of the CURRENT snapshot pointer (0 disables)
+INDEX_WATCH_INTERVAL_S = float(os.getenv("INDEX_WATCH_INTERVAL_S", "0"))
+
+# Figure lookups from the facts index (retrieval/facts_index.py):
+#   off    - disabled
+#   inject - matching facts replace embedding search as the evidence
+#   direct - as inject, and the answer is taken from the top fact (no LLM)
+#            unless equally good matches disagree
+FACTS_MODE = os.getenv("FACTS_MODE", "off")
+
+# How many of the top_k chunks become evidence:
+#   fixed    - all of them
+#   adaptive - cut at the elbow of the score curve (retrieval/confidence.py)
+EVIDENCE_SELECTION = os.getenv("EVIDENCE_SELECTION", "fixed")
+EVIDENCE_MIN_RELATIVE_SCORE = float(os.getenv("EVIDENCE_MIN_RELATIVE_SCORE", str(MIN_RELATIVE_SCORE)))
+EVIDENCE_ELBOW_GAP = float(os.getenv("EVIDENCE_ELBOW_GAP", str(MIN_GAP)))
+
+EVIDENCE_CHUNKS_BUCKETS = (1, 2, 3, 4, 5, 6, 8, 10, 15, 20)
+
+# Concurrent per-target searches for comparison queries
+RETRIEVE_WORKERS = int(os.getenv("RETRIEVE_WORKERS", "4"))
+
+# How often workers using a model server check for a new index version
+MODEL_SERVER_POLL_S = float(os.getenv("MODEL_SERVER_POLL_S", "5"))
+
+
+@dataclass(frozen=True)
+class IndexState:
+    """
+    Everything a request needs from one snapshot. Never mutated: a reload
+    builds a new IndexState and swaps the reference.
+    """
+    version: str
+    store: object  # FAISSVectorStore or ShardedVectorStore
+    manifest: Dict = field(default_factory=dict)
+
+
+def load_index_state(version: Optional[str] = None) -> IndexState:
+    """
+    Load a snapshot (CURRENT when version is omitted), falling back to the
+    unversioned data/embeddings layout when no snapshot was published.
+    """
+    if version == LEGACY_VERSION:
+        snapshot_dir = None
+    else:
+        snapshot_dir = snapshots.resolve_snapshot(version)
+
+    if snapshot_dir is None:
+        if not INDEX_PATH.exists() and is_sharded(SHARDS_DIR):
+            store = ShardedVectorStore(SHARDS_DIR)
+        else:
+            store = FAISSVectorStore()
+        return IndexState(version=LEGACY_VERSION, store=store)
+
+    shards_dir = snapshot_dir / snapshots.SHARDS_DIRNAME
+    if is_sharded(shards_dir):
+        store = ShardedVectorStore(shards_dir)
+    else:
+        store = FAISSVectorStore(
+            snapshot_dir / snapshots.INDEX_FILENAME,
+            snapshot_dir / snapshots.METADATA_FILENAME,
+        )
+
+    return IndexState(
+        version=snapshot_dir.name,
+        store=store,
+        manifest=snapshots.read_manifest(snapshot_dir),
+    )
+
+
+def remote_index_state(client: ModelServerClient) -> IndexState:
+    """
+    IndexState served by the model server (see api/model_server.py).
+    """
+    info = client.info()
+    return IndexState(
+        version=info["version"],
+        store=RemoteStore(client, info["catalog"]),
+        manifest=info["manifest"],
+    )
+
 
 class RAGService:
-    def __init__(self):
-        self.embedder = QueryEmbedder("all-MiniLM-L6-v2")
-        self.index, self.metadata = load_faiss()
-        logger.info("rag_service_initialized", extra={"index_loaded": True})
+    def __init__(self, model_server_socket: Optional[str] = MODEL_SERVER_SOCKET):
+        # With a model server, embedding and search run in that process
+        self._client = ModelServerClient(model_server_socket) if model_server_socket else None
+
+        if self._client is not None:
+            self.embedder = self._client
+        else:
+            self.embedder = get_query_embedder("all-MiniLM-L6-v2", threads=thread_budget.embed_threads)
+            if EMBED_BATCHING:
+                # Concurrent requests share one forward pass
+                self.embedder = EmbeddingBatcher(self.embedder, metrics=metrics, defer_start=runtime.SERVE_PRELOAD)
+
+        self._state = self._load_state()
+        self._history: List[str] = []
+        self._reload_lock = threading.Lock()
+        self.reload_status: Dict = {"state": "idle"}
+        self.facts = self._load_facts()
+        self._catalog = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=RETRIEVE_WORKERS,
+            thread_name_prefix="retrieve",
+        )
+
+        logger.info(
+            "rag_service_initialized",
+            extra={
+                "index_loaded": True,
+                "index_version": self._state.version,
+                "model_server": model_server_socket,
+            },
+        )
+
+        if self._client is not None:
+            self._start_watcher(MODEL_SERVER_POLL_S)
+        elif INDEX_WATCH_INTERVAL_S > 0:
+            self._start_watcher(INDEX_WATCH_INTERVAL_S)
+
+    def _load_state(self, version: Optional[str] = None) -> IndexState:
+        if self._client is None:
+            return load_index_state(version)
+
+        state = remote_index_state(self._client)
+        if version is None or version == state.version:
+            # e.g. the watcher picking up a reload done by the server
+            return state
+
+        self._client.reload(version)
+        return remote_index_state(self._client)
+
+    def _current_version(self) -> Optional[str]:
+        if self._client is None:
+            return snapshots.current_version()
+        return self._client.info()["version"]
+
+    @property
+    def index_state(self) -> IndexState:
+        return self._state
+
+    @property
+    def index_version(self) -> str:
+        return self._state.version
+
+    @property
+    def index_manifest(self) -> Dict:
+        return self._state.manifest
+
+    @property
+    def index_history(self) -> List[str]:
+        return list(self._history)
+
+    def catalog(self) -> Set[Tuple[str, int]]:
+        """
+        (company, fiscal_year) pairs of the serving snapshot, computed once
+        per snapshot.
+        """
+        state = self._state
+        cached = self._catalog
+        if cached is None or cached[0] is not state:
+            cached = self._catalog = (state, frozenset(state.store.catalog()))
+        return cached[1]
+
+    # -----------------------------
+    # Hot reload
+    # -----------------------------
+
+    def reload(self, version: Optional[str] = None, rollback: bool = False) -> str:
+        """
+        Load a snapshot and atomically swap it in.
+
+        Requests already running keep the IndexState they started with and
+        finish on the old snapshot; new requests see the new one.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            raise RuntimeError("An index reload is already in progress")
+
+        try:
+            self.reload_status = {"state": "loading", "target": version}
+            start_time = time.time()
+
+            new_state = self._load_state(version)
+            old_version = self._state.version
+
+            self._state = new_state
+
+            if rollback:
+                self._history.pop()
+            elif new_state.version != old_version:
+                self._history.append(old_version)
+
+            latency_ms = int((time.time() - start_time) * 1000)
+            self.reload_status = {"state": "idle", "loaded": new_state.version}
+
+            logger.info(
+                "index_reloaded",
+                extra={
+                    "previous_version": old_version,
+                    "index_version": new_state.version,
+                    "rollback": rollback,
+                    "latency_ms": latency_ms,
+                },
+            )
+            return new_state.version
+
+        except Exception as e:
+            self.reload_status = {
+                "state": "failed",
+                "target": version,
+                "error": str(e),
+            }
+            logger.exception("index_reload_failed", extra={"target": version})
+            raise
+
+        finally:
+            self._reload_lock.release()
+
+    def reload_in_background(self, version: Optional[str] = None) -> None:
+        self._run_in_background(lambda: self.reload(version), "index-reload")
+
+    def rollback_in_background(self) -> str:
+        """
+        Reload the version that was serving before the current one.
+        """
+        if not self._history:
+            raise RuntimeError("No previous index version to roll back to")
+
+        target = self._history[-1]
+        self._run_in_background(
+            lambda: self.reload(target, rollback=True), "index-rollback"
+        )
+        return target
+
+    def _run_in_background(self, fn, name: str) -> None:
+        if self._reload_lock.locked():
+            raise RuntimeError("An index reload is already in progress")
+
+        def _run():
+            try:
+                fn()
+            except Exception:
+                pass  # already logged and recorded in reload_status
+
+        threading.Thread(target=_run, name=name, daemon=True).start()
+
+    def _start_watcher(self, interval_s: float) -> None:
+        self._watched_version = self._current_version()
+        runtime.start_threads(lambda: self._run_watcher(interval_s))
+
+    def _check_current(self) -> None:
+        """
+        Follow CURRENT when it moves. Only a change of CURRENT itself
+        triggers a reload: a version loaded through the admin API (reload
+        with a version, rollback) stays until CURRENT changes again.
+        """
+        target = self._current_version()
+        if not target or target == self._watched_version or self._reload_lock.locked():
+            return
+
+        if target != self._state.version:
+            self.reload(target)
+        self._watched_version = target
+
+    def _run_watcher(self, interval_s: float) -> None:
+        def _watch():
+            while True:
+                time.sleep(interval_s)
+                try:
+                    self._check_current()
+                except Exception:
+                    logger.exception("index_watch_failed")
+
+        threading.Thread(target=_watch, name="index-watcher", daemon=True).start()
+
+    # -----------------------------
+    # Facts
+    # -----------------------------
+
+    def _load_facts(self) -> Optional[FactsIndex]:
+        if FACTS_MODE == "off":
+            return None
+
+        if not (FACTS_DIR / FACTS_FILENAME).exists():
+            logger.warning("facts_index_missing", extra={"path": str(FACTS_DIR)})
+            return None
+
+        return FactsIndex(FACTS_DIR)
+
+    def lookup_facts(self, query: str, filters: Dict, top_k: int) -> Optional[Dict]:
+        """
+        Answer a figure question from the facts index, without embedding
+        search. Only used when a company is given, so facts of different
+        companies are never mixed. Returns None when no label matches.
+        """
+        if self.facts is None or not filters.get("company"):
+            return None
+
+        facts = self.facts.match_query(
+            query,
+            company=filters["company"],
+            fiscal_year=filters.get("fiscal_year"),
+            limit=top_k,
+        )
+        if not facts:
+            return None
+
+        chunks = [fact_to_chunk(f) for f in facts]
+        result = {
+            "raw_chunks": chunks,
+            "evidence_context": build_evidence_context(chunks),
+            "facts": facts,
+        }
+
+        if FACTS_MODE == "direct":
+            fact = direct_answer_fact(facts)
+            if fact is not None:
+                result["answer"] = format_fact_answer(fact)
+
+        return result
+
+    # -----------------------------
+    # Retrieval
+    # -----------------------------
+
+    def _remote_options(self, deadline: Optional[Deadline]) -> Dict:
+        # Only model server calls can be cut short by the request deadline
+        if deadline is None or self._client is None:
+            return {}
+        return {"deadline": deadline.expires_at}
+
+    def _embed(self, query: str, deadline: Optional[Deadline] = None):
+        return self.embedder.embed(query, **self._remote_options(deadline))
+
+    def _search(
+        self,
+        state: IndexState,
+        query_embedding,
+        filters: Dict,
+        top_k: int,
+        deadline: Optional[Deadline] = None,
+    ) -> List[Dict]:
+        # Stores pre-filter by company / fiscal_year; other keys post-filter
+        results = state.store.search(
+            query_embedding,
+            top_k=top_k * 2,
+            filters=filters,
+            **self._remote_options(deadline),
+        )
+
+        if filters and any(v not in (None, "", []) for v in filters.values()):
+            results = apply_filters(results, filters)
+
+        return results[:top_k]
+
+    @staticmethod
+    def _select(candidates: List[Dict]) -> List[Dict]:
+        if EVIDENCE_SELECTION != "adaptive":
+            return candidates
+        return candidates[:adaptive_cutoff(
+            candidates,
+            min_relative_score=EVIDENCE_MIN_RELATIVE_SCORE,
+            elbow_gap=EVIDENCE_ELBOW_GAP,
+        )]
+
+    @staticmethod
+    def _record_selection(request_id: str, candidates: List[Dict], selected: List[Dict]) -> None:
+        saved = (
+            approx_tokens(build_evidence_context(candidates))
+            - approx_tokens(build_evidence_context(selected))
+        )
+        metrics.increment("evidence_tokens_saved", amount=saved)
+        metrics.observe("evidence_chunks_selected", len(selected), buckets=EVIDENCE_CHUNKS_BUCKETS)
+        logger.info(
+            "evidence_selected",
+            extra={
+                "request_id": request_id,
+                "candidates": len(candidates),
+                "selected": len(selected),
+                "prompt_tokens_saved": saved,
+            },
+        )
 
     def retrieve(
         self,
         query: str,
         filters: Dict,
         top_k: int = 5,
+        deadline: Optional[Deadline] = None,
     ) -> Dict:
         request_id = str(uuid.uuid4())
         start_time = time.time()
 
+        # Pin the snapshot for the whole request
+        state = self._state
+
         logger.info(
             "retrieve_started",
             extra={
                 "request_id": request_id,
                 "top_k": top_k,
                 "filters": filters,
+                "index_version": state.version,
             },
         )
 
         try:
-            query_embedding = self.embedder.embed(query)
+            facts_result = self.lookup_facts(query, filters, top_k)
+            if facts_result is not None:
+                logger.info(
+                    "retrieve_completed",
+                    extra={
+                        "request_id": request_id,
+                        "latency_ms": int((time.time() - start_time) * 1000),
+                        "returned_chunks": len(facts_result["raw_chunks"]),
+                        "source": "facts",
+                    },
+                )
+                return facts_result
 
-            results = search(
-                self.index,
-                self.metadata,
-                query_embedding,
-                top_k=top_k * 2,
-            )
+            query_embedding = self._embed(query, deadline)
+            filtered = self._search(state, query_embedding, filters, top_k, deadline)
 
-            if filters and any(v not in (None, "", []) for v in filters.values()):
-                filtered = apply_filters(results, filters)
-            else:
-                filtered = results
+            candidates = filtered[:top_k]
+            selected = self._select(candidates)
 
-            evidence_context = build_evidence_context(
-                filtered[:top_k]
-            )
+            # Stable order: identical evidence gives an identical prompt prefix
+            chunks = order_for_prompt(selected)
+            evidence_context = build_evidence_context(chunks)
 
             latency_ms = int((time.time() - start_time) * 1000)
 
@@ -61,18 +472,112 @@ class RAGService:
                 extra={
                     "request_id": request_id,
                     "latency_ms": latency_ms,
-                    "returned_chunks": len(filtered[:top_k]),
+                    "returned_chunks": len(chunks),
                 },
             )
 
-            return {
-                "raw_chunks": filtered[:top_k],
+            result = {
+                "raw_chunks": chunks,
                 "evidence_context": evidence_context,
             }
+            if EVIDENCE_SELECTION == "adaptive":
+                self._record_selection(request_id, candidates, selected)
+                # The confidence check judges the whole score curve
+                result["candidates"] = candidates
+
+            return result
+
+        except Exception:
+            logger.exception(
+                "retrieve_failed",
+                extra={"request_id": request_id},
+            )
+            raise
+
+    def retrieve_many(
+        self,
+        query: str,
+        targets: List[Dict],
+        top_k: int = 5,
+        deadline: Optional[Deadline] = None,
+    ) -> Dict:
+        """
+        Comparison retrieval: one search per target filter set (e.g. one
+        per company), run concurrently against the same query embedding.
+
+        The top_k evidence budget is shared fairly: chunks are taken
+        round-robin by rank across targets, so a large report cannot crowd
+        out a small one, and budget a target cannot use goes to the others.
+        """
+        request_id = str(uuid.uuid4())
+        start_time = time.time()
+        state = self._state
+
+        logger.info(
+            "retrieve_started",
+            extra={
+                "request_id": request_id,
+                "top_k": top_k,
+                "targets": targets,
+                "index_version": state.version,
+            },
+        )
+
+        try:
+            query_embedding = self._embed(query, deadline)
+
+            def search_target(target: Dict):
+                target_start = time.time()
+                chunks = self._search(state, query_embedding, target, top_k, deadline)
+                return chunks, int((time.time() - target_start) * 1000)
+
+            per_target = list(self._executor.map(search_target, targets))
+
+            for target, (chunks, latency_ms) in zip(targets, per_target):
+                logger.info(
+                    "retrieve_target_completed",
+                    extra={
+                        "request_id": request_id,
+                        "target": target,
+                        "latency_ms": latency_ms,
+                        "returned_chunks": len(chunks),
+                    },
+                )
+
+            def round_robin(per_target_chunks):
+                ranked = zip_longest(*per_target_chunks)
+                return [c for c in chain.from_iterable(ranked) if c is not None][:top_k]
+
+            candidates = round_robin([chunks for chunks, _ in per_target])
+            # Each target is cut at the elbow of its own score curve
+            selected = round_robin([self._select(chunks) for chunks, _ in per_target])
+            merged = order_for_prompt(selected)
+
+            evidence_context = build_evidence_context(merged)
+
+            logger.info(
+                "retrieve_completed",
+                extra={
+                    "request_id": request_id,
+                    "latency_ms": int((time.time() - start_time) * 1000),
+                    "returned_chunks": len(merged),
+                    "targets": len(targets),
+                },
+            )
+
+            result = {
+                "raw_chunks": merged,
+                "evidence_context": evidence_context,
+            }
+            if EVIDENCE_SELECTION == "adaptive":
+                self._record_selection(request_id, candidates, selected)
+                result["candidates"] = candidates
+
+            return result
 
         except Exception:
             logger.exception(
                 "retrieve_failed",
                 extra={"request_id": request_id},
             )
-            raise
\ No newline at end of file
+            raise
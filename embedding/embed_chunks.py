@@ -1,5 +1,6 @@
 from pathlib import Path
 import json
+import os
 from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 import numpy as np
@@ -10,7 +11,17 @@ OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
+# float16 halves embeddings.npy; build_faiss_index upcasts before indexing
+EMBEDDING_DTYPE = os.getenv("EMBEDDING_DTYPE", "float32")
+
+# "store" reads the binary chunk store (processing/chunk_store.py) instead of JSONL
+CHUNK_FORMAT = os.getenv("CHUNK_FORMAT", "jsonl")
+
 def load_chunks():
+    if CHUNK_FORMAT == "store":
+        from processing.chunk_store import ChunkStore
+        return list(ChunkStore().iter_chunks())
+
     chunks = []
     for company_dir in CHUNKS_DIR.iterdir():
         for year_dir in company_dir.iterdir():
@@ -41,7 +52,7 @@ def main():
         normalize_embeddings=True
     )
 
-    np.save(OUTPUT_DIR / "embeddings.npy", embeddings)
+    np.save(OUTPUT_DIR / "embeddings.npy", embeddings.astype(EMBEDDING_DTYPE))
 
     with open(OUTPUT_DIR / "metadata.json", "w") as f:
         json.dump(chunks, f, indent=2)
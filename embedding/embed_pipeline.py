@@ -0,0 +1,308 @@
+"""
+Streaming, multi-process chunk embedding for large corpora.
+
+Unlike embed_chunks.main, nothing here holds the corpus in memory:
+
+1. Scan: chunks.jsonl files are read line by line. Each chunk's metadata is
+   streamed straight into metadata.json and only (file, byte offset, text
+   length) is kept per row.
+2. Batch: rows are sorted by text length so each batch pads to a similar
+   sequence length, then grouped into fixed-size batches.
+3. Encode: a pool of CPU worker processes (one model copy each) reads the
+   texts of a batch from disk by offset and encodes them.
+4. Write: vectors are written into a memory-mapped embeddings.npy at their
+   original row positions, so row i still matches metadata[i].
+
+Progress is checkpointed every CHECKPOINT_EVERY batches; rerunning after a
+crash resumes from the last checkpoint instead of starting over.
+
+Usage:
+    python -m embedding.embed_pipeline
+"""
+
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+
+from embedding.embed_chunks import CHUNKS_DIR, EMBEDDING_DTYPE, MODEL_NAME, OUTPUT_DIR
+
+# -----------------------------
+# Configuration
+# -----------------------------
+
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", str(max((os.cpu_count() or 2) // 2, 1))))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+CHECKPOINT_EVERY = int(os.getenv("EMBED_CHECKPOINT_EVERY", "20"))
+
+EMBEDDINGS_FILENAME = "embeddings.npy"
+METADATA_FILENAME = "metadata.json"
+PARTIAL_SUFFIX = ".partial"
+CHECKPOINT_FILENAME = "embeddings.checkpoint.json"
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# -----------------------------
+# Worker process
+# -----------------------------
+
+_encoder = None
+
+
+def load_sentence_transformer(model_name: str, threads: int):
+    """
+    Default encoder factory: (List[str]) -> np.ndarray of normalised vectors.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    # One process per core already; stop torch fanning out inside each one
+    torch.set_num_threads(threads)
+    model = SentenceTransformer(model_name, local_files_only=True)
+
+    def encode(texts: List[str]) -> np.ndarray:
+        return model.encode(
+            texts,
+            batch_size=len(texts),
+            normalize_embeddings=True,
+        )
+
+    return encode
+
+
+def _init_worker(encoder_factory, model_name: str, threads: int):
+    global _encoder
+    _encoder = encoder_factory(model_name, threads)
+
+
+def _encode_batch(task: Tuple[int, List[str], np.ndarray, np.ndarray, np.ndarray]):
+    batch_id, files, rows, file_ids, offsets = task
+
+    texts = []
+    handles = {}
+    try:
+        for file_id, offset in zip(file_ids, offsets):
+            handle = handles.get(file_id)
+            if handle is None:
+                handle = handles[file_id] = open(files[file_id], "rb")
+            handle.seek(int(offset))
+            texts.append(json.loads(handle.readline())["text"])
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+    vectors = np.asarray(_encoder(texts), dtype=np.float32)
+    return batch_id, rows, vectors
+
+# -----------------------------
+# Scan
+# -----------------------------
+
+def chunk_files(chunks_dir: Path = CHUNKS_DIR) -> List[Path]:
+    return sorted(chunks_dir.glob("*/*/chunks.jsonl"))
+
+
+def corpus_fingerprint(files: List[Path]) -> str:
+    digest = hashlib.sha256()
+    for path in files:
+        stat = path.stat()
+        digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def scan_chunks(files: List[Path], metadata_path: Path):
+    """
+    Stream every chunk once: write its metadata to `metadata_path` and
+    return per-row (file id, byte offset, text length) arrays.
+    """
+    file_ids, offsets, lengths = [], [], []
+
+    with open(metadata_path, "w") as out:
+        out.write("[")
+        first = True
+
+        for file_id, path in enumerate(files):
+            with open(path, "rb") as f:
+                offset = f.tell()
+                for line in iter(f.readline, b""):
+                    if line.strip():
+                        chunk = json.loads(line)
+
+                        out.write(("" if first else ",") + "\n" + json.dumps(chunk))
+                        first = False
+
+                        file_ids.append(file_id)
+                        offsets.append(offset)
+                        lengths.append(len(chunk["text"]))
+
+                    offset = f.tell()
+
+        out.write("\n]\n")
+
+    return (
+        np.array(file_ids, dtype=np.int32),
+        np.array(offsets, dtype=np.int64),
+        np.array(lengths, dtype=np.int32),
+    )
+
+
+def plan_batches(lengths: np.ndarray, batch_size: int) -> List[np.ndarray]:
+    """
+    Row ids grouped into batches of similar text length (longest first).
+    """
+    order = np.argsort(-lengths, kind="stable")
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+# -----------------------------
+# Checkpointing
+# -----------------------------
+
+def load_checkpoint(path: Path, fingerprint: str, batch_size: int) -> Optional[Dict]:
+    if not path.exists():
+        return None
+
+    checkpoint = json.loads(path.read_text())
+    if checkpoint["fingerprint"] != fingerprint or checkpoint["batch_size"] != batch_size:
+        logger.info("Checkpoint does not match current corpus, starting over")
+        return None
+
+    return checkpoint
+
+
+def save_checkpoint(path: Path, checkpoint: Dict) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(checkpoint))
+    os.replace(tmp_path, path)
+
+# -----------------------------
+# Pipeline
+# -----------------------------
+
+def run_pipeline(
+    chunks_dir: Path = CHUNKS_DIR,
+    output_dir: Path = OUTPUT_DIR,
+    model_name: str = MODEL_NAME,
+    workers: int = EMBED_WORKERS,
+    batch_size: int = EMBED_BATCH_SIZE,
+    checkpoint_every: int = CHECKPOINT_EVERY,
+    dtype: str = EMBEDDING_DTYPE,
+    encoder_factory=load_sentence_transformer,
+    max_batches: Optional[int] = None,
+) -> Optional[Path]:
+    """
+    Embed every chunk under `chunks_dir` into output_dir/embeddings.npy.
+
+    max_batches stops after that many new batches (state is checkpointed),
+    which bounds a single run; rerun to continue.
+    Returns the embeddings path once complete, otherwise None.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    embeddings_path = output_dir / EMBEDDINGS_FILENAME
+    partial_path = output_dir / (EMBEDDINGS_FILENAME + PARTIAL_SUFFIX)
+    checkpoint_path = output_dir / CHECKPOINT_FILENAME
+
+    files = chunk_files(chunks_dir)
+    fingerprint = corpus_fingerprint(files)
+
+    file_ids, offsets, lengths = scan_chunks(files, output_dir / METADATA_FILENAME)
+    if len(lengths) == 0:
+        raise ValueError(f"No chunks found under {chunks_dir}")
+
+    batches = plan_batches(lengths, batch_size)
+
+    checkpoint = load_checkpoint(checkpoint_path, fingerprint, batch_size)
+    if checkpoint is None or not partial_path.exists():
+        checkpoint = {
+            "fingerprint": fingerprint,
+            "batch_size": batch_size,
+            "rows": len(lengths),
+            "dim": None,
+            "completed": [],
+        }
+
+    completed = set(checkpoint["completed"])
+    pending = [b for b in range(len(batches)) if b not in completed]
+    if max_batches is not None:
+        pending = pending[:max_batches]
+
+    logger.info(
+        f"Embedding {len(lengths)} chunks from {len(files)} files: "
+        f"{len(batches)} batches, {len(completed)} already done, "
+        f"{workers} workers"
+    )
+
+    output = None
+    if checkpoint["dim"] is not None:
+        output = np.load(partial_path, mmap_mode="r+")
+
+    files_str = [str(f) for f in files]
+    tasks = (
+        (b, files_str, batches[b], file_ids[batches[b]], offsets[batches[b]])
+        for b in pending
+    )
+
+    threads = max((os.cpu_count() or 1) // max(workers, 1), 1)
+    context = get_context("spawn")
+
+    with context.Pool(
+        processes=workers,
+        initializer=_init_worker,
+        initargs=(encoder_factory, model_name, threads),
+    ) as pool:
+        since_checkpoint = 0
+
+        for batch_id, rows, vectors in pool.imap_unordered(_encode_batch, tasks):
+            if output is None:
+                checkpoint["dim"] = int(vectors.shape[1])
+                output = np.lib.format.open_memmap(
+                    partial_path,
+                    mode="w+",
+                    dtype=dtype,
+                    shape=(len(lengths), checkpoint["dim"]),
+                )
+
+            output[rows] = vectors
+            completed.add(int(batch_id))
+            since_checkpoint += 1
+
+            if since_checkpoint >= checkpoint_every:
+                output.flush()
+                checkpoint["completed"] = sorted(completed)
+                save_checkpoint(checkpoint_path, checkpoint)
+                since_checkpoint = 0
+                logger.info(f"Checkpoint: {len(completed)}/{len(batches)} batches")
+
+    if output is not None:
+        output.flush()
+        del output
+
+    checkpoint["completed"] = sorted(completed)
+
+    if len(completed) < len(batches):
+        save_checkpoint(checkpoint_path, checkpoint)
+        logger.info(f"Stopped at {len(completed)}/{len(batches)} batches; rerun to resume")
+        return None
+
+    os.replace(partial_path, embeddings_path)
+    checkpoint_path.unlink(missing_ok=True)
+
+    logger.info(f"Embeddings and metadata saved to {output_dir}")
+    return embeddings_path
+
+
+# -----------------------------
+# Entry Point
+# -----------------------------
+
+if __name__ == "__main__":
+    run_pipeline()
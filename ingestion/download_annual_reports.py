@@ -16,6 +16,7 @@ from typing import Dict, List
 import yaml
 import requests
 from ingestion.metadata import build_document_metadata
+from ingestion.tables import TABLES_DIR, extract_page_rows, tables_path_for, write_rows
 
 # -----------------------------
 # Configuration
@@ -173,7 +174,8 @@ def download_annual_report(source: Dict) -> Path:
 
 def extract_text_from_pdf(pdf_path: Path, output_dir: Path, source: Dict) -> Path:
     """
-    Extract raw text from a PDF using pdfplumber.
+    Extract raw text from a PDF using pdfplumber. Table rows are written
+    alongside, to TABLES_DIR (see ingestion.tables).
 
     Args:
         pdf_path: Path to PDF
@@ -209,12 +211,21 @@ def extract_text_from_pdf(pdf_path: Path, output_dir: Path, source: Dict) -> Pat
         extracted_text_path=str(output_path),
     )
 
-    if output_path.exists():
+    tables_path = tables_path_for(output_path, output_dir, TABLES_DIR)
+
+    extract_text = not output_path.exists()
+    extract_tables = not tables_path.exists()
+
+    if not extract_text:
         logger.info(f"Text already extracted, skipping: {output_path}")
-    else:
-        logger.info(f"Extracting text from PDF: {pdf_path}")
+    if not extract_tables:
+        logger.info(f"Tables already extracted, skipping: {tables_path}")
+
+    if extract_text or extract_tables:
+        logger.info(f"Extracting from PDF: {pdf_path}")
 
         extracted_pages = []
+        table_rows = []
         try:
             with pdfplumber.open(pdf_path) as pdf:
                 for page_num, page in enumerate(pdf.pages, start=1):
@@ -222,11 +233,18 @@ def extract_text_from_pdf(pdf_path: Path, output_dir: Path, source: Dict) -> Pat
                     extracted_pages.append(
                         f"\n--- PAGE {page_num} ---\n{text}"
                     )
+                    if extract_tables:
+                        table_rows.extend(extract_page_rows(page_num, page, text))
         except Exception as e:
             raise RuntimeError(f"Failed to extract text from {pdf_path}: {e}")
 
-        with output_path.open("w", encoding="utf-8") as f:
-            f.write("\n".join(extracted_pages))
+        if extract_text:
+            with output_path.open("w", encoding="utf-8") as f:
+                f.write("\n".join(extracted_pages))
+
+        if extract_tables:
+            count = write_rows(table_rows, tables_path)
+            logger.info(f"Extracted {count} table rows: {tables_path}")
 
     metadata_path = (
         METADATA_DIR
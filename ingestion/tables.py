@@ -0,0 +1,315 @@
+"""
+Structured table rows from annual report pages.
+
+pdfplumber's extract_text flattens tables into lines such as
+
+    Adjusted EBITDA 65,803 20,978 31,264 7,476 6,783 (22) (675)
+
+which chunk-level retrieval treats as noise. Two sources of rows are
+extracted per page:
+
+- "ruled":  tables pdfplumber detects from drawn lines (extract_tables)
+- "text":   text lines that end in a run of numeric cells (most report
+            tables are aligned text, not ruled)
+
+Each row is written as one JSON line:
+
+{
+    "page": 12,
+    "source": "text",
+    "label": "Adjusted EBITDA",
+    "cells": ["65,803", "20,978", ...],
+    "columns": ["2024", "2023"] | null,   # header cells, when known
+    "period": "2024" | null,              # year heading above the table
+    "unit": "$ million" | null            # unit heading above the table
+}
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+import json
+import re
+
+TABLES_DIR = Path("data/processed/tables/annual_reports")
+TABLES_SUFFIX = ".tables.jsonl"
+
+PAGE_MARKER_PATTERN = re.compile(r"-{3}\s*PAGE\s*(\d+)\s*-{3}", re.IGNORECASE)
+
+# A numeric cell: 1,234 | (1,234) | -5.2 | 13.6% | £7,854m | $4.20 | 10bps | 25p | —
+NUMBER_PATTERN = re.compile(
+    r"^\(?[-–]?[£$€]?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?(?:%|bps|bn|m|p|x)?\)?%?$|^[—–-]$"
+)
+YEAR_PATTERN = re.compile(r"^(?:19|20)\d{2}$")
+UNIT_PATTERN = re.compile(
+    r"^(?:[£$€]|US\$|GBP|USD|EUR)\s?(?:m|bn|million|billion|thousand|000)$", re.IGNORECASE
+)
+# Footnote references trailing a label, e.g. "Return on tangible equity (1)"
+FOOTNOTE_PATTERN = re.compile(r"(?:\s*\(\d{1,2}\))+$")
+FOOTNOTE_CELL_PATTERN = re.compile(r"^\(\d\)$")
+NOTE_CELL_PATTERN = re.compile(r"^\d{1,2}$")
+FORMATTED_CELL_PATTERN = re.compile(r"[,.]\d")
+# Cells that are clearly table values, not years or counts in prose
+AMOUNT_PATTERN = re.compile(r"[,.%£$€]|bps")
+ACRONYM_PATTERN = re.compile(r"^\(([A-Za-z][A-Za-z0-9&]{1,9})\)$")
+
+MAX_LABEL_WORDS = 14
+MIN_LABEL_LETTERS = 3
+
+
+def is_number(token: str) -> bool:
+    return bool(NUMBER_PATTERN.match(token))
+
+
+def is_year(token: str) -> bool:
+    return bool(YEAR_PATTERN.match(token))
+
+
+def trim_merged_label(label: str) -> str:
+    """
+    Drop words of a neighbouring column that precede a defined term:
+    "Total earnings per share attributable to ordinary Common Equity Tier 1
+    (CET1) ratio" → "Common Equity Tier 1 (CET1) ratio". A capitalised
+    expansion right after a lowercase word starts a new label.
+    """
+    words = label.split()
+
+    for i, word in enumerate(words):
+        match = ACRONYM_PATTERN.match(word)
+        if match is None:
+            continue
+        acronym = match.group(1).lower().replace("&", "")
+
+        # Walk back over words whose initials spell the acronym
+        position, start = len(acronym), i
+        while position > 0 and start > 0 and words[start - 1][:1].lower() == acronym[position - 1]:
+            position -= 1
+            start -= 1
+
+        if (
+            position == 0
+            and start > 0
+            and words[start][:1].isupper()
+            and words[start - 1][:1].islower()
+        ):
+            return " ".join(words[start:])
+
+    return label
+
+
+def clean_label(label: str) -> str:
+    label = FOOTNOTE_PATTERN.sub("", label.strip())
+    return trim_merged_label(re.sub(r"\s+", " ", label).strip(" :"))
+
+
+def split_columns(line: str) -> List[str]:
+    """
+    Split a line that runs two table columns together after each interior
+    run of at least two amounts followed by a capitalised word: "Return on tangible equity (1) 17.5% 17.8%
+    Pro forma CET1 ratio (6) 14.3% 14.2%" → two lines.
+    """
+    tokens = line.split()
+    segments = []
+    start = i = 0
+
+    while i < len(tokens):
+        if not is_number(tokens[i]):
+            i += 1
+            continue
+
+        end = i
+        while end < len(tokens) and is_number(tokens[end]):
+            end += 1
+
+        run = [t for t in tokens[i:end] if not FOOTNOTE_CELL_PATTERN.match(t)]
+        if (
+            i > start
+            and end < len(tokens)
+            and tokens[end][:1].isupper()
+            and len(run) >= 2
+            and all(AMOUNT_PATTERN.search(t) for t in run)
+        ):
+            segments.append(" ".join(tokens[start:end]))
+            start = end
+        i = end
+
+    segments.append(" ".join(tokens[start:]))
+    return segments
+
+
+def parse_text_row(line: str) -> Optional[Dict]:
+    """
+    "Label words 1,234 (56) 7.8%" → {"label": ..., "cells": [...]}, or None
+    when the line is prose, a heading, or has no trailing numbers.
+    """
+    tokens = line.split()
+
+    cells = []
+    while tokens and is_number(tokens[-1]):
+        cells.insert(0, tokens.pop())
+
+    # "CET1 capital (3) 24.9 24.4": a leading "(3)" is a footnote, not -3
+    while len(cells) > 1 and FOOTNOTE_CELL_PATTERN.match(cells[0]):
+        cells.pop(0)
+
+    # "Revenue 3 65,583 4,333": a bare small integer before formatted
+    # amounts is a note reference
+    while (
+        len(cells) > 1
+        and NOTE_CELL_PATTERN.match(cells[0])
+        and any(FORMATTED_CELL_PATTERN.search(c) for c in cells[1:])
+    ):
+        cells.pop(0)
+
+    if not cells or all(is_year(c) for c in cells):
+        return None
+
+    label = clean_label(" ".join(tokens))
+    if (
+        sum(ch.isalpha() for ch in label) < MIN_LABEL_LETTERS
+        or len(label.split()) > MAX_LABEL_WORDS
+        or label.endswith((".", ","))
+    ):
+        return None
+
+    return {"label": label, "cells": cells}
+
+
+def text_rows(page_number: int, text: str) -> Iterator[Dict]:
+    """
+    Rows from aligned-text tables on one page. Year-only lines set the
+    period / column headers and unit-only lines the unit for the rows
+    that follow.
+    """
+    period = None
+    columns = None
+    unit = None
+
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+
+        tokens = line.split()
+
+        if all(is_year(t) for t in tokens):
+            if len(tokens) == 1:
+                period, columns = tokens[0], None
+            else:
+                columns = tokens
+            continue
+
+        if UNIT_PATTERN.match(line):
+            unit = line
+            continue
+
+        for segment in split_columns(line):
+            row = parse_text_row(segment)
+            if row is None:
+                continue
+
+            yield {
+                "page": page_number,
+                "source": "text",
+                **row,
+                "columns": columns if columns and len(columns) == len(row["cells"]) else None,
+                "period": period,
+                "unit": unit,
+            }
+
+
+def ruled_rows(page_number: int, tables: Iterable[List[List[Optional[str]]]]) -> Iterator[Dict]:
+    """
+    Rows from pdfplumber extract_tables() output. A first row without
+    numeric cells (years aside) is taken as the column header.
+    """
+    for table in tables:
+        rows = [[(cell or "").strip() for cell in row] for row in table]
+        rows = [row for row in rows if any(row)]
+        if not rows:
+            continue
+
+        header = None
+        if not any(is_number(c) and not is_year(c) for c in rows[0][1:]):
+            header, rows = rows[0], rows[1:]
+
+        for row in rows:
+            label = clean_label(row[0])
+            cells = [c for c in row[1:] if c]
+            if not label or not cells or not all(is_number(c) for c in cells):
+                continue
+
+            columns = None
+            if header is not None:
+                columns = [h for h, c in zip(header[1:], row[1:]) if c]
+                if len(columns) != len(cells) or not all(columns):
+                    columns = None
+
+            yield {
+                "page": page_number,
+                "source": "ruled",
+                "label": label,
+                "cells": cells,
+                "columns": columns,
+                "period": None,
+                "unit": None,
+            }
+
+
+def extract_page_rows(page_number: int, page, text: Optional[str] = None) -> List[Dict]:
+    """
+    All table rows of a pdfplumber page (pass `text` if already extracted).
+    """
+    if text is None:
+        text = page.extract_text() or ""
+
+    rows = list(ruled_rows(page_number, page.extract_tables()))
+    rows.extend(text_rows(page_number, text))
+    return rows
+
+
+def extract_text_file_rows(text_path: Path) -> Iterator[Dict]:
+    """
+    Text-table rows from an already extracted report (--- PAGE n --- markers),
+    for documents whose PDF is no longer available.
+    """
+    text = text_path.read_text(encoding="utf-8", errors="ignore")
+    matches = list(PAGE_MARKER_PATTERN.finditer(text))
+
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        yield from text_rows(int(match.group(1)), text[match.end():end])
+
+
+def tables_path_for(text_path: Path, text_dir: Path, tables_dir: Path = TABLES_DIR) -> Path:
+    relative = text_path.relative_to(text_dir)
+    return tables_dir / relative.parent / (relative.stem + TABLES_SUFFIX)
+
+
+def write_rows(rows: Iterable[Dict], output_path: Path) -> int:
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    count = 0
+    with output_path.open("w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+            count += 1
+
+    return count
+
+
+# -----------------------------
+# Entry Point
+# -----------------------------
+
+if __name__ == "__main__":
+    # Backfill tables for reports extracted before table extraction existed
+    from ingestion.download_annual_reports import PROCESSED_TEXT_DIR
+
+    for text_path in sorted(PROCESSED_TEXT_DIR.rglob("*.txt")):
+        output_path = tables_path_for(text_path, PROCESSED_TEXT_DIR)
+        if output_path.exists():
+            print(f"Skipping {output_path}")
+            continue
+
+        count = write_rows(extract_text_file_rows(text_path), output_path)
+        print(f"Extracted {count} table rows → {output_path}")
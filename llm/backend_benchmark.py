@@ -0,0 +1,111 @@
+"""
+Compare LLM backends on throughput and latency.
+
+Evidence is built from the stored chunks of each benchmark query's
+company / fiscal year (tests/test_queries.json), so no index or embedding
+model is needed. The answer cache is bypassed; every call reaches the
+backend.
+
+Usage:
+    python -m llm.backend_benchmark                       # stub only
+    python -m llm.backend_benchmark openai local --concurrency 4
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+import argparse
+import json
+import time
+
+from llm.backends import BACKENDS, generate, get_backend
+from llm.generate_answer import SYSTEM_PROMPT
+from processing.chunk_store import document_key
+from retrieval.build_evidence import build_evidence_context
+
+QUERIES_PATH = Path("tests/test_queries.json")
+CHUNKS_DIR = Path("data/chunks/annual_reports")
+
+EVIDENCE_CHUNKS = 4
+
+
+def load_cases(limit: int) -> List[Tuple[str, str]]:
+    """
+    (question, evidence_context) pairs for queries whose document is chunked.
+    """
+    chunks_by_document: Dict[str, List[Dict]] = {}
+    for chunks_file in sorted(CHUNKS_DIR.glob("*/*/chunks.jsonl")):
+        with open(chunks_file, "r", encoding="utf-8") as f:
+            chunks = [json.loads(line) for line in f if line.strip()]
+        if chunks:
+            chunks_by_document[document_key(chunks[0]["company"], chunks[0]["fiscal_year"])] = chunks
+
+    cases = []
+    for query in json.loads(QUERIES_PATH.read_text(encoding="utf-8")):
+        request = query["llm_request"]
+        chunks = chunks_by_document.get(
+            document_key(request.get("company") or "", request.get("fiscal_year") or 0)
+        )
+        if chunks:
+            cases.append((request["query"], build_evidence_context(chunks[:EVIDENCE_CHUNKS])))
+
+    return cases[:limit]
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run_backend(name: str, cases: List[Tuple[str, str]], concurrency: int) -> Dict:
+    backend = get_backend(name)
+
+    def call(case):
+        start = time.perf_counter()
+        result = generate(case[0], case[1], SYSTEM_PROMPT, backend, use_cache=False)
+        return time.perf_counter() - start, result
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(call, cases))
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for latency, _ in outcomes]
+    output_tokens = sum((r.get("usage") or {}).get("output_tokens", 0) for _, r in outcomes)
+
+    return {
+        "backend": name,
+        "model": backend.model,
+        "requests": len(cases),
+        "failed": sum(1 for _, r in outcomes if r.get("degraded")),
+        "req_per_s": len(cases) / elapsed,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "output_tok_per_s": output_tokens / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("backends", nargs="*", default=["stub"], choices=sorted(BACKENDS))
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    cases = load_cases(args.limit)
+    if not cases:
+        raise SystemExit(f"No benchmark queries with chunked documents under {CHUNKS_DIR}")
+
+    print(f"Queries: {len(cases)}, concurrency: {args.concurrency}\n")
+    print(f"{'backend':<10}{'model':<22}{'req/s':>8}{'p50 ms':>10}{'p95 ms':>10}{'out tok/s':>11}{'failed':>8}")
+
+    for name in args.backends:
+        r = run_backend(name, cases, args.concurrency)
+        print(
+            f"{r['backend']:<10}{r['model']:<22}{r['req_per_s']:>8.2f}{r['p50_ms']:>10.0f}"
+            f"{r['p95_ms']:>10.0f}{r['output_tok_per_s']:>11.1f}{r['failed']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
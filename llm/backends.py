@@ -0,0 +1,376 @@
+"""
+Pluggable LLM backends behind one answer pipeline.
+
+backend   calls
+--------  ------------------------------------------------------------------
+openai    OpenAI Responses API (OPENAI_MODEL) through llm/gateway.py
+local     OpenAI-compatible chat completions server: Ollama, llama.cpp,
+          vLLM (LOCAL_LLM_BASE_URL, LOCAL_LLM_MODEL)
+stub      deterministic answer built from the first evidence excerpt; no
+          network, for tests and benchmarks
+
+Every backend only turns (system prompt, user content) into raw text and
+token usage. Prompts are laid out static-first for provider prompt
+caching: the fixed system prompt, then the evidence (in a stable order,
+see retrieval/build_evidence.order_for_prompt), then the question last.
+generate() around it is shared: empty-evidence refusal, the .llm_cache
+file cache, <ANSWER> tag extraction, citation-artifact cleanup and
+source listing. The backend is chosen per call, or by LLM_BACKEND.
+"""
+
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+
+from llm.gateway import DeadlineExceeded, LLMGateway, ProviderUnavailable, get_gateway, output_text
+
+logger = logging.getLogger(__name__)
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4.1-mini")
+LOCAL_LLM_BASE_URL = os.getenv("LOCAL_LLM_BASE_URL", "http://localhost:11434/v1")
+LOCAL_LLM_MODEL = os.getenv("LOCAL_LLM_MODEL", "gpt-oss:20b")
+
+CACHE_DIR = Path(".llm_cache")
+
+REFUSAL_ANSWER = "I do not have enough information in the provided documents."
+
+MAX_OUTPUT_TOKENS = 600
+
+# Cached refusals are recomputed when this much evidence was supplied
+REFUSAL_RECHECK_CHARS = 400
+
+ANSWER_TAG_PATTERN = re.compile(r"<ANSWER>\s*(.*?)\s*</ANSWER>", re.DOTALL)
+CITATION_ARTIFACT_PATTERN = re.compile(r"【[^】]+】")
+SOURCE_PATTERN = re.compile(
+    r'"source_id"\s*:\s*(\d+).*?"company"\s*:\s*"([^"]+)".*?"document"\s*:\s*"([^"]+)".*?"pages"\s*:\s*"([^"]+)"',
+    re.DOTALL | re.IGNORECASE,
+)
+
+# -----------------------------
+# Backends
+# -----------------------------
+
+class LLMBackend(ABC):
+    name = "base"
+
+    def __init__(self, model: str):
+        self.model = model
+
+    @abstractmethod
+    def complete(self, system_prompt: str, user_content: str, deadline: Optional[float] = None) -> Dict:
+        """
+        {"text": str, "usage": token_usage(...)}
+
+        deadline: time.monotonic() value after which DeadlineExceeded is
+        raised instead of waiting for the model.
+        """
+
+
+class OpenAIBackend(LLMBackend):
+    name = "openai"
+
+    def __init__(self, model: str = OPENAI_MODEL, gateway: Optional[LLMGateway] = None):
+        super().__init__(model)
+        self._gateway = gateway
+
+    def complete(self, system_prompt: str, user_content: str, deadline: Optional[float] = None) -> Dict:
+        gateway = self._gateway or get_gateway()
+        body = gateway.request(
+            "/responses",
+            {
+                "model": self.model,
+                "input": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_content},
+                ],
+                "temperature": 0,
+                "max_output_tokens": MAX_OUTPUT_TOKENS,
+            },
+            deadline=deadline,
+        )
+        usage = body.get("usage") or {}
+        return {
+            "text": output_text(body),
+            "usage": token_usage(
+                usage.get("input_tokens", 0),
+                (usage.get("input_tokens_details") or {}).get("cached_tokens", 0),
+                usage.get("output_tokens", 0),
+                usage.get("total_tokens", 0),
+            ),
+        }
+
+
+class LocalBackend(LLMBackend):
+    """
+    Any server exposing /chat/completions (Ollama serves it under /v1).
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        model: str = LOCAL_LLM_MODEL,
+        base_url: str = LOCAL_LLM_BASE_URL,
+        gateway: Optional[LLMGateway] = None,
+    ):
+        super().__init__(model)
+        # Local generation is slow on CPU; allow longer reads than the API
+        self.gateway = gateway or LLMGateway(api_key=None, base_url=base_url, timeout_s=120)
+
+    def complete(self, system_prompt: str, user_content: str, deadline: Optional[float] = None) -> Dict:
+        body = self.gateway.request(
+            "/chat/completions",
+            {
+                "model": self.model,
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_content},
+                ],
+                "temperature": 0,
+                "top_p": 1,
+                "max_tokens": MAX_OUTPUT_TOKENS,
+                "stream": False,
+            },
+            deadline=deadline,
+        )
+        usage = body.get("usage") or {}
+        return {
+            "text": body["choices"][0]["message"]["content"] or "",
+            # vLLM reports prefix cache hits here; Ollama omits the field
+            "usage": token_usage(
+                usage.get("prompt_tokens", 0),
+                (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0),
+                usage.get("completion_tokens", 0),
+                usage.get("total_tokens", 0),
+            ),
+        }
+
+
+class StubBackend(LLMBackend):
+    name = "stub"
+
+    def __init__(self, model: str = "stub", latency_s: float = 0.0):
+        super().__init__(model)
+        self.latency_s = latency_s
+
+    def complete(self, system_prompt: str, user_content: str, deadline: Optional[float] = None) -> Dict:
+        if self.latency_s:
+            if deadline is not None and time.monotonic() + self.latency_s > deadline:
+                time.sleep(max(0.0, deadline - time.monotonic()))
+                raise DeadlineExceeded("stub latency exceeds the deadline")
+            time.sleep(self.latency_s)
+
+        excerpt = user_content.split('"""')[1].strip() if '"""' in user_content else user_content
+        text = f"<ANSWER>\nAccording to SOURCE [1]: {' '.join(excerpt.split()[:40])}\n</ANSWER>"
+        return {
+            "text": text,
+            "usage": token_usage(
+                approx_tokens(system_prompt) + approx_tokens(user_content),
+                0,
+                approx_tokens(text),
+            ),
+        }
+
+
+BACKENDS = {
+    "openai": OpenAIBackend,
+    "local": LocalBackend,
+    "ollama": LocalBackend,
+    "stub": StubBackend,
+}
+
+
+def get_backend(name: Optional[str] = None, model: Optional[str] = None) -> LLMBackend:
+    """
+    Shared backend instance by name (LLM_BACKEND when omitted) and model
+    (the backend's default when omitted). Raises ValueError for unknown
+    names.
+    """
+    name = name or LLM_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend {name!r}; expected one of {sorted(BACKENDS)}")
+    return _backend(name, model)
+
+
+@lru_cache(maxsize=None)
+def _backend(name: str, model: Optional[str]) -> LLMBackend:
+    return BACKENDS[name](model=model) if model else BACKENDS[name]()
+
+# -----------------------------
+# Shared answer pipeline
+# -----------------------------
+
+def approx_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def token_usage(input_tokens: int, cached_input_tokens: int, output_tokens: int, total_tokens: int = 0) -> Dict:
+    """
+    Token counts of one call. cached_input_tokens is the part of the input
+    served from the provider's prompt prefix cache (billed and processed
+    at a discount).
+    """
+    return {
+        "input_tokens": input_tokens,
+        "cached_input_tokens": cached_input_tokens,
+        "uncached_input_tokens": input_tokens - cached_input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": total_tokens or input_tokens + output_tokens,
+    }
+
+
+def build_prompt(system_prompt: str, question: str, context: str) -> str:
+    return f"""
+SYSTEM:
+{system_prompt}
+
+CONTEXT:
+{context}
+
+USER QUESTION:
+{question}
+
+ASSISTANT:
+""".strip()
+
+
+def cache_path_for(backend: LLMBackend, prompt: str, cache_dir: Path = CACHE_DIR) -> Path:
+    payload = {
+        "prompt": prompt,
+        "model": backend.model,
+        "options": {
+            "temperature": 0,
+            "top_p": 1,
+            "repeat_penalty": 1,
+        },
+    }
+    # OpenAI keys predate backends; keep them so existing entries still hit
+    if backend.name != "openai":
+        payload["backend"] = backend.name
+
+    cache_key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+    return cache_dir / f"{cache_key}.json"
+
+
+def extract_answer(raw_output: str) -> str:
+    """
+    Text inside the first <ANSWER>…</ANSWER> when the model used the tags,
+    else the whole output; citation artifacts like 【1】【Barclays】 removed.
+    """
+    start_index = raw_output.find("<ANSWER>")
+    if start_index != -1:
+        match = ANSWER_TAG_PATTERN.search(raw_output[start_index:])
+        raw_output = match.group(1) if match else ""
+
+    return CITATION_ARTIFACT_PATTERN.sub("", raw_output.strip()).strip()
+
+
+def extract_sources(evidence_context: str):
+    sources = []
+    seen = set()
+    for match in SOURCE_PATTERN.finditer(evidence_context):
+        source_id, company, document, pages = match.groups()
+        key = (source_id, company, document, pages)
+        if key not in seen:
+            seen.add(key)
+            sources.append(
+                f"SOURCE [{source_id}] — {company}, {document}, Pages {pages}"
+            )
+    return sources
+
+
+def generate(
+    question: str,
+    evidence_context: str,
+    system_prompt: str,
+    backend: Optional[LLMBackend] = None,
+    use_cache: bool = True,
+    cache_dir: Path = CACHE_DIR,
+    deadline: Optional[float] = None,
+) -> Dict:
+    """
+    deadline: time.monotonic() value; a cached answer is still returned
+    after it, a model call is abandoned at it.
+
+    Returns:
+    {
+        "answer": str,
+        "sources": [str],
+        "raw_output": str,
+        "backend": str,
+        "model": str,
+        "usage": token_usage(...),
+        "cached": bool,
+        "degraded": bool,          # only when the provider was unavailable
+        "deadline_exceeded": bool  # or the deadline passed first
+    }
+    """
+    backend = backend or get_backend()
+
+    if not evidence_context.strip():
+        return {"answer": REFUSAL_ANSWER}
+
+    prompt = build_prompt(system_prompt, question, evidence_context)
+    cache_path = cache_path_for(backend, prompt, cache_dir)
+
+    if use_cache and cache_path.exists():
+        cached_result = json.loads(cache_path.read_text())
+        # Bypass cache if cached answer is refusal but evidence_context is large enough
+        if not (
+            cached_result.get("answer", "") == REFUSAL_ANSWER
+            and len(evidence_context.strip()) >= REFUSAL_RECHECK_CHARS
+        ):
+            return {**cached_result, "cached": True}
+
+    try:
+        completion = backend.complete(
+            system_prompt,
+            f"CONTEXT:\n{evidence_context}\n\nQUESTION:\n{question}",
+            deadline=deadline,
+        )
+    except DeadlineExceeded:
+        return {
+            "answer": REFUSAL_ANSWER,
+            "sources": [],
+            "backend": backend.name,
+            "model": backend.model,
+            "degraded": True,
+            "deadline_exceeded": True,
+        }
+    except ProviderUnavailable:
+        # Provider degraded: refuse fast, the caller still returns the
+        # retrieved evidence. Not cached.
+        return {
+            "answer": REFUSAL_ANSWER,
+            "sources": [],
+            "backend": backend.name,
+            "model": backend.model,
+            "degraded": True,
+        }
+
+    raw_output = completion["text"]
+    answer = extract_answer(raw_output) or REFUSAL_ANSWER
+
+    result = {
+        "answer": answer,
+        "sources": extract_sources(evidence_context),
+        "raw_output": raw_output,
+        "backend": backend.name,
+        "model": backend.model,
+        "usage": completion["usage"],
+    }
+
+    if use_cache:
+        cache_dir.mkdir(exist_ok=True)
+        cache_path.write_text(json.dumps(result, indent=2))
+
+    return {**result, "cached": False}
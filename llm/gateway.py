@@ -0,0 +1,323 @@
+"""
+HTTP gateway to the LLM provider (OpenAI Responses API).
+
+One pooled httpx client is shared by all requests. Each call gets:
+
+- connect / read timeouts (LLM_CONNECT_TIMEOUT_S, LLM_TIMEOUT_S)
+- up to LLM_MAX_RETRIES retries on timeouts, connection errors and
+  429 / 5xx responses, with capped exponential backoff and full jitter
+- optionally (LLM_HEDGE=1) a second, hedged request when the first has
+  not answered after the recent p95 latency; the first response wins
+- a circuit breaker: after LLM_BREAKER_FAILURES consecutive provider
+  failures calls fail fast with ProviderUnavailable for
+  LLM_BREAKER_RESET_S, then a single trial call decides whether to close
+
+A call may carry a deadline (time.monotonic() value, see api/deadline.py):
+read timeouts are shortened to the time left, no retry is started that
+could not finish in time, and DeadlineExceeded is raised instead. Running
+out of our own time budget does not count against the circuit breaker.
+
+Callers treat ProviderUnavailable as "answer without the LLM" (see
+llm/generate_answer.py). The transport is injectable, so tests run
+against a local fake provider (httpx.MockTransport).
+"""
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Dict, Optional
+import logging
+import os
+import random
+import threading
+import time
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "30"))
+LLM_CONNECT_TIMEOUT_S = float(os.getenv("LLM_CONNECT_TIMEOUT_S", "5"))
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "10"))
+
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE_S = float(os.getenv("LLM_BACKOFF_BASE_S", "0.5"))
+LLM_BACKOFF_MAX_S = float(os.getenv("LLM_BACKOFF_MAX_S", "8"))
+
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_MIN_DELAY_S = float(os.getenv("LLM_HEDGE_MIN_DELAY_S", "2"))
+
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_S = float(os.getenv("LLM_BREAKER_RESET_S", "30"))
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+# Latencies kept for the hedge delay, and the minimum before p95 is used
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+
+class LLMGatewayError(Exception):
+    """
+    Non-retryable provider error (bad request, authentication, ...).
+    """
+
+
+class RetryableError(LLMGatewayError):
+    def __init__(self, message: str, retry_after_s: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after_s = retry_after_s
+
+
+class ProviderUnavailable(LLMGatewayError):
+    """
+    Circuit open or retries exhausted: the provider is degraded.
+    """
+
+
+class DeadlineExceeded(LLMGatewayError):
+    """
+    The caller's deadline passed before the provider answered.
+    """
+
+# -----------------------------
+# Circuit breaker
+# -----------------------------
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES, reset_after_s: float = LLM_BREAKER_RESET_S):
+        self.failure_threshold = failure_threshold
+        self.reset_after_s = reset_after_s
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_after_s:
+                self.state = self.HALF_OPEN
+                self._trial_running = False
+
+            # Half open: let exactly one trial call through
+            if self.state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+
+            return False
+
+    def release_trial(self) -> None:
+        """
+        A call ended without telling whether the provider is healthy.
+        """
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("llm_circuit_opened", extra={"failures": self._failures})
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+# -----------------------------
+# Gateway
+# -----------------------------
+
+class LLMGateway:
+    def __init__(
+        self,
+        api_key: Optional[str],
+        base_url: str = OPENAI_BASE_URL,
+        timeout_s: float = LLM_TIMEOUT_S,
+        connect_timeout_s: float = LLM_CONNECT_TIMEOUT_S,
+        pool_size: int = LLM_POOL_SIZE,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff_base_s: float = LLM_BACKOFF_BASE_S,
+        backoff_max_s: float = LLM_BACKOFF_MAX_S,
+        hedge: bool = LLM_HEDGE,
+        hedge_min_delay_s: float = LLM_HEDGE_MIN_DELAY_S,
+        breaker: Optional[CircuitBreaker] = None,
+        transport: Optional[httpx.BaseTransport] = None,
+    ):
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.client = httpx.Client(
+            base_url=base_url,
+            headers=headers,
+            timeout=httpx.Timeout(timeout_s, connect=connect_timeout_s),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            transport=transport,
+        )
+        self.timeout_s = timeout_s
+        self.connect_timeout_s = connect_timeout_s
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.hedge = hedge
+        self.hedge_min_delay_s = hedge_min_delay_s
+        self.breaker = breaker or CircuitBreaker()
+
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._hedge_executor = ThreadPoolExecutor(
+            max_workers=2 * pool_size, thread_name_prefix="llm-hedge"
+        ) if hedge else None
+
+    # -- single request --
+
+    def _post(self, path: str, payload: Dict, deadline: Optional[float] = None) -> Dict:
+        start = time.monotonic()
+        timeout = httpx.USE_CLIENT_DEFAULT
+        cut_by_deadline = deadline is not None and deadline - start < self.timeout_s
+        if cut_by_deadline:
+            left_s = max(0.001, deadline - start)
+            timeout = httpx.Timeout(left_s, connect=min(self.connect_timeout_s, left_s))
+
+        try:
+            response = self.client.post(path, json=payload, timeout=timeout)
+        except httpx.TimeoutException as e:
+            if cut_by_deadline:
+                raise DeadlineExceeded(f"deadline reached: {e}") from e
+            raise RetryableError(f"timeout: {e}") from e
+        except httpx.TransportError as e:
+            raise RetryableError(f"transport error: {e}") from e
+
+        if response.status_code in RETRYABLE_STATUS:
+            retry_after = response.headers.get("retry-after")
+            raise RetryableError(
+                f"HTTP {response.status_code}",
+                retry_after_s=float(retry_after) if retry_after and retry_after.isdigit() else None,
+            )
+        if response.status_code >= 400:
+            raise LLMGatewayError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+        self._latencies.append(time.monotonic() - start)
+        return response.json()
+
+    def hedge_delay_s(self) -> float:
+        latencies = sorted(self._latencies)
+        if len(latencies) < MIN_LATENCY_SAMPLES:
+            return self.hedge_min_delay_s
+        p95 = latencies[int(0.95 * (len(latencies) - 1))]
+        return max(self.hedge_min_delay_s, p95)
+
+    def _post_hedged(self, path: str, payload: Dict, deadline: Optional[float] = None) -> Dict:
+        """
+        Send the request; if it is still running after hedge_delay_s(),
+        send it again and return whichever succeeds first. The slower
+        request is left to finish in the background.
+        """
+        first = self._hedge_executor.submit(self._post, path, payload, deadline)
+        done, _ = wait([first], timeout=self.hedge_delay_s())
+        if done:
+            return first.result()
+
+        logger.info("llm_hedge_sent", extra={"delay_s": round(self.hedge_delay_s(), 3)})
+        pending = {first, self._hedge_executor.submit(self._post, path, payload, deadline)}
+        error = None
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = error or future.exception()
+
+        raise error
+
+    # -- retries + breaker --
+
+    def _backoff_s(self, attempt: int, retry_after_s: Optional[float]) -> float:
+        delay = random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt))
+        if retry_after_s is not None:
+            delay = max(delay, min(retry_after_s, self.backoff_max_s))
+        return delay
+
+    def request(self, path: str, payload: Dict, deadline: Optional[float] = None) -> Dict:
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            if deadline is not None and time.monotonic() >= deadline:
+                raise DeadlineExceeded(f"deadline reached after {attempt} attempt(s): {last_error}")
+
+            if not self.breaker.allow():
+                raise ProviderUnavailable("circuit open")
+
+            try:
+                if self.hedge:
+                    body = self._post_hedged(path, payload, deadline)
+                else:
+                    body = self._post(path, payload, deadline)
+            except DeadlineExceeded:
+                # Our budget ran out, not the provider; frees a half-open trial
+                self.breaker.release_trial()
+                raise
+            except RetryableError as e:
+                self.breaker.record_failure()
+                last_error = e
+                if attempt < self.max_retries:
+                    delay = self._backoff_s(attempt, e.retry_after_s)
+                    if deadline is not None and time.monotonic() + delay >= deadline:
+                        raise DeadlineExceeded(f"no time left to retry: {e}") from e
+                    logger.warning(
+                        "llm_retry",
+                        extra={"attempt": attempt + 1, "error": str(e), "delay_s": round(delay, 3)},
+                    )
+                    time.sleep(delay)
+                continue
+            except LLMGatewayError:
+                # The provider answered (bad request, auth, ...): it is up
+                self.breaker.record_success()
+                raise
+            except Exception:
+                self.breaker.release_trial()
+                raise
+
+            self.breaker.record_success()
+            return body
+
+        raise ProviderUnavailable(f"retries exhausted: {last_error}")
+
+    def respond(self, payload: Dict) -> str:
+        """
+        POST /responses; returns the concatenated output text.
+        """
+        return output_text(self.request("/responses", payload))
+
+
+def output_text(body: Dict) -> str:
+    """
+    Responses API body → text (what the SDK exposes as `output_text`).
+    """
+    return "".join(
+        part.get("text", "")
+        for item in body.get("output", [])
+        if item.get("type") == "message"
+        for part in item.get("content", [])
+        if part.get("type") == "output_text"
+    )
+
+
+@lru_cache(maxsize=1)
+def get_gateway() -> LLMGateway:
+    """
+    Process-wide gateway, created on first use so importing the LLM
+    modules needs no credentials.
+    """
+    return LLMGateway(api_key=os.getenv("OPENAI_API_KEY"))
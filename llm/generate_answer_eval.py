@@ -1,9 +1,6 @@
-import subprocess
-from typing import Dict
-import re
-import requests
-
+from typing import Dict, Optional
 
+from llm.backends import ANSWER_TAG_PATTERN, REFUSAL_ANSWER, generate, get_backend
 
 SYSTEM_PROMPT = """You are a financial analysis assistant answering questions over official company reports.
 
@@ -54,124 +51,48 @@ SOURCE [X] — Company, Document, Fiscal Year, Pages A–B
 """
 
 
-def build_prompt(question: str, context: str) -> str:
-    return f"""
-SYSTEM:
-{SYSTEM_PROMPT}
-
-CONTEXT:
-{context}
-
-USER QUESTION:
-{question}
-
-ASSISTANT:
-""".strip()
-
 
 def generate_answer(
     question: str,
     evidence_context: str,
     model: str = "gpt-oss:20b",
+    backend: Optional[str] = "local",
 ) -> Dict:
     """
-    Generate a grounded answer using a local LLM.
+    Generate a grounded answer using a local LLM, with the stricter
+    evaluation prompt and outcome labels.
 
     Returns:
     {
         "answer": str,
-        "raw_output": str
+        "outcome": "PASS" | "FAIL" | "REFUSE_OK",
+        ...                             # see llm.backends.generate
     }
     """
     MIN_EVIDENCE_CHARS = 400
     if len(evidence_context.strip()) < MIN_EVIDENCE_CHARS:
         return {
-            "answer": "I do not have enough information in the provided documents.",
-            "outcome": "REFUSE_OK"
-        }
-
-    # --- Company consistency guard ---
-    # companies_in_context = set(
-    # re.findall(r'"company"\s*:\s*"([^"]+)"', evidence_context, re.IGNORECASE)
-    # )   
-
-    # if hasattr(generate_answer, "expected_company"):
-    #     if generate_answer.expected_company not in companies_in_context:
-    #         return {
-    #             "answer": "I do not have enough information in the provided documents."
-    #         }
-
-    if not evidence_context.strip():
-        return {
-            "answer": "I do not have enough information in the provided documents.",
+            "answer": REFUSAL_ANSWER,
             "outcome": "REFUSE_OK"
         }
 
-    prompt = build_prompt(question, evidence_context)
-
-    response = requests.post(
-        "http://localhost:11434/api/generate",
-        json={
-            "model": model,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": 0,
-                "top_p": 1,
-                "repeat_penalty": 1
-            }
-        },
-        timeout=120
+    result = generate(
+        question=question,
+        evidence_context=evidence_context,
+        system_prompt=SYSTEM_PROMPT,
+        backend=get_backend(backend, model),
+        use_cache=False,
     )
 
-    if response.status_code != 200:
-        raise RuntimeError(response.text)
-
-    raw_output = response.json().get("response", "")
-
-    # Truncate output before the first <ANSWER> tag
-    start_index = raw_output.find("<ANSWER>")
-    truncated_output = raw_output[start_index:] if start_index != -1 else raw_output
-
-    match = re.search(
-        r"<ANSWER>\s*(.*?)\s*</ANSWER>",
-        truncated_output,
-        re.DOTALL
-    )
-
-    if not match:
+    # Missing <ANSWER> tags or a near-empty answer count as failures
+    if not ANSWER_TAG_PATTERN.search(result.get("raw_output", "")) or len(result["answer"]) < 20:
         return {
-            "answer": "I do not have enough information in the provided documents.",
-            "outcome": "FAIL"
-        }
-
-    answer = match.group(1).strip()
-    # Remove inline citation artifacts like 【1】【Barclays】【Annual Report 2024】【46–47】
-    answer = re.sub(r"【[^】]+】", "", answer).strip()
-
-    sources = []
-    seen = set()
-    for match in re.finditer(
-        r'"source_id"\s*:\s*(\d+).*?"company"\s*:\s*"([^"]+)".*?"document"\s*:\s*"([^"]+)".*?"pages"\s*:\s*"([^"]+)"',
-        evidence_context,
-        re.DOTALL | re.IGNORECASE
-    ):
-        source_id, company, document, pages = match.groups()
-        key = (source_id, company, document, pages)
-        if key not in seen:
-            seen.add(key)
-            sources.append(
-                f"SOURCE [{source_id}] — {company}, {document}, Pages {pages}"
-            )
-
-    if not answer or len(answer) < 20:
-        return {
-            "answer": "I do not have enough information in the provided documents.",
+            **result,
+            "answer": REFUSAL_ANSWER,
             "outcome": "FAIL"
         }
 
     return {
-        "answer": answer,
-        "sources": sources,
+        **result,
         "outcome": "PASS"
-    }
\ No newline at end of file
+    }
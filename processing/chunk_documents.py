@@ -39,16 +39,22 @@ def split_by_pages(text: str) -> List[Dict]:
     Returns list of:
     {
         "page_number": int,
-        "text": str
+        "text": str,
+        "start": int,   # character span of `text` in the document
+        "end": int
     }
     """
     matches = list(PAGE_MARKER_PATTERN.finditer(text))
 
     if not matches:
         # Fallback: no page markers
+        stripped = text.strip()
+        start = len(text) - len(text.lstrip())
         return [{
             "page_number": None,
-            "text": text.strip()
+            "text": stripped,
+            "start": start,
+            "end": start + len(stripped)
         }]
 
     pages = []
@@ -58,11 +64,15 @@ def split_by_pages(text: str) -> List[Dict]:
         start = match.end()
         end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
 
-        page_text = text[start:end].strip()
+        raw_page = text[start:end]
+        page_text = raw_page.strip()
         if page_text:
+            page_start = start + len(raw_page) - len(raw_page.lstrip())
             pages.append({
                 "page_number": page_number,
-                "text": page_text
+                "text": page_text,
+                "start": page_start,
+                "end": page_start + len(page_text)
             })
 
     return pages
@@ -167,10 +177,12 @@ def build_chunk(
 def chunk_document(
     text_path: Path,
     metadata_path: Path,
-    output_path: Path
+    output_path: Path,
+    page_index=None
 ) -> None:
     """
     Chunk a single document and write chunks as JSONL.
+    If a PageIndexBuilder is given, the document's pages are added to it.
     """
     text = load_text(text_path)
     metadata = load_metadata(metadata_path)
@@ -178,6 +190,9 @@ def chunk_document(
     pages = split_by_pages(text)
     chunks = chunk_pages(pages, metadata)
 
+    if page_index is not None:
+        page_index.add_document(metadata, text_path, text, pages, chunks)
+
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
     with output_path.open("w", encoding="utf-8") as f:
@@ -188,8 +203,10 @@ def chunk_document(
 
 if __name__ == "__main__":
     from pathlib import Path
+    from processing.page_index import PageIndexBuilder
 
     BASE_DIR = Path("data")
+    page_index = PageIndexBuilder()
 
     TEXT_DIR = BASE_DIR / "processed" / "clean_text" / "annual_reports"
     META_DIR = BASE_DIR / "processed" / "metadata" / "annual_reports"
@@ -215,5 +232,9 @@ if __name__ == "__main__":
             chunk_document(
                 text_path=text_file,
                 metadata_path=meta_file,
-                output_path=output_file
-            )
\ No newline at end of file
+                output_path=output_file,
+                page_index=page_index
+            )
+
+    page_index.write()
+    print(f"Page index → {page_index.output_dir}")
\ No newline at end of file
@@ -0,0 +1,211 @@
+"""
+Compact binary chunk store.
+
+Replaces the per-document chunks.jsonl files, which repeat the full
+document metadata on every line, with three files:
+
+data/chunk_store/
+├── documents.json   # document table: metadata once per document
+├── chunks.npy       # chunk table: fixed-width rows (see CHUNK_DTYPE)
+└── text.bin         # UTF-8 chunk texts, back to back
+
+chunks.npy is memory-mapped and text.bin is mmap'ed, so opening the store
+costs only the documents.json parse; chunk texts are sliced out of the
+mapping on demand (text_bytes() returns a zero-copy memoryview).
+"""
+
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import json
+import mmap
+
+import numpy as np
+
+CHUNKS_DIR = Path("data/chunks/annual_reports")
+CHUNK_STORE_DIR = Path("data/chunk_store")
+
+DOCUMENTS_FILENAME = "documents.json"
+CHUNKS_FILENAME = "chunks.npy"
+TEXT_FILENAME = "text.bin"
+
+# Fields stored per chunk; everything else is document metadata
+CHUNK_FIELDS = ("chunk_id", "chunk_index", "text", "page_start", "page_end")
+
+CHUNK_DTYPE = np.dtype([
+    ("document", np.int32),
+    ("chunk_index", np.int32),
+    ("text_offset", np.int64),
+    ("text_length", np.int32),
+    ("page_start", np.int32),
+    ("page_end", np.int32),
+])
+
+NO_PAGE = -1
+
+
+def document_key(company: str, fiscal_year) -> str:
+    # chunk_id prefix, see chunk_documents.build_chunk
+    return f"{company}_{fiscal_year}"
+
+# -----------------------------
+# Writing
+# -----------------------------
+
+def convert_jsonl(
+    chunks_dir: Path = CHUNKS_DIR,
+    output_dir: Path = CHUNK_STORE_DIR,
+) -> Dict:
+    """
+    Convert an existing data/chunks tree (one chunks.jsonl per document)
+    into a chunk store. Returns summary counts.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    documents: List[Dict] = []
+    rows = []
+    offset = 0
+
+    with open(output_dir / TEXT_FILENAME, "wb") as text_out:
+        for chunks_file in sorted(chunks_dir.glob("*/*/chunks.jsonl")):
+            document = None
+            doc_id = len(documents)
+
+            with open(chunks_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+
+                    metadata = {k: v for k, v in chunk.items() if k not in CHUNK_FIELDS}
+                    if document is None:
+                        document = {
+                            "metadata": metadata,
+                            "chunk_start": len(rows),
+                            "chunk_count": 0,
+                        }
+                    elif metadata != document["metadata"]:
+                        raise ValueError(
+                            f"Inconsistent document metadata in {chunks_file} "
+                            f"at {chunk['chunk_id']}"
+                        )
+
+                    text = chunk["text"].encode("utf-8")
+                    text_out.write(text)
+
+                    rows.append((
+                        doc_id,
+                        chunk["chunk_index"],
+                        offset,
+                        len(text),
+                        NO_PAGE if chunk["page_start"] is None else chunk["page_start"],
+                        NO_PAGE if chunk["page_end"] is None else chunk["page_end"],
+                    ))
+                    offset += len(text)
+                    document["chunk_count"] += 1
+
+            if document is not None:
+                documents.append(document)
+
+    np.save(output_dir / CHUNKS_FILENAME, np.array(rows, dtype=CHUNK_DTYPE))
+
+    (output_dir / DOCUMENTS_FILENAME).write_text(
+        json.dumps(documents, indent=2), encoding="utf-8"
+    )
+
+    return {"documents": len(documents), "chunks": len(rows), "text_bytes": offset}
+
+# -----------------------------
+# Reading
+# -----------------------------
+
+class ChunkStore:
+    def __init__(self, store_dir: Path = CHUNK_STORE_DIR):
+        self.store_dir = store_dir
+
+        self.documents: List[Dict] = json.loads(
+            (store_dir / DOCUMENTS_FILENAME).read_text(encoding="utf-8")
+        )
+        self.table = np.load(store_dir / CHUNKS_FILENAME, mmap_mode="r")
+
+        with open(store_dir / TEXT_FILENAME, "rb") as f:
+            # mmap of an empty file is not allowed
+            self._text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.table.size else b""
+
+        self._doc_by_key = {
+            document_key(d["metadata"]["company"], d["metadata"]["fiscal_year"]): i
+            for i, d in enumerate(self.documents)
+        }
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def text_bytes(self, row: int) -> memoryview:
+        """
+        Zero-copy view of a chunk's UTF-8 text.
+        """
+        entry = self.table[row]
+        start = int(entry["text_offset"])
+        return memoryview(self._text)[start:start + int(entry["text_length"])]
+
+    def text(self, row: int) -> str:
+        return str(self.text_bytes(row), "utf-8")
+
+    def chunk(self, row: int) -> Dict:
+        """
+        Rebuild the chunk dict exactly as chunks.jsonl stores it.
+        """
+        entry = self.table[row]
+        document = self.documents[int(entry["document"])]["metadata"]
+        chunk_index = int(entry["chunk_index"])
+        page_start = int(entry["page_start"])
+        page_end = int(entry["page_end"])
+
+        return {
+            "chunk_id": f"{document_key(document['company'], document['fiscal_year'])}_{chunk_index}",
+            "chunk_index": chunk_index,
+            "text": self.text(row),
+            "page_start": None if page_start == NO_PAGE else page_start,
+            "page_end": None if page_end == NO_PAGE else page_end,
+            **document,
+        }
+
+    def row_for(self, chunk_id: str) -> Optional[int]:
+        """
+        O(1) row lookup: chunks of a document are stored contiguously in
+        chunk_index order.
+        """
+        key, _, index = chunk_id.rpartition("_")
+        doc_id = self._doc_by_key.get(key)
+        if doc_id is None or not index.isdigit():
+            return None
+
+        document = self.documents[doc_id]
+        chunk_index = int(index)
+        if chunk_index >= document["chunk_count"]:
+            return None
+
+        row = document["chunk_start"] + chunk_index
+        if int(self.table[row]["chunk_index"]) != chunk_index:
+            return None
+
+        return row
+
+    def get(self, chunk_id: str) -> Optional[Dict]:
+        row = self.row_for(chunk_id)
+        return None if row is None else self.chunk(row)
+
+    def iter_chunks(self) -> Iterator[Dict]:
+        for row in range(len(self)):
+            yield self.chunk(row)
+
+
+# -----------------------------
+# Entry Point
+# -----------------------------
+
+if __name__ == "__main__":
+    summary = convert_jsonl()
+    print(
+        f"Converted {summary['chunks']} chunks from {summary['documents']} documents "
+        f"→ {CHUNK_STORE_DIR}"
+    )
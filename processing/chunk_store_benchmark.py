@@ -0,0 +1,72 @@
+"""
+Compare the JSONL chunk layout with the binary chunk store.
+
+Reports disk size, time to load every chunk, and time to fetch chunks by
+chunk_id (JSONL needs a full load + dict; the store opens and seeks).
+
+Usage:
+    python -m processing.chunk_store_benchmark
+"""
+
+from pathlib import Path
+import json
+import random
+import time
+
+from processing.chunk_store import CHUNK_STORE_DIR, CHUNKS_DIR, ChunkStore, convert_jsonl
+
+LOOKUPS = 1000
+
+
+def dir_size_mb(path: Path) -> float:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file()) / 1e6
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def load_jsonl():
+    chunks = []
+    for chunks_file in sorted(CHUNKS_DIR.glob("*/*/chunks.jsonl")):
+        with open(chunks_file, "r") as f:
+            for line in f:
+                chunks.append(json.loads(line))
+    return chunks
+
+
+def main():
+    if not (CHUNK_STORE_DIR / "chunks.npy").exists():
+        convert_jsonl()
+
+    chunks, jsonl_load_ms = timed(load_jsonl)
+    store, store_open_ms = timed(ChunkStore)
+    _, store_texts_ms = timed(lambda: [store.text(i) for i in range(len(store))])
+    _, store_full_ms = timed(lambda: list(store.iter_chunks()))
+
+    chunk_ids = random.Random(0).sample([c["chunk_id"] for c in chunks], min(LOOKUPS, len(chunks)))
+
+    def jsonl_lookup():
+        by_id = {c["chunk_id"]: c for c in load_jsonl()}
+        return [by_id[i] for i in chunk_ids]
+
+    def store_lookup():
+        cold_store = ChunkStore()
+        return [cold_store.get(i) for i in chunk_ids]
+
+    _, jsonl_lookup_ms = timed(jsonl_lookup)
+    _, store_lookup_ms = timed(store_lookup)
+
+    print(f"Chunks: {len(chunks)}\n")
+    print(f"{'':<34}{'JSONL':>10}{'store':>10}")
+    print(f"{'disk size (MB)':<34}{dir_size_mb(CHUNKS_DIR):>10.2f}{dir_size_mb(CHUNK_STORE_DIR):>10.2f}")
+    print(f"{'open (ms)':<34}{'-':>10}{store_open_ms:>10.1f}")
+    print(f"{'load all texts (ms)':<34}{jsonl_load_ms:>10.1f}{store_texts_ms:>10.1f}")
+    print(f"{'load all chunk dicts (ms)':<34}{jsonl_load_ms:>10.1f}{store_full_ms:>10.1f}")
+    print(f"{f'cold {len(chunk_ids)} lookups by chunk_id (ms)':<34}{jsonl_lookup_ms:>10.1f}{store_lookup_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
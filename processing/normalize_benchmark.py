@@ -0,0 +1,103 @@
+"""
+Compare the original multi-pass normalization with the streaming Normalizer.
+
+Reports throughput (MB/s of raw text) for both, confirms the outputs are
+identical, and prints per-rule hit counts.
+
+Usage:
+    python -m processing.normalize_benchmark
+"""
+
+from collections import Counter
+from pathlib import Path
+import re
+import tempfile
+import time
+
+from processing.normalize_text import (
+    HEADER_FOOTER_PATTERNS,
+    INPUT_DIR,
+    PAGE_MARKER_PATTERN,
+    USE_COMPANY_RULES,
+    Normalizer,
+    rules_for,
+)
+
+REPEATS = 3
+
+
+def legacy_normalize_text(raw_text: str) -> str:
+    # Original implementation: whole-text passes, one regex per rule
+    text = PAGE_MARKER_PATTERN.sub(r"\n[PAGE \1]\n", raw_text)
+
+    cleaned_lines = []
+    for line in text.splitlines():
+        line = line.strip()
+
+        if not line:
+            cleaned_lines.append("")
+            continue
+
+        if any(p.match(line) for p in HEADER_FOOTER_PATTERNS):
+            continue
+
+        cleaned_lines.append(line)
+
+    text = "\n".join(cleaned_lines)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+
+    return text.strip()
+
+
+def best_of(fn) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    files = sorted(INPUT_DIR.rglob("*.txt"))
+    if not files:
+        raise SystemExit(f"No raw text under {INPUT_DIR}")
+
+    raw_mb = sum(p.stat().st_size for p in files) / 1e6
+
+    def run_legacy():
+        return [legacy_normalize_text(p.read_text(encoding="utf-8", errors="ignore")) for p in files]
+
+    hits: Counter = Counter()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        outputs = [Path(tmp) / f"{i}.txt" for i in range(len(files))]
+
+        def run_streaming():
+            hits.clear()
+            for path, output_path in zip(files, outputs):
+                company = path.relative_to(INPUT_DIR).parts[0]
+                normalizer = Normalizer(rules_for(company, USE_COMPANY_RULES))
+                hits.update(normalizer.normalize_file(path, output_path))
+
+        legacy_s = best_of(run_legacy)
+        streaming_s = best_of(run_streaming)
+
+        identical = all(
+            out.read_text(encoding="utf-8") == expected
+            for out, expected in zip(outputs, run_legacy())
+        )
+
+    print(f"Files: {len(files)}, raw text: {raw_mb:.1f} MB\n")
+    print(f"{'':<22}{'seconds':>10}{'MB/s':>10}")
+    print(f"{'legacy (multi-pass)':<22}{legacy_s:>10.3f}{raw_mb / legacy_s:>10.1f}")
+    print(f"{'streaming':<22}{streaming_s:>10.3f}{raw_mb / streaming_s:>10.1f}")
+    print(f"\nOutputs identical: {identical}" + (" (company rules on)" if USE_COMPANY_RULES else ""))
+
+    print("\nRule hits:")
+    for rule, count in hits.most_common():
+        print(f"  {rule:<28}{count:>8}")
+
+
+if __name__ == "__main__":
+    main()
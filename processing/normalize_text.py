@@ -5,8 +5,12 @@ Purpose:
 - Preserve semantics for RAG
 """
 
+from collections import Counter
 from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+import io
 import logging
+import os
 import re
 
 # -----------------------------
@@ -16,6 +20,9 @@ import re
 INPUT_DIR = Path("data/processed/text/annual_reports")
 OUTPUT_DIR = Path("data/processed/clean_text/annual_reports")
 
+# Opt in to per-company header rules (changes output vs. the default rules)
+USE_COMPANY_RULES = os.getenv("NORMALIZE_COMPANY_RULES", "0") == "1"
+
 # -----------------------------
 # Logging
 # -----------------------------
@@ -32,51 +39,138 @@ logger = logging.getLogger(__name__)
 
 PAGE_MARKER_PATTERN = re.compile(r"-{3}\s*PAGE\s*(\d+)\s*-{3}", re.IGNORECASE)
 
+# Header / footer rules, matched against each stripped line.
+# Rule name -> pattern; names are used for per-rule hit counts.
+DEFAULT_RULES = {
+    "annual_report_header": r"^.*annual report.*$",
+    "copyright_footer": r"^.*©.*$",
+}
+
+# Extra rules for companies whose layouts leave recurring running headers.
+# Applied on top of DEFAULT_RULES only when requested (see rules_for), so
+# default output stays identical to the existing clean_text files.
+COMPANY_RULES = {
+    "Shell": {
+        "continued_section_header": r"^Additional Information \|.*continued$",
+    },
+    "HSBC": {
+        "side_tab_fragment": r"^(Strategic|Financial|Corporate|Risk|review|statements|governance|report)$",
+    },
+}
+
 HEADER_FOOTER_PATTERNS = [
-    re.compile(r"^.*annual report.*$", re.IGNORECASE),
-    re.compile(r"^.*©.*$", re.IGNORECASE),
+    re.compile(pattern, re.IGNORECASE) for pattern in DEFAULT_RULES.values()
 ]
 
-def normalize_text(raw_text: str) -> str:
-    """
-    Apply conservative normalization rules.
-    """
-
-    # Normalize page markers
-    text = PAGE_MARKER_PATTERN.sub(r"\n[PAGE \1]\n", raw_text)
-
-    lines = text.splitlines()
-    cleaned_lines = []
-
-    for line in lines:
-        stripped = line.strip()
 
-        # Skip empty junk
-        if not stripped:
-            cleaned_lines.append("")
-            continue
+def rules_for(company: Optional[str] = None, use_company_rules: bool = False) -> Dict[str, str]:
+    rules = dict(DEFAULT_RULES)
+    if use_company_rules and company in COMPANY_RULES:
+        rules.update(COMPANY_RULES[company])
+    return rules
 
-        # Remove obvious headers / footers
-        if any(p.match(stripped) for p in HEADER_FOOTER_PATTERNS):
-            continue
 
-        cleaned_lines.append(stripped)
+class Normalizer:
+    """
+    Single-pass, streaming normalizer.
+
+    All header / footer rules are compiled into one alternation with a
+    named group per rule, so each line is matched once and the group that
+    fired identifies the rule. Lines are consumed one at a time and blank
+    runs are collapsed on the fly, so a document never has to be held in
+    memory. Output is identical to the original multi-pass implementation:
+    page markers → [PAGE n], lines stripped, matching lines dropped, at
+    most one blank line in a row, no leading / trailing blank lines.
+    """
 
-    text = "\n".join(cleaned_lines)
+    def __init__(self, rules: Dict[str, str] = DEFAULT_RULES, flags=re.IGNORECASE):
+        self.rule_names = list(rules)
+        self.pattern = re.compile(
+            "|".join(f"(?P<rule{i}>{p})" for i, p in enumerate(rules.values())),
+            flags,
+        ) if rules else None
+        self.hits: Counter = Counter()
+
+    def _clean_lines(self, raw_lines: Iterable[str]) -> Iterator[str]:
+        pattern = self.pattern
+        hits = self.hits
+
+        for raw_line in raw_lines:
+            line = raw_line
+            # Cheap substring test first; regex substitution per line is costly
+            if "---" in raw_line:
+                line, markers = PAGE_MARKER_PATTERN.subn(r"\n[PAGE \1]\n", raw_line)
+                hits["page_marker"] += markers
+
+            # splitlines also breaks on \v, \f, \x1c-\x1e, \x85, \u2028, \u2029
+            for part in line.splitlines():
+                stripped = part.strip()
+
+                if not stripped:
+                    yield ""
+                    continue
+
+                if pattern is not None:
+                    match = pattern.match(stripped)
+                    if match:
+                        hits[self.rule_names[int(match.lastgroup[4:])]] += 1
+                        continue
+
+                yield stripped
+
+    def normalize_lines(self, raw_lines: Iterable[str]) -> Iterator[str]:
+        """
+        Yield output pieces whose concatenation is the normalized text.
+        """
+        started = False
+        pending_blank = False
+
+        for line in self._clean_lines(raw_lines):
+            if not line:
+                pending_blank = started
+                continue
+
+            if started:
+                yield "\n\n" if pending_blank else "\n"
+            yield line
+
+            started = True
+            pending_blank = False
+
+    def normalize(self, raw_text: str) -> str:
+        return "".join(self.normalize_lines(io.StringIO(raw_text)))
+
+    def normalize_file(self, input_path: Path, output_path: Path) -> Counter:
+        """
+        Stream input_path → output_path. Returns hit counts for this file.
+        """
+        before = Counter(self.hits)
+
+        with input_path.open("r", encoding="utf-8", errors="ignore") as src, \
+                output_path.open("w", encoding="utf-8") as dst:
+            for piece in self.normalize_lines(src):
+                dst.write(piece)
+
+        return self.hits - before
 
-    # Normalize excessive newlines (max 2)
-    text = re.sub(r"\n{3,}", "\n\n", text)
 
-    return text.strip()
+def normalize_text(raw_text: str) -> str:
+    """
+    Apply conservative normalization rules.
+    """
+    return Normalizer().normalize(raw_text)
 
 
 # -----------------------------
 # Pipeline
 # -----------------------------
 
-def normalize_all_reports():
+def normalize_all_reports(use_company_rules: bool = USE_COMPANY_RULES) -> Counter:
     logger.info("Starting text normalization")
 
+    normalizers: Dict[str, Normalizer] = {}
+    totals: Counter = Counter()
+
     for txt_path in INPUT_DIR.rglob("*.txt"):
         relative_path = txt_path.relative_to(INPUT_DIR)
         output_path = OUTPUT_DIR / relative_path
@@ -89,12 +183,17 @@ def normalize_all_reports():
 
         logger.info(f"Normalizing: {txt_path}")
 
-        raw_text = txt_path.read_text(encoding="utf-8", errors="ignore")
-        cleaned_text = normalize_text(raw_text)
+        # Layout: <company>/<fiscal_year>/<file>.txt
+        company = relative_path.parts[0]
+        if company not in normalizers:
+            normalizers[company] = Normalizer(rules_for(company, use_company_rules))
 
-        output_path.write_text(cleaned_text, encoding="utf-8")
+        hits = normalizers[company].normalize_file(txt_path, output_path)
+        logger.info(f"Rule hits for {relative_path}: {dict(hits)}")
+        totals.update(hits)
 
-    logger.info("Text normalization completed")
+    logger.info(f"Text normalization completed, rule hits: {dict(totals)}")
+    return totals
 
 
 # -----------------------------
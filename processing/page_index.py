@@ -0,0 +1,230 @@
+"""
+Page-level index over the cleaned annual report text.
+
+Maps (document_id, page) to the page's byte span in the cleaned text file
+and to the range of chunks covering it:
+
+data/page_index/
+├── documents.json   # one entry per document (text path, first page, rows)
+└── pages.npy        # one fixed-width row per page number (see PAGE_DTYPE)
+
+Rows are dense per document (first_page .. last_page), so a lookup is a
+single array index. Pages with no text have text_length == MISSING.
+Texts are read from memory-mapped cleaned text files; nothing is loaded
+until a page is requested.
+
+Built by `python -m processing.chunk_documents`, or rebuilt from existing
+clean text + chunks with `python -m processing.page_index`.
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional
+import json
+import mmap
+
+import numpy as np
+
+from processing.chunk_store import document_key
+
+CLEAN_TEXT_DIR = Path("data/processed/clean_text/annual_reports")
+METADATA_DIR = Path("data/processed/metadata/annual_reports")
+CHUNKS_DIR = Path("data/chunks/annual_reports")
+PAGE_INDEX_DIR = Path("data/page_index")
+
+DOCUMENTS_FILENAME = "documents.json"
+PAGES_FILENAME = "pages.npy"
+
+PAGE_DTYPE = np.dtype([
+    ("text_offset", np.int64),
+    ("text_length", np.int32),
+    ("chunk_start", np.int32),
+    ("chunk_end", np.int32),
+])
+
+MISSING = -1
+
+# -----------------------------
+# Building
+# -----------------------------
+
+class PageIndexBuilder:
+    def __init__(self, output_dir: Path = PAGE_INDEX_DIR):
+        self.output_dir = output_dir
+        self.documents: List[Dict] = []
+        self.rows: List[tuple] = []
+
+    def add_document(
+        self,
+        metadata: Dict,
+        text_path: Path,
+        text: str,
+        pages: List[Dict],
+        chunks: List[Dict],
+    ) -> None:
+        """
+        `pages` as returned by chunk_documents.split_by_pages (with character
+        spans), `chunks` as returned by chunk_documents.chunk_pages.
+        """
+        numbered = [p for p in pages if p["page_number"] is not None]
+
+        document = {
+            "document_id": metadata["document_id"],
+            "company": metadata["company"],
+            "fiscal_year": metadata["fiscal_year"],
+            "text_path": str(text_path),
+            "first_page": None,
+            "page_count": 0,
+            "row_start": len(self.rows),
+        }
+        self.documents.append(document)
+
+        if not numbered:
+            return
+
+        first_page = min(p["page_number"] for p in numbered)
+        last_page = max(p["page_number"] for p in numbered)
+        rows = [[0, MISSING, MISSING, MISSING] for _ in range(last_page - first_page + 1)]
+
+        # Character → byte offsets, encoding each gap once (pages are in order)
+        char_pos = byte_pos = 0
+        for page in sorted(numbered, key=lambda p: p["start"]):
+            byte_pos += len(text[char_pos:page["start"]].encode("utf-8"))
+            length = len(text[page["start"]:page["end"]].encode("utf-8"))
+
+            row = rows[page["page_number"] - first_page]
+            row[0], row[1] = byte_pos, length
+
+            char_pos = page["end"]
+            byte_pos += length
+
+        # Chunks are emitted in page order, so the chunks covering a page
+        # form one contiguous chunk_index range
+        for chunk in chunks:
+            if chunk["page_start"] is None:
+                continue
+            for page_number in range(chunk["page_start"], chunk["page_end"] + 1):
+                row = rows[page_number - first_page]
+                if row[2] == MISSING:
+                    row[2] = chunk["chunk_index"]
+                row[3] = chunk["chunk_index"]
+
+        document["first_page"] = first_page
+        document["page_count"] = len(rows)
+        self.rows.extend(tuple(r) for r in rows)
+
+    def write(self) -> None:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        np.save(self.output_dir / PAGES_FILENAME, np.array(self.rows, dtype=PAGE_DTYPE))
+
+        (self.output_dir / DOCUMENTS_FILENAME).write_text(
+            json.dumps(self.documents, indent=2), encoding="utf-8"
+        )
+
+
+def build_page_index(
+    text_dir: Path = CLEAN_TEXT_DIR,
+    metadata_dir: Path = METADATA_DIR,
+    chunks_dir: Path = CHUNKS_DIR,
+    output_dir: Path = PAGE_INDEX_DIR,
+) -> int:
+    """
+    Rebuild the index from existing clean text and chunks.jsonl files
+    without re-chunking. Returns the number of documents indexed.
+    """
+    from processing.chunk_documents import load_metadata, load_text, split_by_pages
+
+    builder = PageIndexBuilder(output_dir)
+
+    for chunks_file in sorted(chunks_dir.glob("*/*/chunks.jsonl")):
+        company, year = chunks_file.parts[-3], chunks_file.parts[-2]
+        text_path = text_dir / company / year / f"{company}_{year}_annual_report.txt"
+        meta_files = list((metadata_dir / company / year).glob("*.json"))
+
+        if not text_path.exists() or len(meta_files) != 1:
+            print(f"Skipping {company} {year}")
+            continue
+
+        with open(chunks_file, "r", encoding="utf-8") as f:
+            chunks = [json.loads(line) for line in f if line.strip()]
+
+        text = load_text(text_path)
+        builder.add_document(
+            load_metadata(meta_files[0]), text_path, text, split_by_pages(text), chunks
+        )
+
+    builder.write()
+    return len(builder.documents)
+
+# -----------------------------
+# Reading
+# -----------------------------
+
+class PageStore:
+    def __init__(self, index_dir: Path = PAGE_INDEX_DIR):
+        self.index_dir = index_dir
+
+        documents = json.loads((index_dir / DOCUMENTS_FILENAME).read_text(encoding="utf-8"))
+        self.documents: Dict[str, Dict] = {d["document_id"]: d for d in documents}
+        self.table = np.load(index_dir / PAGES_FILENAME, mmap_mode="r")
+
+        self._texts: Dict[str, mmap.mmap] = {}
+
+    def _text(self, document: Dict) -> mmap.mmap:
+        text = self._texts.get(document["document_id"])
+        if text is None:
+            with open(document["text_path"], "rb") as f:
+                text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            text = self._texts.setdefault(document["document_id"], text)
+        return text
+
+    def _row(self, document: Dict, page: int) -> Optional[int]:
+        if document["first_page"] is None:
+            return None
+        position = page - document["first_page"]
+        if position < 0 or position >= document["page_count"]:
+            return None
+        return document["row_start"] + position
+
+    def page(self, document_id: str, page: int) -> Optional[Dict]:
+        document = self.documents.get(document_id)
+        if document is None:
+            return None
+
+        row = self._row(document, page)
+        if row is None:
+            return None
+
+        entry = self.table[row]
+        length = int(entry["text_length"])
+        if length == MISSING:
+            return None
+
+        offset = int(entry["text_offset"])
+        text = str(memoryview(self._text(document))[offset:offset + length], "utf-8")
+
+        chunk_start, chunk_end = int(entry["chunk_start"]), int(entry["chunk_end"])
+        prefix = document_key(document["company"], document["fiscal_year"])
+        chunk_ids = [] if chunk_start == MISSING else [
+            f"{prefix}_{i}" for i in range(chunk_start, chunk_end + 1)
+        ]
+
+        return {
+            "document_id": document_id,
+            "company": document["company"],
+            "fiscal_year": document["fiscal_year"],
+            "page": page,
+            "text": text,
+            "chunk_ids": chunk_ids,
+            "page_count": document["page_count"],
+            "first_page": document["first_page"],
+        }
+
+
+# -----------------------------
+# Entry Point
+# -----------------------------
+
+if __name__ == "__main__":
+    count = build_page_index()
+    print(f"Indexed pages of {count} documents → {PAGE_INDEX_DIR}")
@@ -1,13 +1,10 @@
-def build_evidence_context(chunks, max_chars=3500):
-    """
-    Takes filtered chunks and builds a grounded evidence context
-    suitable for LLM prompting.
-    """
-    context = []
-    total_chars = 0
+from typing import Dict, List
 
-    for i, c in enumerate(chunks, start=1):
-        block = f"""
+EVIDENCE_MAX_CHARS = 3500
+
+
+def format_source(i: int, c: Dict) -> str:
+    return f"""
 SOURCE [{i}]
 Company: {c['company']}
 Document: {c['report_type'].replace('_', ' ').title()} {c['fiscal_year']}
@@ -18,10 +15,41 @@ Content:
 \"\"\"
 """.strip()
 
+
+def order_for_prompt(chunks: List[Dict], max_chars: int = EVIDENCE_MAX_CHARS) -> List[Dict]:
+    """
+    Reorder ranked chunks so the same evidence always produces the same
+    prompt text, which provider-side prompt caching needs: the chunks that
+    fit the evidence budget (chosen by rank, as build_evidence_context
+    would) sorted by chunk_id, then the ones that do not fit, still in
+    rank order. Callers number sources from this order.
+    """
+    fitting, total_chars = 0, 0
+    for i, c in enumerate(chunks, start=1):
+        block_chars = len(format_source(i, c))
+        if total_chars > 0 and total_chars + block_chars > max_chars:
+            break
+        fitting += 1
+        total_chars += block_chars
+
+    return sorted(chunks[:fitting], key=lambda c: str(c["chunk_id"])) + chunks[fitting:]
+
+
+def build_evidence_context(chunks, max_chars=EVIDENCE_MAX_CHARS):
+    """
+    Takes filtered chunks and builds a grounded evidence context
+    suitable for LLM prompting.
+    """
+    context = []
+    total_chars = 0
+
+    for i, c in enumerate(chunks, start=1):
+        block = format_source(i, c)
+
         if total_chars > 0 and total_chars + len(block) > max_chars:
             break
 
         context.append(block)
         total_chars += len(block)
 
-    return "\n\n".join(context)
\ No newline at end of file
+    return "\n\n".join(context)
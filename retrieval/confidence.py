@@ -1,9 +1,20 @@
 from typing import List, Dict
 
+# Shared by the confidence check and adaptive evidence selection
+MIN_MAX_SCORE = 0.55
+MIN_GAP = 0.05
+
+# Confident results whose top score is within this margin of
+# MIN_MAX_SCORE are borderline (the model cascade skips its cheap tiers)
+BORDERLINE_MARGIN = 0.1
+
+# Adaptive selection keeps chunks scoring at least this fraction of the top
+MIN_RELATIVE_SCORE = 0.85
+
 def retrieval_is_confident(
     results: List[Dict],
-    min_max_score: float = 0.55,
-    min_gap: float = 0.05,
+    min_max_score: float = MIN_MAX_SCORE,
+    min_gap: float = MIN_GAP,
 ) -> bool:
     """
     Decide whether retrieval quality is good enough to answer.
@@ -21,8 +32,46 @@ def retrieval_is_confident(
     if max_score < min_max_score:
         return False
 
-    # 2. Flat relevance (everything equally weak)
-    if (max_score - min_score) < min_gap:
+    # 2. Flat relevance (everything equally weak); a single result has no
+    #    spread to judge
+    if len(scores) > 1 and (max_score - min_score) < min_gap:
         return False
 
-    return True
\ No newline at end of file
+    return True
+
+
+def retrieval_is_borderline(
+    results: List[Dict],
+    min_max_score: float = MIN_MAX_SCORE,
+    margin: float = BORDERLINE_MARGIN,
+) -> bool:
+    """
+    Top score only just clears the absolute relevance threshold.
+    """
+    return bool(results) and max(r["score"] for r in results) < min_max_score + margin
+
+
+def adaptive_cutoff(
+    results: List[Dict],
+    min_relative_score: float = MIN_RELATIVE_SCORE,
+    elbow_gap: float = MIN_GAP,
+    min_k: int = 1,
+) -> int:
+    """
+    How many of the rank-ordered results are worth sending as evidence.
+
+    Stops at the elbow of the score curve: the first drop between
+    neighbours of at least elbow_gap, or the first score below
+    min_relative_score × the top score. A clear single-answer question
+    (one chunk well ahead) keeps one chunk; a flat curve keeps them all.
+    """
+    if len(results) <= min_k:
+        return len(results)
+
+    top_score = results[0]["score"]
+    for i in range(max(1, min_k), len(results)):
+        score = results[i]["score"]
+        if results[i - 1]["score"] - score >= elbow_gap or score < top_score * min_relative_score:
+            return i
+
+    return len(results)
@@ -0,0 +1,113 @@
+"""
+Micro-batching of query embeddings across concurrent requests.
+
+Each embed() call enqueues its query and waits on a Future. One scheduler
+thread takes the first waiting query, keeps collecting until the batch
+holds EMBED_BATCH_MAX_SIZE queries or EMBED_BATCH_MAX_WAIT_MS has passed
+since that first query arrived, then encodes the whole batch with a
+single embed_batch() call and resolves every caller's Future.
+
+A lone request pays at most the wait window; under load the per-call
+model overhead is shared by the batch. Batch sizes and queueing delays are
+recorded as histograms (embed_batch_size, embed_queue_delay_ms) on the
+metrics object passed in, to tune the window against p99 latency.
+"""
+
+from concurrent.futures import Future
+from queue import Empty, Queue
+from typing import List, Tuple
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBED_BATCHING = os.getenv("EMBED_BATCHING", "1") == "1"
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "16"))
+EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "2"))
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+# Sub-millisecond resolution: the wait window itself is a few ms
+DELAY_MS_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+
+class EmbeddingBatcher:
+    """
+    Wraps a query embedder (embed / embed_batch) and batches embed() calls
+    from concurrent threads. `metrics` needs an observe(name, value,
+    buckets=...) method, e.g. api.metrics.metrics.
+    """
+
+    def __init__(
+        self,
+        embedder,
+        max_batch_size: int = EMBED_BATCH_MAX_SIZE,
+        max_wait_ms: float = EMBED_BATCH_MAX_WAIT_MS,
+        metrics=None,
+        defer_start: bool = False,
+    ):
+        self.embedder = embedder
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max_wait_ms / 1000
+        self.metrics = metrics
+
+        # Threads do not survive fork(); with defer_start only forked
+        # workers run one (the preloading parent of api/serve.py)
+        if not defer_start:
+            self._start()
+        os.register_at_fork(after_in_child=self._start)
+
+    def _start(self) -> None:
+        self._queue: "Queue[Tuple[str, Future, float]]" = Queue()
+        threading.Thread(target=self._run, args=(self._queue,), name="embed-batcher", daemon=True).start()
+
+    def embed(self, query: str) -> np.ndarray:
+        future: Future = Future()
+        self._queue.put((query, future, time.perf_counter()))
+        return future.result()
+
+    def embed_batch(self, queries: List[str]) -> np.ndarray:
+        # Already a batch: no reason to queue it
+        return self.embedder.embed_batch(queries)
+
+    def _collect(self, queue: Queue) -> List[Tuple[str, Future, float]]:
+        batch = [queue.get()]
+        deadline = batch[0][2] + self.max_wait_s
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                batch.append(queue.get(timeout=timeout) if timeout > 0 else queue.get_nowait())
+            except Empty:
+                break
+
+        return batch
+
+    def _observe(self, name: str, value: float, buckets: tuple) -> None:
+        if self.metrics is not None:
+            self.metrics.observe(name, value, buckets=buckets)
+
+    def _run(self, queue: Queue) -> None:
+        while True:
+            batch = self._collect(queue)
+            started = time.perf_counter()
+
+            self._observe("embed_batch_size", len(batch), BATCH_SIZE_BUCKETS)
+            for _, _, enqueued in batch:
+                self._observe("embed_queue_delay_ms", (started - enqueued) * 1000, DELAY_MS_BUCKETS)
+
+            try:
+                embeddings = self.embedder.embed_batch([query for query, _, _ in batch])
+            except Exception as e:
+                logger.exception("embed_batch_failed", extra={"batch_size": len(batch)})
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            self._observe("embed_batch_ms", (time.perf_counter() - started) * 1000, DELAY_MS_BUCKETS)
+
+            for (_, future, _), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
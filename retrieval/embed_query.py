@@ -1,8 +1,16 @@
-from sentence_transformers import SentenceTransformer
+from typing import List
+import os
+
 import numpy as np
 
+# "sentence_transformers" (PyTorch) or "onnx" (ONNX Runtime, see onnx_embedder)
+EMBEDDER_BACKEND = os.getenv("EMBEDDER_BACKEND", "sentence_transformers")
+
 class QueryEmbedder:
     def __init__(self, model_name: str):
+        # Imported lazily so the ONNX backend runs without PyTorch installed
+        from sentence_transformers import SentenceTransformer
+
         self.model = SentenceTransformer(model_name)
 
     def embed(self, query: str) -> np.ndarray:
@@ -14,4 +22,27 @@ class QueryEmbedder:
             normalize_embeddings=True
         )
 
-        return embedding
\ No newline at end of file
+        return embedding
+
+    def embed_batch(self, queries: List[str]) -> np.ndarray:
+        return self.model.encode(
+            queries,
+            normalize_embeddings=True
+        )
+
+
+def get_query_embedder(model_name: str, backend: str = EMBEDDER_BACKEND, threads: int = 0):
+    """
+    Build the configured query embedder. Every backend exposes
+    embed(str) and embed_batch(List[str]) returning normalised float32.
+    threads sets ONNX Runtime's intra-op pool (0 = its default); torch's
+    pool is process-wide and set by api.runtime.
+    """
+    if backend == "sentence_transformers":
+        return QueryEmbedder(model_name)
+
+    if backend == "onnx":
+        from retrieval.onnx_embedder import ONNXQueryEmbedder
+        return ONNXQueryEmbedder(intra_op_threads=threads)
+
+    raise ValueError(f"Unknown embedder backend: {backend}")
@@ -0,0 +1,156 @@
+"""
+Benchmark query embedder backends.
+
+Each backend runs in its own subprocess so RSS numbers are not polluted by
+the other backends' libraries. Reports, per backend:
+- model load time
+- single-query latency (mean / p50 / p95) over the evaluation questions
+- batch throughput (queries/s at batch size 32)
+- peak RSS of the process
+- on-disk size of the runtime libraries and model (image size proxy)
+- min / mean cosine vs the sentence-transformers embeddings
+
+Usage:
+    python -m retrieval.embedder_benchmark
+"""
+
+from pathlib import Path
+import importlib.util
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+QUERIES_FILE = Path("tests/test_queries.json")
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+BACKENDS = {
+    "sentence_transformers": {"backend": "sentence_transformers"},
+    "onnx_fp32": {"backend": "onnx", "quantized": False},
+    "onnx_int8": {"backend": "onnx", "quantized": True},
+}
+
+# Runtime packages each backend drags into the image
+RUNTIME_PACKAGES = {
+    "sentence_transformers": ["torch", "sentence_transformers", "transformers", "tokenizers"],
+    "onnx": ["onnxruntime", "tokenizers"],
+}
+
+REFERENCE_PATH = Path("/tmp/embedder_benchmark_reference.npy")
+
+
+def load_queries():
+    with open(QUERIES_FILE) as f:
+        return [t["llm_request"]["query"] for t in json.load(f)]
+
+
+def package_size_mb(name: str) -> float:
+    spec = importlib.util.find_spec(name)
+    if spec is None or not spec.submodule_search_locations:
+        return 0.0
+    root = Path(list(spec.submodule_search_locations)[0])
+    return sum(p.stat().st_size for p in root.rglob("*") if p.is_file()) / 1e6
+
+
+def build_embedder(config):
+    if config["backend"] == "sentence_transformers":
+        from retrieval.embed_query import QueryEmbedder
+        return QueryEmbedder(MODEL_NAME), None
+
+    from retrieval.onnx_embedder import (
+        FP32_MODEL_FILENAME,
+        INT8_MODEL_FILENAME,
+        ONNX_MODEL_DIR,
+        ONNXQueryEmbedder,
+    )
+    model_file = ONNX_MODEL_DIR / (INT8_MODEL_FILENAME if config["quantized"] else FP32_MODEL_FILENAME)
+    return ONNXQueryEmbedder(quantized=config["quantized"]), model_file
+
+
+def run_backend(name: str) -> dict:
+    config = BACKENDS[name]
+    queries = load_queries()
+
+    start = time.perf_counter()
+    embedder, model_file = build_embedder(config)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    embedder.embed(queries[0])  # warm-up
+
+    latencies = []
+    for _ in range(5):
+        for query in queries:
+            start = time.perf_counter()
+            embedder.embed(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    embeddings = np.asarray(embedder.embed_batch(queries), dtype=np.float32)
+
+    batch = (queries * 4)[:32]
+    start = time.perf_counter()
+    rounds = 10
+    for _ in range(rounds):
+        embedder.embed_batch(batch)
+    throughput = rounds * len(batch) / (time.perf_counter() - start)
+
+    if name == "sentence_transformers":
+        np.save(REFERENCE_PATH, embeddings)
+
+    cosine = None
+    if REFERENCE_PATH.exists():
+        reference = np.load(REFERENCE_PATH)
+        similarities = np.sum(reference * embeddings, axis=1)
+        cosine = {"min": float(similarities.min()), "mean": float(similarities.mean())}
+
+    packages = RUNTIME_PACKAGES[config["backend"]]
+    model_mb = model_file.stat().st_size / 1e6 if model_file else None
+
+    return {
+        "backend": name,
+        "load_ms": load_ms,
+        "mean_ms": float(np.mean(latencies)),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "throughput_qps": throughput,
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "libs_mb": sum(package_size_mb(p) for p in packages),
+        "model_mb": model_mb,
+        "cosine": cosine,
+    }
+
+
+def main():
+    rows = []
+    # sentence_transformers first: it writes the cosine reference
+    for name in BACKENDS:
+        proc = subprocess.run(
+            [sys.executable, "-m", "retrieval.embedder_benchmark", name],
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            print(f"{name}: failed\n{proc.stderr.strip().splitlines()[-1]}")
+            continue
+        rows.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    print(
+        f"\n{'backend':<24}{'load ms':>9}{'mean ms':>9}{'p95 ms':>9}"
+        f"{'q/s@32':>9}{'RSS MB':>9}{'libs MB':>9}{'min cos':>9}"
+    )
+    for r in rows:
+        min_cos = f"{r['cosine']['min']:.4f}" if r["cosine"] else "n/a"
+        print(
+            f"{r['backend']:<24}{r['load_ms']:>9.0f}{r['mean_ms']:>9.2f}{r['p95_ms']:>9.2f}"
+            f"{r['throughput_qps']:>9.0f}{r['peak_rss_mb']:>9.0f}{r['libs_mb']:>9.0f}{min_cos:>9}"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        print(json.dumps(run_backend(sys.argv[1])))
+    else:
+        main()
@@ -0,0 +1,88 @@
+"""
+Export all-MiniLM-L6-v2 to ONNX for ONNXQueryEmbedder.
+
+Runs at image build time (needs torch + transformers + onnx); the runtime
+image then only needs onnxruntime and tokenizers.
+
+Writes to ONNX_MODEL_DIR:
+- model.onnx        fp32 graph, outputs last_hidden_state
+- model_int8.onnx   dynamic int8 weight quantization of model.onnx
+- tokenizer.json    fast tokenizer definition
+
+Usage:
+    python -m retrieval.export_onnx [output_dir]
+"""
+
+from pathlib import Path
+import sys
+
+from retrieval.onnx_embedder import (
+    FP32_MODEL_FILENAME,
+    INT8_MODEL_FILENAME,
+    ONNX_MODEL_DIR,
+)
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+OPSET = 14
+
+
+def export_onnx(output_dir: Path = ONNX_MODEL_DIR, model_name: str = MODEL_NAME) -> None:
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    encoder = AutoModel.from_pretrained(model_name)
+    encoder.eval()
+
+    class LastHiddenState(torch.nn.Module):
+        # Fixed keyword call, independent of the encoder's positional signature
+        def __init__(self, encoder):
+            super().__init__()
+            self.encoder = encoder
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.encoder(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=token_type_ids,
+            ).last_hidden_state
+
+    model = LastHiddenState(encoder)
+
+    dummy = tokenizer(["export sample"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = output_dir / FP32_MODEL_FILENAME
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=OPSET,
+            dynamo=False,  # TorchScript exporter: no onnxscript dependency
+        )
+    print(f"Exported fp32 model: {fp32_path}")
+
+    int8_path = output_dir / INT8_MODEL_FILENAME
+    quantize_dynamic(
+        str(fp32_path),
+        str(int8_path),
+        weight_type=QuantType.QInt8,
+    )
+    print(f"Quantized int8 model: {int8_path}")
+
+    # Writes tokenizer.json alongside vocab/config files
+    tokenizer.save_pretrained(str(output_dir))
+    print(f"Saved tokenizer: {output_dir}")
+
+
+if __name__ == "__main__":
+    export_onnx(Path(sys.argv[1]) if len(sys.argv) > 1 else ONNX_MODEL_DIR)
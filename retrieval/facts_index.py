@@ -0,0 +1,439 @@
+"""
+Columnar index of numeric facts extracted from report tables.
+
+One fact per table cell that can be attributed to a period:
+(document, fiscal_year, label, value, unit, page). Rows come from
+ingestion.tables (data/processed/tables); columns are stored as numpy
+arrays with string columns dictionary-encoded:
+
+data/facts/
+├── facts.npz      # document, fiscal_year, label, value, unit, page, text
+└── strings.json   # documents, labels, units, texts
+
+Lookups filter by company / year with array masks, then score only the
+distinct labels left, so a figure question never touches the embedder.
+
+Usage:
+    python -m retrieval.facts_index            # build
+    python -m retrieval.facts_index NatWest "CET1 ratio"
+"""
+
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import json
+import re
+
+import numpy as np
+
+TABLES_DIR = Path("data/processed/tables/annual_reports")
+METADATA_DIR = Path("data/processed/metadata/annual_reports")
+FACTS_DIR = Path("data/facts")
+
+FACTS_FILENAME = "facts.npz"
+STRINGS_FILENAME = "strings.json"
+
+# Minimum label score for a query to be treated as a figure lookup
+FACTS_MIN_SCORE = 0.6
+FUZZY_CUTOFF = 0.8
+
+CELL_PATTERN = re.compile(
+    r"^(?P<open>\()?(?P<sign>[-–])?(?P<currency>[£$€])?(?P<number>(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?)"
+    r"(?P<suffix>%|bps|bn|m|p|x)?\)?(?P<pct>%)?$"
+)
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+ACRONYM_PATTERN = re.compile(r"\(([A-Za-z][A-Za-z0-9&]{1,9})\)")
+YEAR_PATTERN = re.compile(r"^(?:19|20)\d{2}$")
+# Unit at the end of the label instead of in the cells: "Total income £m",
+# "UK leverage ratio (%)"
+LABEL_UNIT_PATTERN = re.compile(r"[\s(]([£$€](?:m|bn)?|%|bps)\)?$")
+
+STOPWORDS = {
+    "a", "an", "and", "annual", "as", "at", "by", "did", "do", "does", "for",
+    "from", "group", "had", "has", "have", "how", "in", "is", "it", "its",
+    "much", "of", "on", "plc", "report", "reported", "s", "the", "their",
+    "to", "was", "were", "what", "which", "year",
+}
+
+
+def parse_cell(cell: str) -> Optional[Tuple[float, str]]:
+    """
+    "(1,234)" → (-1234.0, ""), "13.6%" → (13.6, "%"), "£7,854m" → (7854.0, "£m").
+    None for dashes and anything non-numeric.
+    """
+    match = CELL_PATTERN.match(cell.strip())
+    if match is None:
+        return None
+
+    value = float(match.group("number").replace(",", ""))
+    if match.group("open") or match.group("sign"):
+        value = -value
+
+    unit = (match.group("currency") or "") + (match.group("suffix") or match.group("pct") or "")
+    return value, unit
+
+
+def normalize_label(label: str) -> str:
+    return " ".join(TOKEN_PATTERN.findall(label.lower()))
+
+
+def content_tokens(text: str, ignore=frozenset()) -> frozenset:
+    return frozenset(
+        t for t in TOKEN_PATTERN.findall(text.lower())
+        if t not in STOPWORDS and t not in ignore and not YEAR_PATTERN.match(t)
+    )
+
+def label_variants(label: str) -> List[str]:
+    """
+    The label plus, for each defined acronym, the label with its expansion
+    dropped: "Common equity tier 1 (CET1) ratio" → "CET1 ratio".
+    """
+    variants = [label]
+
+    for match in ACRONYM_PATTERN.finditer(label):
+        acronym = match.group(1).lower().replace("&", "")
+        words = label[:match.start()].split()
+
+        # Walk back over words whose initials spell the acronym
+        position = len(acronym)
+        start = len(words)
+        while position > 0 and start > 0 and words[start - 1][:1].lower() == acronym[position - 1]:
+            position -= 1
+            start -= 1
+
+        if position == 0:
+            variants.append(" ".join(words[:start] + [match.group(1)]) + label[match.end():])
+
+    return variants
+
+# -----------------------------
+# Building
+# -----------------------------
+
+class _Encoder:
+    def __init__(self):
+        self.values: List[str] = []
+        self.ids: Dict[str, int] = {}
+
+    def __call__(self, value: str) -> int:
+        code = self.ids.get(value)
+        if code is None:
+            code = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def row_facts(row: Dict, report_year: int):
+    """
+    Yield (fiscal_year, cell) for the cells of a table row that can be
+    attributed to a period: every cell under a year column header, or the
+    first (current period) cell otherwise.
+    """
+    columns = row.get("columns")
+    if columns:
+        for column, cell in zip(columns, row["cells"]):
+            if YEAR_PATTERN.match(column):
+                yield int(column), cell
+        return
+
+    period = row.get("period")
+    yield (int(period) if period else report_year), row["cells"][0]
+
+
+def build_facts_index(
+    tables_dir: Path = TABLES_DIR,
+    metadata_dir: Path = METADATA_DIR,
+    output_dir: Path = FACTS_DIR,
+) -> int:
+    documents: List[Dict] = []
+    labels, units, texts = _Encoder(), _Encoder(), _Encoder()
+    columns = {name: [] for name in ("document", "fiscal_year", "label", "value", "unit", "page", "text")}
+
+    for tables_file in sorted(tables_dir.glob("*/*/*.jsonl")):
+        company, year = tables_file.parts[-3], tables_file.parts[-2]
+        meta_files = list((metadata_dir / company / year).glob("*.json"))
+        if len(meta_files) != 1:
+            print(f"Skipping {company} {year} (expected 1 metadata file, found {len(meta_files)})")
+            continue
+
+        metadata = json.loads(meta_files[0].read_text(encoding="utf-8"))
+        doc_id = len(documents)
+        documents.append({
+            "document_id": metadata["document_id"],
+            "company": metadata["company"],
+            "fiscal_year": metadata["fiscal_year"],
+            "report_type": metadata["report_type"],
+        })
+
+        with open(tables_file, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+
+                for fiscal_year, cell in row_facts(row, metadata["fiscal_year"]):
+                    parsed = parse_cell(cell)
+                    if parsed is None:
+                        continue
+                    value, cell_unit = parsed
+
+                    columns["document"].append(doc_id)
+                    columns["fiscal_year"].append(fiscal_year)
+                    columns["label"].append(labels(row["label"]))
+                    columns["value"].append(value)
+                    columns["unit"].append(units(cell_unit or row.get("unit") or ""))
+                    columns["page"].append(row["page"])
+                    columns["text"].append(texts(cell))
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    np.savez(
+        output_dir / FACTS_FILENAME,
+        document=np.array(columns["document"], dtype=np.int16),
+        fiscal_year=np.array(columns["fiscal_year"], dtype=np.int16),
+        label=np.array(columns["label"], dtype=np.int32),
+        value=np.array(columns["value"], dtype=np.float64),
+        unit=np.array(columns["unit"], dtype=np.int16),
+        page=np.array(columns["page"], dtype=np.int32),
+        text=np.array(columns["text"], dtype=np.int32),
+    )
+
+    (output_dir / STRINGS_FILENAME).write_text(
+        json.dumps({
+            "documents": documents,
+            "labels": labels.values,
+            "units": units.values,
+            "texts": texts.values,
+        }),
+        encoding="utf-8",
+    )
+
+    return len(columns["value"])
+
+# -----------------------------
+# Reading
+# -----------------------------
+
+class FactsIndex:
+    def __init__(self, index_dir: Path = FACTS_DIR):
+        with np.load(index_dir / FACTS_FILENAME) as data:
+            self.columns = {name: data[name] for name in data.files}
+
+        strings = json.loads((index_dir / STRINGS_FILENAME).read_text(encoding="utf-8"))
+        self.documents: List[Dict] = strings["documents"]
+        self.labels: List[str] = strings["labels"]
+        self.units: List[str] = strings["units"]
+        self.texts: List[str] = strings["texts"]
+
+        self._normalized = [normalize_label(label) for label in self.labels]
+        self._tokens = [
+            [content_tokens(variant) for variant in label_variants(label)]
+            for label in self.labels
+        ]
+        self._by_normalized: Dict[str, List[int]] = {}
+        for label_id, normalized in enumerate(self._normalized):
+            self._by_normalized.setdefault(normalized, []).append(label_id)
+
+    def __len__(self) -> int:
+        return len(self.columns["value"])
+
+    def _mask(self, company: Optional[str], fiscal_year: Optional[int]) -> np.ndarray:
+        mask = np.ones(len(self), dtype=bool)
+
+        if company:
+            doc_ids = [i for i, d in enumerate(self.documents) if d["company"] == company]
+            mask &= np.isin(self.columns["document"], doc_ids)
+
+        if fiscal_year:
+            mask &= self.columns["fiscal_year"] == fiscal_year
+
+        return mask
+
+    def fact(self, row: int, score: float = 1.0) -> Dict:
+        document = self.documents[int(self.columns["document"][row])]
+        return {
+            "fact_id": row,
+            "company": document["company"],
+            "document_id": document["document_id"],
+            "report_type": document["report_type"],
+            "report_year": document["fiscal_year"],
+            "fiscal_year": int(self.columns["fiscal_year"][row]),
+            "label": self.labels[int(self.columns["label"][row])],
+            "value": float(self.columns["value"][row]),
+            "unit": self.units[int(self.columns["unit"][row])],
+            "text": self.texts[int(self.columns["text"][row])],
+            "page": int(self.columns["page"][row]),
+            "score": round(score, 4),
+        }
+
+    def _facts_for_labels(
+        self, label_scores: Dict[int, float], mask: np.ndarray, limit: int
+    ) -> List[Dict]:
+        if not label_scores:
+            return []
+
+        rows = np.flatnonzero(mask & np.isin(self.columns["label"], list(label_scores)))
+
+        # Best label first; then the report's own year over comparatives,
+        # latest report, earliest page
+        def rank(row):
+            document = self.documents[int(self.columns["document"][row])]
+            return (
+                -label_scores[int(self.columns["label"][row])],
+                int(self.columns["fiscal_year"][row]) != document["fiscal_year"],
+                -document["fiscal_year"],
+                int(self.columns["page"][row]),
+            )
+
+        return [
+            self.fact(int(row), label_scores[int(self.columns["label"][row])])
+            for row in sorted(rows, key=rank)[:limit]
+        ]
+
+    def lookup(
+        self,
+        label: str,
+        company: Optional[str] = None,
+        fiscal_year: Optional[int] = None,
+        limit: int = 5,
+        cutoff: float = FUZZY_CUTOFF,
+    ) -> List[Dict]:
+        """
+        Facts whose label matches exactly (after normalisation), else the
+        closest labels by similarity ratio above `cutoff`.
+        """
+        mask = self._mask(company, fiscal_year)
+        candidates = np.unique(self.columns["label"][mask])
+
+        normalized = normalize_label(label)
+        exact = set(self._by_normalized.get(normalized, ())) & set(candidates.tolist())
+        if exact:
+            return self._facts_for_labels({i: 1.0 for i in exact}, mask, limit)
+
+        matcher = SequenceMatcher(b=normalized, autojunk=False)
+        scores = {}
+        for label_id in candidates.tolist():
+            matcher.set_seq1(self._normalized[label_id])
+            if matcher.real_quick_ratio() >= cutoff and matcher.quick_ratio() >= cutoff:
+                ratio = matcher.ratio()
+                if ratio >= cutoff:
+                    scores[label_id] = ratio
+
+        return self._facts_for_labels(scores, mask, limit)
+
+    def match_query(
+        self,
+        query: str,
+        company: Optional[str] = None,
+        fiscal_year: Optional[int] = None,
+        limit: int = 5,
+        min_score: float = FACTS_MIN_SCORE,
+    ) -> List[Dict]:
+        """
+        Treat `query` as a figure lookup: score labels by token overlap
+        (Jaccard over content words, ignoring the company name and years).
+        Returns [] when no label is close enough.
+        """
+        ignore = content_tokens(company) if company else frozenset()
+        query_tokens = content_tokens(query, ignore)
+        if not query_tokens:
+            return []
+
+        mask = self._mask(company, fiscal_year)
+
+        scores = {}
+        for label_id in np.unique(self.columns["label"][mask]).tolist():
+            score = 0.0
+            for label_tokens in self._tokens[label_id]:
+                label_tokens = label_tokens - ignore
+                if label_tokens and not label_tokens.isdisjoint(query_tokens):
+                    score = max(
+                        score,
+                        len(label_tokens & query_tokens) / len(label_tokens | query_tokens),
+                    )
+            if score >= min_score:
+                scores[label_id] = score
+
+        return self._facts_for_labels(scores, mask, limit)
+
+
+def unit_suffix(fact: Dict) -> str:
+    """
+    " (£m)" when the unit is not already part of the cell ("£7,854m",
+    "13.6%"); taken from the label when the cell has none.
+    """
+    parsed = parse_cell(fact["text"])
+    if parsed and parsed[1]:
+        return ""
+
+    unit = fact["unit"]
+    if not unit:
+        match = LABEL_UNIT_PATTERN.search(fact["label"])
+        unit = match.group(1) if match else ""
+
+    return f" ({unit})" if unit else ""
+
+
+def direct_answer_fact(facts: List[Dict]) -> Optional[Dict]:
+    """
+    The top fact, unless an equally good match for the same company and
+    year gives a different value (the label appears in several tables);
+    such questions go to the LLM with all of them as evidence.
+    """
+    top = facts[0]
+    for fact in facts[1:]:
+        if (
+            fact["score"] == top["score"]
+            and fact["company"] == top["company"]
+            and fact["fiscal_year"] == top["fiscal_year"]
+            and (fact["value"], fact["unit"]) != (top["value"], top["unit"])
+        ):
+            return None
+    return top
+
+
+def fact_to_chunk(fact: Dict) -> Dict:
+    """
+    Shape a fact like a retrieved chunk, so it can go through
+    build_evidence_context and the EvidenceBlock response unchanged.
+    """
+    suffix = unit_suffix(fact)
+
+    return {
+        "chunk_id": f"{fact['document_id']}_fact_{fact['fact_id']}",
+        "company": fact["company"],
+        "report_type": fact["report_type"],
+        "fiscal_year": fact["report_year"],
+        "document_id": fact["document_id"],
+        "page_start": fact["page"],
+        "page_end": fact["page"],
+        "text": f"{fact['label']} ({fact['fiscal_year']}): {fact['text']}{suffix}",
+    }
+
+
+def format_fact_answer(fact: Dict) -> str:
+    suffix = unit_suffix(fact)
+
+    return (
+        f"{fact['label']} for {fact['company']} in {fact['fiscal_year']} was "
+        f"{fact['text']}{suffix} "
+        f"(Annual Report {fact['report_year']}, page {fact['page']})."
+    )
+
+
+# -----------------------------
+# Entry Point
+# -----------------------------
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) == 3:
+        index = FactsIndex()
+        for fact in index.lookup(sys.argv[2], company=sys.argv[1]) or index.match_query(
+            sys.argv[2], company=sys.argv[1]
+        ):
+            print(fact)
+    else:
+        count = build_facts_index()
+        print(f"Indexed {count} facts → {FACTS_DIR}")
@@ -0,0 +1,94 @@
+"""
+MiniLM query embeddings through ONNX Runtime.
+
+A drop-in alternative to QueryEmbedder that needs neither PyTorch nor
+sentence-transformers at runtime: only onnxruntime, tokenizers and numpy.
+The model is exported (and optionally int8-quantized) ahead of time with
+retrieval/export_onnx.py.
+
+Pooling and normalisation replicate the sentence-transformers pipeline for
+all-MiniLM-L6-v2: mean over non-padding tokens, then L2 normalisation.
+"""
+
+from pathlib import Path
+from typing import List
+import os
+
+import numpy as np
+
+ONNX_MODEL_DIR = Path(os.getenv("ONNX_MODEL_DIR", "/models/onnx/all-MiniLM-L6-v2"))
+ONNX_QUANTIZED = os.getenv("ONNX_QUANTIZED", "0") == "1"
+
+FP32_MODEL_FILENAME = "model.onnx"
+INT8_MODEL_FILENAME = "model_int8.onnx"
+TOKENIZER_FILENAME = "tokenizer.json"
+
+# sentence-transformers max_seq_length for all-MiniLM-L6-v2
+MAX_SEQ_LENGTH = 256
+
+# Minimum cosine similarity to the sentence-transformers embedding of the
+# same text (enforced by tests/test_onnx_embedder.py)
+FP32_COSINE_TOLERANCE = 0.999
+INT8_COSINE_TOLERANCE = 0.98
+
+
+class ONNXQueryEmbedder:
+    def __init__(
+        self,
+        model_dir: Path = ONNX_MODEL_DIR,
+        quantized: bool = ONNX_QUANTIZED,
+        intra_op_threads: int = 0,
+    ):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_file = model_dir / (INT8_MODEL_FILENAME if quantized else FP32_MODEL_FILENAME)
+        if not model_file.exists():
+            raise FileNotFoundError(
+                f"ONNX model not found: {model_file} (run retrieval/export_onnx.py)"
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = intra_op_threads  # 0 = onnxruntime default
+
+        self.session = ort.InferenceSession(
+            str(model_file),
+            options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.quantized = quantized
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / TOKENIZER_FILENAME))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+
+    def embed(self, query: str) -> np.ndarray:
+        """
+        Embed a single query into the same vector space as document chunks.
+        """
+        return self.embed_batch([query])[0]
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array(
+                [e.type_ids for e in encodings], dtype=np.int64
+            )
+
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real tokens
+        mask = attention_mask[..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+        embeddings = summed / counts
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return (embeddings / np.clip(norms, 1e-12, None)).astype(np.float32)
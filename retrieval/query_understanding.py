@@ -0,0 +1,206 @@
+"""
+Company and fiscal-year detection in free-text queries.
+
+"Barclays 2024 liquidity risk" → {"company": "Barclays", "fiscal_year": 2024}
+
+Company names, generated short names ("NatWest" for "NatWest Group"),
+aliases and tickers are compiled into one Aho-Corasick automaton, so a
+query is scanned once regardless of how many companies are indexed.
+Matches must sit on word boundaries; tickers and short all-caps names
+must match case exactly ("BARC", not "barc"; "BP", not "bp", which is
+usually basis points). Years are only reported when the index holds them.
+"""
+
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import re
+
+ANNUAL_REPORTS_YAML = Path("data_sources/annual_reports.yaml")
+
+# Informal names not derivable from the registry
+ALIASES = {
+    "Lloyds Banking Group": ["Lloyds Bank", "LBG"],
+    "HSBC": ["HSBC Holdings"],
+    "BP": ["British Petroleum"],
+}
+
+# All-caps names up to this length are matched case-sensitively: in
+# lowercase they are ordinary words or units ("bp" is basis points)
+ACRONYM_MAX_CHARS = 3
+
+# Trailing words dropped to form short names
+GENERIC_SUFFIXES = ("group", "banking group", "holdings", "plc")
+
+YEAR_PATTERN = re.compile(r"\b(?:FY\s?)?((?:19|20)\d{2})\b|\bFY\s?(\d{2})\b", re.IGNORECASE)
+
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher over lowercased text. Each pattern carries a
+    value and an optional case-sensitive flag checked on the original text.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[str, object, bool]]] = [[]]
+
+    def add(self, pattern: str, value, case_sensitive: bool = False) -> None:
+        node = 0
+        for ch in pattern.lower():
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((pattern, value, case_sensitive))
+
+    def build(self) -> "AhoCorasick":
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+
+                if node == 0:
+                    # Depth-1 nodes fail back to the root
+                    continue
+
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+        return self
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, object]]:
+        """
+        Yield (start, end, value) for every word-bounded match.
+        """
+        lowered = text.lower()
+        node = 0
+
+        for i, ch in enumerate(lowered):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+
+            for pattern, value, case_sensitive in self._out[node]:
+                start, end = i + 1 - len(pattern), i + 1
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if end < len(text) and text[end].isalnum():
+                    continue
+                if case_sensitive and text[start:end] != pattern:
+                    continue
+                yield start, end, value
+
+
+def is_acronym(name: str) -> bool:
+    return name.isupper() and len(name) <= ACRONYM_MAX_CHARS
+
+
+def short_names(company: str) -> List[str]:
+    names = [company]
+    lowered = company.lower()
+    for suffix in GENERIC_SUFFIXES:
+        if lowered.endswith(" " + suffix):
+            names.append(company[:-len(suffix) - 1])
+    return names
+
+
+class QueryMatcher:
+    def __init__(
+        self,
+        companies: Iterable[str],
+        tickers: Optional[Dict[str, str]] = None,
+        fiscal_years: Iterable[int] = (),
+        aliases: Optional[Dict[str, List[str]]] = None,
+    ):
+        self.companies = sorted(set(companies))
+        self.fiscal_years: Set[int] = set(fiscal_years)
+        aliases = ALIASES if aliases is None else aliases
+
+        self._automaton = AhoCorasick()
+        for company in self.companies:
+            for name in short_names(company) + aliases.get(company, []):
+                self._automaton.add(name, company, case_sensitive=is_acronym(name))
+
+        for ticker, company in (tickers or {}).items():
+            if company in self.companies:
+                self._automaton.add(ticker, company, case_sensitive=True)
+
+        self._automaton.build()
+
+    @classmethod
+    def from_catalog(
+        cls,
+        catalog: Iterable[Tuple[str, int]],
+        registry_path: Path = ANNUAL_REPORTS_YAML,
+    ) -> "QueryMatcher":
+        """
+        Companies and years from the index catalog; tickers from the
+        data_sources registry when it is available.
+        """
+        catalog = list(catalog)
+        return cls(
+            companies=[company for company, _ in catalog],
+            tickers=load_tickers(registry_path),
+            fiscal_years=[year for _, year in catalog],
+        )
+
+    def detect(self, query: str) -> Dict[str, List]:
+        """
+        Companies and indexed fiscal years mentioned in `query`, in order
+        of first mention.
+        """
+        companies: List[str] = []
+        for _, _, company in sorted(self._automaton.finditer(query)):
+            if company not in companies:
+                companies.append(company)
+
+        years: List[int] = []
+        for match in YEAR_PATTERN.finditer(query):
+            year = int(match.group(1)) if match.group(1) else 2000 + int(match.group(2))
+            if year in self.fiscal_years and year not in years:
+                years.append(year)
+
+        return {"companies": companies, "fiscal_years": years}
+
+    def apply(self, query: str, filters: Dict, detected: Optional[Dict] = None) -> Tuple[Dict, Dict]:
+        """
+        Fill company / fiscal_year filters the caller left empty when the
+        query names exactly one of each. Returns (filters, auto-applied).
+        """
+        detected = detected or self.detect(query)
+        applied = {}
+
+        if not filters.get("company") and len(detected["companies"]) == 1:
+            applied["company"] = detected["companies"][0]
+
+        if not filters.get("fiscal_year") and len(detected["fiscal_years"]) == 1:
+            applied["fiscal_year"] = detected["fiscal_years"][0]
+
+        return {**filters, **applied}, applied
+
+
+def load_tickers(registry_path: Path = ANNUAL_REPORTS_YAML) -> Dict[str, str]:
+    if not registry_path.exists():
+        return {}
+
+    import yaml
+
+    with registry_path.open("r", encoding="utf-8") as f:
+        entries = yaml.safe_load(f) or []
+
+    return {
+        e["ticker"]: e["company"]
+        for e in entries
+        if isinstance(e, dict) and e.get("ticker") and e.get("company")
+    }
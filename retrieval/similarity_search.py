@@ -1,26 +1,36 @@
 import json
-import faiss
 import numpy as np
 from pathlib import Path
 
+from vectorstore.quantization import read_index, search_subset
+
 INDEX_PATH = Path("data/embeddings/faiss.index")
 METADATA_PATH = Path("data/embeddings/metadata.json")
 
-def load_faiss():
-    index = faiss.read_index(str(INDEX_PATH))
-    with open(METADATA_PATH, "r") as f:
+def load_faiss(index_path=INDEX_PATH, metadata_path=METADATA_PATH):
+    index = read_index(index_path)
+    with open(metadata_path, "r") as f:
         metadata = json.load(f)
     return index, metadata
 
 
-def search(index, metadata, query_embedding, top_k=5):
+def search(index, metadata, query_embedding, top_k=5, ids=None):
+    """
+    Top-k search; `ids` restricts the search to those vector ids.
+    """
     if query_embedding.ndim == 1:
         query_embedding = query_embedding.reshape(1, -1)
 
-    scores, indices = index.search(query_embedding, top_k)
+    if ids is None:
+        scores, indices = index.search(query_embedding, top_k)
+    else:
+        scores, indices = search_subset(index, query_embedding, top_k, ids)
 
     results = []
     for score, idx in zip(scores[0], indices[0]):
+        # FAISS pads with -1 when the index holds fewer than top_k vectors
+        if idx < 0:
+            continue
         entry = metadata[idx].copy()
         entry["score"] = float(score)
         results.append(entry)
@@ -15,7 +15,8 @@ def load_tests(path: str) -> List[Dict]:
 
 
 def call_api(llm_request: Dict) -> Dict:
-    response = requests.post(API_URL, json=llm_request, timeout=60)
+    # Evaluation runs queue behind interactive traffic (api/services/admission.py)
+    response = requests.post(API_URL, json={**llm_request, "priority": "batch"}, timeout=60)
     response.raise_for_status()
     return response.json()
 
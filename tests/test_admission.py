@@ -0,0 +1,97 @@
+import threading
+import time
+
+import pytest
+
+from api.deadline import DEADLINE_LLM_MIN_MS, PARTIAL_ANSWER, Deadline
+from api.metrics import Metrics
+from api.services.admission import AdmissionController, AdmissionRejected, AdmittedLLM, Lane
+
+LANES = (
+    Lane("interactive", 0, queue_limit=2, max_wait_s=5),
+    Lane("batch", 1, queue_limit=1, max_wait_s=0.2),
+)
+
+
+def _controller(max_concurrency=1):
+    return AdmissionController(max_concurrency=max_concurrency, lanes=LANES, metrics=Metrics())
+
+
+def _wait_for_queued(controller, lane, n):
+    while controller.snapshot()["queued"][lane] < n:
+        time.sleep(0.001)
+
+
+def test_full_queue_rejected_with_retry_after():
+    controller = _controller()
+    admitted_at = controller.acquire("batch")
+
+    waiter = threading.Thread(target=lambda: controller.release(controller.acquire("batch")))
+    waiter.start()
+    _wait_for_queued(controller, "batch", 1)
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire("batch")
+    assert rejected.value.status_code == 429 and rejected.value.retry_after_s >= 1
+
+    controller.release(admitted_at)
+    waiter.join()
+    assert controller.metrics.counter("admission_rejected", "batch:queue_full") == 1
+    assert controller.metrics.counter("admission_admitted", "batch") == 2
+    assert controller.snapshot()["active"] == 0
+
+
+def test_queue_timeout_is_503():
+    controller = _controller()
+    admitted_at = controller.acquire("interactive")
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire("batch")
+    assert rejected.value.status_code == 503 and rejected.value.reason == "queue_timeout"
+    assert controller.snapshot()["queued"]["batch"] == 0
+
+    controller.release(admitted_at)
+
+
+def test_interactive_lane_served_before_batch():
+    controller = _controller()
+    order = []
+    admitted_at = controller.acquire("batch")
+
+    def run(lane):
+        with controller.admit(lane):
+            order.append(lane)
+
+    batch = threading.Thread(target=run, args=("batch",))
+    batch.start()
+    _wait_for_queued(controller, "batch", 1)
+    interactive = threading.Thread(target=run, args=("interactive",))
+    interactive.start()
+    _wait_for_queued(controller, "interactive", 1)
+
+    controller.release(admitted_at)
+    batch.join()
+    interactive.join()
+
+    assert order == ["interactive", "batch"]
+    assert controller.metrics.histogram("admission_wait_ms:interactive")["count"] == 1
+
+
+def test_deadline_in_queue_answers_from_evidence():
+    class LLM:
+        def answer(self, **kwargs):
+            return "generated"
+
+    controller = _controller()
+    llm = AdmittedLLM(LLM(), controller, "interactive")
+    assert llm.answer("q", "SOURCE [1]") == "generated"
+
+    admitted_at = controller.acquire("interactive")
+    # 100 ms of queueing allowed before the time the LLM call needs
+    deadline = Deadline(DEADLINE_LLM_MIN_MS + 100, Metrics())
+
+    assert llm.answer("q", "SOURCE [1]", deadline=deadline) == PARTIAL_ANSWER
+    assert deadline.degradations == ["evidence_only"]
+    assert controller.metrics.counter("admission_rejected", "interactive:deadline") == 1
+
+    controller.release(admitted_at)
@@ -15,4 +15,18 @@ def test_query_api_contract(client):
     # --- Contract checks ---
     assert isinstance(data, dict), "Response must be JSON object"
     assert "answer" in data, "`answer` key must always be present"
-    assert isinstance(data["answer"], str), "`answer` must be a string"
\ No newline at end of file
+    assert isinstance(data["answer"], str), "`answer` must be a string"
+    assert isinstance(data["partial"], bool), "`partial` must be a boolean"
+
+
+def test_job_api_contract(client):
+    response = client.post("/jobs", json={"queries": [{"query": "Barclays liquidity risk", "top_k": 2}]})
+
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    data = client.get(f"/jobs/{job_id}").json()
+    assert data["total"] == 1
+    assert data["items"][0]["query"] == "Barclays liquidity risk"
+
+    assert client.get("/jobs/unknown").status_code == 404
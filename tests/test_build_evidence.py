@@ -0,0 +1,26 @@
+from retrieval.build_evidence import build_evidence_context, order_for_prompt
+
+
+def chunk(chunk_id, text="x" * 100):
+    return {"chunk_id": chunk_id, "company": "Barclays", "fiscal_year": 2024,
+            "report_type": "annual_report", "page_start": 1, "page_end": 1, "text": text}
+
+
+def test_same_evidence_gives_same_prompt_in_any_rank_order():
+    ranked = [chunk("Barclays_2024_c"), chunk("Barclays_2024_a"), chunk("Barclays_2024_b")]
+
+    first = build_evidence_context(order_for_prompt(ranked))
+    second = build_evidence_context(order_for_prompt(list(reversed(ranked))))
+
+    assert first == second
+    assert [c["chunk_id"] for c in order_for_prompt(ranked)] == ["Barclays_2024_a", "Barclays_2024_b", "Barclays_2024_c"]
+
+
+def test_budget_is_still_filled_by_rank():
+    ranked = [chunk("Barclays_2024_z", "x" * 2000), chunk("Barclays_2024_y", "x" * 1000), chunk("Barclays_2024_a", "x" * 1000)]
+
+    ordered = order_for_prompt(ranked)
+
+    # z and y fit the budget; a (lowest rank) does not and stays last
+    assert [c["chunk_id"] for c in ordered] == ["Barclays_2024_y", "Barclays_2024_z", "Barclays_2024_a"]
+    assert "SOURCE [3]" not in build_evidence_context(ordered)
@@ -0,0 +1,51 @@
+import json
+
+from processing.chunk_store import ChunkStore, convert_jsonl
+
+
+def _write_jsonl(chunks_dir):
+    chunks = []
+    for company, pages in [("Barclays", [(1, 1), (1, 2), (2, 2)]), ("Tesco", [(None, None)])]:
+        metadata = {
+            "company": company,
+            "ticker": company[:4].upper(),
+            "fiscal_year": 2024,
+            "report_type": "annual_report",
+            "document_id": f"{company}_2024_annual_report",
+        }
+        path = chunks_dir / company / "2024" / "chunks.jsonl"
+        path.parent.mkdir(parents=True)
+        with open(path, "w") as f:
+            for i, (start, end) in enumerate(pages):
+                chunk = {
+                    "chunk_id": f"{company}_2024_{i}",
+                    "chunk_index": i,
+                    "text": f"{company} £{i}bn — capital ratio",
+                    "page_start": start,
+                    "page_end": end,
+                    **metadata,
+                }
+                f.write(json.dumps(chunk) + "\n")
+                chunks.append(chunk)
+    return chunks
+
+
+def test_store_round_trips_jsonl_exactly(tmp_path):
+    chunks = _write_jsonl(tmp_path / "chunks")
+
+    summary = convert_jsonl(tmp_path / "chunks", tmp_path / "store")
+    store = ChunkStore(tmp_path / "store")
+
+    assert summary == {"documents": 2, "chunks": 4, "text_bytes": summary["text_bytes"]}
+    assert [json.dumps(c) for c in store.iter_chunks()] == [json.dumps(c) for c in chunks]
+
+
+def test_random_access_by_chunk_id(tmp_path):
+    chunks = _write_jsonl(tmp_path / "chunks")
+    convert_jsonl(tmp_path / "chunks", tmp_path / "store")
+    store = ChunkStore(tmp_path / "store")
+
+    assert store.get("Barclays_2024_2") == chunks[2]
+    assert bytes(store.text_bytes(3)).decode("utf-8") == chunks[3]["text"]
+    assert store.get("Barclays_2024_9") is None
+    assert store.get("HSBC_2024_0") is None
@@ -0,0 +1,71 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from api.metrics import Metrics
+from retrieval.embed_batcher import EmbeddingBatcher
+
+
+class FakeEmbedder:
+    def __init__(self, delay_s=0.01):
+        self.delay_s = delay_s
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def embed_batch(self, queries):
+        with self._lock:
+            self.batches.append(list(queries))
+        time.sleep(self.delay_s)
+        if "boom" in queries:
+            raise RuntimeError("encoder failed")
+        return np.array([[float(len(q)), 1.0] for q in queries], dtype=np.float32)
+
+
+def test_concurrent_queries_share_batches():
+    embedder, metrics = FakeEmbedder(), Metrics()
+    batcher = EmbeddingBatcher(embedder, max_batch_size=8, max_wait_ms=20, metrics=metrics)
+    queries = ["q" * i for i in range(1, 17)]
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        embeddings = list(pool.map(batcher.embed, queries))
+
+    # Each caller gets its own row back
+    assert [e[0] for e in embeddings] == [float(len(q)) for q in queries]
+    assert len(embedder.batches) < len(queries)
+    assert max(len(b) for b in embedder.batches) <= 8
+
+    sizes = metrics.histogram("embed_batch_size")
+    assert sizes["count"] == len(embedder.batches) and sizes["sum"] == len(queries)
+    assert metrics.histogram("embed_queue_delay_ms")["count"] == len(queries)
+
+
+def test_lone_query_waits_at_most_the_window():
+    batcher = EmbeddingBatcher(FakeEmbedder(delay_s=0), max_batch_size=8, max_wait_ms=5)
+
+    start = time.perf_counter()
+    batcher.embed("liquidity risk")
+    assert time.perf_counter() - start < 0.1
+
+
+def test_batch_failure_reaches_every_caller():
+    batcher = EmbeddingBatcher(FakeEmbedder(), max_batch_size=2, max_wait_ms=500)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [pool.submit(batcher.embed, q) for q in ("boom", "ok")]
+
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result()
+
+
+def test_histogram_quantiles():
+    metrics = Metrics()
+    for value in (1, 1, 2, 3, 12):
+        metrics.observe("sizes", value, buckets=(1, 2, 4, 8, 16))
+
+    histogram = metrics.histogram("sizes")
+    assert histogram["buckets"] == {"1": 2, "2": 3, "4": 4, "8": 4, "16": 5, "+Inf": 5}
+    assert (histogram["p50"], histogram["p99"]) == (2, 16)
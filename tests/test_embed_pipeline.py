@@ -0,0 +1,61 @@
+import hashlib
+import json
+
+import numpy as np
+
+from embedding.embed_pipeline import run_pipeline
+
+
+def fake_encoder_factory(model_name, threads):
+    def encode(texts):
+        vectors = [
+            np.frombuffer(hashlib.sha256(t.encode()).digest()[:32], dtype=np.uint8)[:8]
+            for t in texts
+        ]
+        return np.array(vectors, dtype=np.float32)
+
+    return encode
+
+
+def _write_chunks(chunks_dir):
+    expected = []
+    for company in ["Barclays", "HSBC"]:
+        path = chunks_dir / company / "2024" / "chunks.jsonl"
+        path.parent.mkdir(parents=True)
+        with open(path, "w") as f:
+            for i in range(25):
+                chunk = {
+                    "chunk_id": f"{company}_2024_{i}",
+                    "company": company,
+                    "text": f"{company} chunk {i} " + "x" * (i * 7 % 40),
+                }
+                f.write(json.dumps(chunk) + "\n")
+                expected.append(chunk)
+    return expected
+
+
+def test_interrupted_run_resumes_and_preserves_row_order(tmp_path):
+    chunks = _write_chunks(tmp_path / "chunks")
+    output_dir = tmp_path / "embeddings"
+
+    options = dict(
+        chunks_dir=tmp_path / "chunks",
+        output_dir=output_dir,
+        workers=2,
+        batch_size=4,
+        checkpoint_every=1,
+        encoder_factory=fake_encoder_factory,
+    )
+
+    assert run_pipeline(max_batches=5, **options) is None
+    assert (output_dir / "embeddings.checkpoint.json").exists()
+
+    embeddings_path = run_pipeline(**options)
+
+    embeddings = np.load(embeddings_path)
+    metadata = json.loads((output_dir / "metadata.json").read_text())
+    expected = fake_encoder_factory(None, 1)([c["text"] for c in chunks])
+
+    assert [m["chunk_id"] for m in metadata] == [c["chunk_id"] for c in chunks]
+    np.testing.assert_array_equal(embeddings, expected)
+    assert not (output_dir / "embeddings.checkpoint.json").exists()
@@ -0,0 +1,168 @@
+import json
+
+from ingestion.tables import parse_text_row, ruled_rows, split_columns, text_rows
+from retrieval.facts_index import (
+    FactsIndex,
+    build_facts_index,
+    direct_answer_fact,
+    fact_to_chunk,
+    format_fact_answer,
+    label_variants,
+    parse_cell,
+)
+
+PAGE_TEXT = """
+Key performance indicators
+2024 2023
+Common equity tier 1 (CET1) ratio (1) 14.2% 14.8%
+Total income £m 25,078 25,378
+Profit before tax grew strongly this year, see page 19.
+2024
+$ million
+Adjusted EBITDA 65,803 20,978 (22)
+"""
+
+
+def test_parse_text_rows():
+    rows = list(text_rows(7, PAGE_TEXT))
+
+    assert [r["label"] for r in rows] == [
+        "Common equity tier 1 (CET1) ratio",
+        "Total income £m",
+        "Adjusted EBITDA",
+    ]
+    assert rows[0]["columns"] == ["2024", "2023"]
+    assert rows[2]["period"] == "2024" and rows[2]["unit"] == "$ million"
+    assert rows[2]["columns"] is None
+
+
+def test_note_and_footnote_cells_are_dropped():
+    assert parse_text_row("Revenue 3 65,583 4,333")["cells"] == ["65,583", "4,333"]
+    assert parse_text_row("CET1 capital (3) 24.9 24.4")["cells"] == ["24.9", "24.4"]
+    assert parse_text_row("In 2024 we returned capital of 2024") is None
+
+
+def test_merged_columns_are_split():
+    line = ("Return on tangible equity (RoTE) (1) 17.5% 17.8% (0.3%) "
+            "Pro forma CET1 ratio (excl. foreseeable items) (6) 14.3% 14.2% 10bps")
+    assert [parse_text_row(s)["label"] for s in split_columns(line)] == [
+        "Return on tangible equity (RoTE)",
+        "Pro forma CET1 ratio (excl. foreseeable items)",
+    ]
+
+    # Amounts in prose are not a column boundary
+    line = "Gross loans decreased by £0.4bn (0.3%) reflecting a £2.0bn (10.3%) decrease"
+    assert split_columns(line) == [line]
+
+    # Words of the left column before a defined term
+    row = parse_text_row("Total earnings per share attributable to ordinary Common Equity Tier 1 (CET1) ratio (5) 13.6% 13.4%")
+    assert row["label"] == "Common Equity Tier 1 (CET1) ratio"
+
+
+def test_ruled_rows_use_header():
+    rows = list(ruled_rows(3, [[["", "2024", "2023"], ["Revenue", "1,200", "1,100"]]]))
+
+    assert rows == [{
+        "page": 3, "source": "ruled", "label": "Revenue",
+        "cells": ["1,200", "1,100"], "columns": ["2024", "2023"],
+        "period": None, "unit": None,
+    }]
+
+
+def test_parse_cell():
+    assert parse_cell("(1,234)") == (-1234.0, "")
+    assert parse_cell("13.6%") == (13.6, "%")
+    assert parse_cell("£7,854m") == (7854.0, "£m")
+    assert parse_cell("—") is None
+    assert parse_cell("2,") is None
+
+
+def test_label_variants_drop_acronym_expansion():
+    assert label_variants("Common equity tier 1 (CET1) ratio") == [
+        "Common equity tier 1 (CET1) ratio",
+        "CET1 ratio",
+    ]
+
+
+def _build(tmp_path):
+    tables_dir = tmp_path / "tables"
+    metadata_dir = tmp_path / "metadata"
+
+    for company in ("Barclays", "Shell"):
+        (tables_dir / company / "2024").mkdir(parents=True)
+        (metadata_dir / company / "2024").mkdir(parents=True)
+        (metadata_dir / company / "2024" / "meta.json").write_text(json.dumps({
+            "company": company,
+            "fiscal_year": 2024,
+            "report_type": "annual_report",
+            "document_id": f"{company}_2024_annual_report",
+        }))
+
+    with open(tables_dir / "Barclays" / "2024" / "x.tables.jsonl", "w") as f:
+        for row in text_rows(7, PAGE_TEXT):
+            f.write(json.dumps(row) + "\n")
+
+    with open(tables_dir / "Shell" / "2024" / "x.tables.jsonl", "w") as f:
+        f.write(json.dumps({
+            "page": 5, "source": "text", "label": "CET1 ratio", "cells": ["99%"],
+            "columns": None, "period": None, "unit": None,
+        }) + "\n")
+
+    count = build_facts_index(tables_dir, metadata_dir, tmp_path / "facts")
+    return FactsIndex(tmp_path / "facts"), count
+
+
+def test_facts_lookup(tmp_path):
+    index, count = _build(tmp_path)
+
+    # CET1 2024 + 2023, total income 2024 + 2023, EBITDA (first cell), Shell CET1
+    assert count == len(index) == 6
+
+    facts = index.lookup("common equity tier 1 (CET1) ratio", company="Barclays")
+    assert [(f["fiscal_year"], f["text"]) for f in facts] == [(2024, "14.2%"), (2023, "14.8%")]
+
+    assert index.lookup("Adjusted EBITDAs", company="Barclays")[0]["value"] == 65803.0
+    assert index.lookup("Adjusted EBITDA", company="Barclays", fiscal_year=2023) == []
+
+
+def test_match_query(tmp_path):
+    index, _ = _build(tmp_path)
+
+    facts = index.match_query("What was Barclays' CET1 ratio?", company="Barclays")
+    assert facts[0]["text"] == "14.2%" and facts[0]["page"] == 7
+    assert all(f["company"] == "Barclays" for f in facts)
+
+    assert index.match_query("What funding risks did Barclays highlight?", company="Barclays") == []
+
+    chunk = fact_to_chunk(facts[0])
+    assert chunk["page_start"] == chunk["page_end"] == 7
+    assert chunk["text"] == "Common equity tier 1 (CET1) ratio (2024): 14.2%"
+
+
+def test_fact_chunks_are_unique_and_keep_units(tmp_path):
+    index, _ = _build(tmp_path)
+
+    facts = index.lookup("Total income £m", company="Barclays")
+    chunks = [fact_to_chunk(f) for f in index.match_query("CET1 ratio or total income", company="Barclays", min_score=0.1)]
+    assert len({c["chunk_id"] for c in chunks}) == len(chunks) > 1
+
+    # Unit from the label when the cell has none
+    assert format_fact_answer(facts[0]).startswith("Total income £m for Barclays in 2024 was 25,078 (£m)")
+
+
+def test_direct_answer_needs_agreeing_matches():
+    fact = {"score": 1.0, "company": "Tesco", "fiscal_year": 2024, "value": 65583.0, "unit": ""}
+
+    assert direct_answer_fact([fact, {**fact, "fiscal_year": 2023, "value": 1.0}]) is fact
+    assert direct_answer_fact([fact, {**fact, "value": 188.0}]) is None
+
+
+def test_committed_facts_answer_figure_questions():
+    index = FactsIndex()
+
+    facts = index.match_query("What was NatWest's CET1 ratio?", company="NatWest Group")
+    assert (facts[0]["text"], facts[0]["fiscal_year"]) == ("13.6%", 2024)
+    assert direct_answer_fact(facts) is facts[0]
+
+    chunk_ids = [fact_to_chunk(index.fact(row))["chunk_id"] for row in range(len(index))]
+    assert len(set(chunk_ids)) == len(chunk_ids)
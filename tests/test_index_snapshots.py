@@ -0,0 +1,79 @@
+from vectorstore import snapshots
+
+
+def _publish(tmp_path, version, built_at):
+    index_path = tmp_path / "faiss.index"
+    metadata_path = tmp_path / "metadata.json"
+    index_path.write_bytes(b"index-" + version.encode())
+    metadata_path.write_text("[]")
+
+    manifest = snapshots.build_manifest(
+        version=version,
+        model_name="sentence-transformers/all-MiniLM-L6-v2",
+        chunking={"target_chars": 1200, "overlap_chars": 150},
+        vectors=0,
+        dimension=384,
+        index_type="IndexFlatIP",
+    )
+    manifest["built_at"] = built_at
+
+    return snapshots.publish_snapshot(
+        index_path, metadata_path, manifest, snapshots_dir=tmp_path / "snapshots"
+    )
+
+
+def test_publish_activates_latest_snapshot(tmp_path):
+    snapshots_dir = tmp_path / "snapshots"
+
+    _publish(tmp_path, "v1", "2024-01-01T00:00:00+00:00")
+    _publish(tmp_path, "v2", "2024-02-01T00:00:00+00:00")
+
+    assert snapshots.current_version(snapshots_dir) == "v2"
+    assert [m["version"] for m in snapshots.list_snapshots(snapshots_dir)] == ["v1", "v2"]
+
+    snapshot_dir = snapshots.resolve_snapshot(snapshots_dir=snapshots_dir)
+    assert (snapshot_dir / snapshots.INDEX_FILENAME).read_bytes() == b"index-v2"
+    assert snapshots.read_manifest(snapshot_dir)["model_name"].endswith("MiniLM-L6-v2")
+
+
+def test_rollback_points_current_at_previous_snapshot(tmp_path):
+    snapshots_dir = tmp_path / "snapshots"
+
+    _publish(tmp_path, "v1", "2024-01-01T00:00:00+00:00")
+    _publish(tmp_path, "v2", "2024-02-01T00:00:00+00:00")
+
+    target = snapshots.previous_version("v2", snapshots_dir)
+    snapshots.set_current_version(target, snapshots_dir)
+
+    assert snapshots.current_version(snapshots_dir) == "v1"
+    assert snapshots.previous_version("v1", snapshots_dir) is None
+
+
+def test_admin_rollback_survives_index_watcher(tmp_path, monkeypatch):
+    import threading
+
+    from api.services import rag_service
+    from api.services.rag_service import IndexState, RAGService
+
+    snapshots_dir = tmp_path / "snapshots"
+    _publish(tmp_path, "v1", "2024-01-01T00:00:00+00:00")
+    _publish(tmp_path, "v2", "2024-02-01T00:00:00+00:00")
+
+    current_version = snapshots.current_version
+    monkeypatch.setattr(snapshots, "current_version", lambda: current_version(snapshots_dir))
+    monkeypatch.setattr(rag_service, "load_index_state", lambda version=None: IndexState(version=version, store=None))
+
+    rag = RAGService.__new__(RAGService)
+    rag._client, rag._state, rag._history = None, IndexState(version="v2", store=None), []
+    rag._reload_lock, rag.reload_status = threading.Lock(), {}
+    rag._watched_version = rag._current_version()
+
+    # Rollback through the admin API; CURRENT still names v2
+    rag.reload("v1")
+    rag._check_current()
+    assert rag.index_version == "v1"
+
+    # A newly published snapshot is still picked up
+    _publish(tmp_path, "v3", "2024-03-01T00:00:00+00:00")
+    rag._check_current()
+    assert rag.index_version == "v3"
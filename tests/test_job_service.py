@@ -0,0 +1,107 @@
+import time
+
+import pytest
+
+from api.services.job_service import (
+    COMPLETED,
+    FAILED,
+    PENDING,
+    RUNNING,
+    JobService,
+    JobStore,
+    RateLimiter,
+    SQLiteJobStore,
+)
+
+
+def _handler(request):
+    if request["query"] == "boom":
+        raise RuntimeError("provider down")
+    return {"answer": request["query"].upper(), "evidence": []}
+
+
+def test_job_items_are_answered_in_order(tmp_path):
+    service = JobService(SQLiteJobStore(tmp_path / "jobs.db"), _handler, workers=0)
+    job_id = service.submit([{"query": "a"}, {"query": "boom"}, {"query": "c"}])
+
+    assert service.get(job_id)["status"] == PENDING
+
+    service.run_next()
+    job = service.get(job_id)
+    assert job["status"] == RUNNING and job["completed"] == 1
+
+    while service.run_next():
+        pass
+
+    job = service.get(job_id)
+    assert job["status"] == COMPLETED
+    assert (job["completed"], job["failed"]) == (2, 1)
+    assert [i["status"] for i in job["items"]] == [COMPLETED, FAILED, COMPLETED]
+    assert job["items"][0]["result"]["answer"] == "A"
+    assert job["items"][1]["error"] == "provider down"
+
+
+def test_jobs_survive_restart(tmp_path):
+    path = tmp_path / "jobs.db"
+    store = SQLiteJobStore(path, lease_s=0.2)
+    job_id = JobService(store, _handler, workers=0).submit([{"query": "a"}, {"query": "b"}])
+
+    # Worker dies after claiming the first item
+    assert store.claim()[:2] == (job_id, 0)
+
+    # Opening the store (a restart, or a sibling worker) leaves it leased
+    service = JobService(SQLiteJobStore(path, lease_s=0.2), _handler, workers=0)
+    assert service.get(job_id)["items"][0]["status"] == RUNNING
+    assert service.store.claim()[:2] == (job_id, 1)
+
+    # Claimed again once the lease runs out
+    time.sleep(0.25)
+    assert service.run_next()
+    assert service.get(job_id)["items"][0]["status"] == COMPLETED
+
+
+def test_running_items_keep_their_lease(tmp_path):
+    path = tmp_path / "jobs.db"
+    store = SQLiteJobStore(path, lease_s=0.2)
+    job_id = JobService(store, _handler, workers=0).submit([{"query": "a"}])
+
+    claimed = store.claim()
+    sibling = SQLiteJobStore(path, lease_s=0.2)
+    for _ in range(3):
+        time.sleep(0.1)
+        store.renew([claimed[:2]])
+        assert sibling.claim() is None
+
+    store.finish(job_id, 0, result={"answer": "A"})
+    assert sibling.get(job_id)["status"] == COMPLETED
+
+
+def test_job_store_is_abstract():
+    with pytest.raises(TypeError):
+        JobStore()
+
+
+def test_workers_process_submitted_jobs(tmp_path):
+    service = JobService(SQLiteJobStore(tmp_path / "jobs.db"), _handler, workers=2)
+    job_id = service.submit([{"query": str(i)} for i in range(5)])
+
+    deadline = time.time() + 5
+    while service.get(job_id)["status"] != COMPLETED and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert service.get(job_id)["completed"] == 5
+
+
+def test_unknown_job(tmp_path):
+    assert SQLiteJobStore(tmp_path / "jobs.db").get("missing") is None
+
+
+def test_rate_limiter_spaces_calls():
+    limiter = RateLimiter(rate_per_s=50, burst=2)
+
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+
+    # 2 from the burst, then 4 at 50/s
+    assert time.monotonic() - start >= 4 / 50 * 0.9
@@ -0,0 +1,76 @@
+import pytest
+
+from llm.backends import (
+    REFUSAL_ANSWER,
+    OpenAIBackend,
+    StubBackend,
+    extract_answer,
+    generate,
+    get_backend,
+)
+
+EVIDENCE = '''SOURCE [1]
+Company: Barclays
+Document: Annual Report 2024
+Pages: 12–12
+Content:
+"""
+The CET1 ratio was 13.6% at 31 December 2024.
+"""'''
+
+
+def test_extract_answer_tags_and_artifacts():
+    assert extract_answer("noise <ANSWER>\nCET1 was 13.6%【1】【Barclays】\n</ANSWER> trailing") == "CET1 was 13.6%"
+    assert extract_answer("Plain answer【46–47】") == "Plain answer"
+    assert extract_answer("<ANSWER> unterminated") == ""
+
+
+def test_stub_backend_is_deterministic_and_cached(tmp_path):
+    first = generate("CET1?", EVIDENCE, "system", StubBackend(), cache_dir=tmp_path)
+    second = generate("CET1?", EVIDENCE, "system", StubBackend(), cache_dir=tmp_path)
+
+    assert first["answer"] == "According to SOURCE [1]: The CET1 ratio was 13.6% at 31 December 2024."
+    assert first["backend"] == "stub" and first["usage"]["input_tokens"] > 0
+    assert not first["cached"] and second["cached"]
+    assert {k: v for k, v in second.items() if k != "cached"} == {k: v for k, v in first.items() if k != "cached"}
+
+
+def test_empty_evidence_refuses_without_backend_call(tmp_path):
+    class Failing(StubBackend):
+        def complete(self, system_prompt, user_content):
+            raise AssertionError("backend called")
+
+    assert generate("CET1?", "  ", "system", Failing(), cache_dir=tmp_path) == {"answer": REFUSAL_ANSWER}
+
+
+def test_get_backend_by_name():
+    assert get_backend("stub") is get_backend("stub")
+    assert get_backend("ollama").name == "local"
+    assert get_backend("local", "llama3.1:8b").model == "llama3.1:8b"
+
+    with pytest.raises(ValueError):
+        get_backend("unknown")
+
+
+def test_usage_reports_cached_input_tokens():
+    class Gateway:
+        def request(self, path, payload, deadline=None):
+            return {
+                "output": [{"type": "message", "content": [{"type": "output_text", "text": "<ANSWER>ok</ANSWER>"}]}],
+                "usage": {
+                    "input_tokens": 1800,
+                    "input_tokens_details": {"cached_tokens": 1536},
+                    "output_tokens": 40,
+                    "total_tokens": 1840,
+                },
+            }
+
+    usage = OpenAIBackend(gateway=Gateway()).complete("system", "user")["usage"]
+
+    assert usage == {
+        "input_tokens": 1800,
+        "cached_input_tokens": 1536,
+        "uncached_input_tokens": 264,
+        "output_tokens": 40,
+        "total_tokens": 1840,
+    }
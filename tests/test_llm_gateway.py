@@ -0,0 +1,144 @@
+import threading
+import time
+
+import httpx
+import pytest
+
+from llm.gateway import CircuitBreaker, DeadlineExceeded, LLMGateway, LLMGatewayError, ProviderUnavailable
+
+
+class FakeProvider:
+    """
+    Local stand-in for the Responses API: fails the first `failures`
+    calls with `status`, and sleeps `delays[i]` seconds on call i.
+    """
+
+    def __init__(self, failures=0, status=503, delays=()):
+        self.failures = failures
+        self.status = status
+        self.delays = list(delays)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            call = self.calls
+            self.calls += 1
+
+        if call < len(self.delays):
+            time.sleep(self.delays[call])
+
+        if call < self.failures:
+            return httpx.Response(self.status, json={"error": "unavailable"})
+
+        return httpx.Response(200, json={
+            "output": [{
+                "type": "message",
+                "content": [{"type": "output_text", "text": f"answer {call}"}],
+            }],
+        })
+
+
+def _gateway(provider, **kwargs):
+    kwargs.setdefault("backoff_base_s", 0)
+    return LLMGateway(api_key="test", transport=httpx.MockTransport(provider), **kwargs)
+
+
+def test_retries_retryable_errors():
+    provider = FakeProvider(failures=2)
+
+    assert _gateway(provider, max_retries=2).respond({}) == "answer 2"
+    assert provider.calls == 3
+
+
+def test_non_retryable_error_is_raised():
+    provider = FakeProvider(failures=1, status=401)
+
+    with pytest.raises(LLMGatewayError):
+        _gateway(provider, max_retries=2).respond({})
+    assert provider.calls == 1
+
+
+def test_circuit_breaker_fails_fast_then_recovers():
+    provider = FakeProvider(failures=3)
+    breaker = CircuitBreaker(failure_threshold=3, reset_after_s=0.05)
+    gateway = _gateway(provider, max_retries=0, breaker=breaker)
+
+    for _ in range(3):
+        with pytest.raises(ProviderUnavailable):
+            gateway.respond({})
+
+    # Open: no call reaches the provider
+    with pytest.raises(ProviderUnavailable):
+        gateway.respond({})
+    assert provider.calls == 3 and breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.06)
+    assert gateway.respond({}) == "answer 3"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_client_error_during_half_open_closes_breaker():
+    statuses = iter([503, 400])
+
+    def provider(request):
+        status = next(statuses, 200)
+        if status != 200:
+            return httpx.Response(status, json={"error": "..."})
+        return httpx.Response(200, json={"output": [{"type": "message", "content": [{"type": "output_text", "text": "ok"}]}]})
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_after_s=0.01)
+    gateway = _gateway(provider, max_retries=0, breaker=breaker)
+
+    with pytest.raises(ProviderUnavailable):
+        gateway.respond({})
+    time.sleep(0.02)
+
+    # The half-open trial gets a 400: the provider is reachable
+    with pytest.raises(LLMGatewayError):
+        gateway.respond({})
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert gateway.respond({}) == "ok"
+
+
+def test_hedged_request_wins_over_slow_primary():
+    provider = FakeProvider(delays=[0.5])
+    gateway = _gateway(provider, hedge=True, hedge_min_delay_s=0.05)
+
+    start = time.monotonic()
+    assert gateway.respond({}) == "answer 1"
+    assert time.monotonic() - start < 0.4
+    assert provider.calls == 2
+
+
+def test_fast_response_is_not_hedged():
+    provider = FakeProvider()
+    gateway = _gateway(provider, hedge=True, hedge_min_delay_s=0.5)
+
+    assert gateway.respond({}) == "answer 0"
+    assert provider.calls == 1
+
+
+def test_degraded_provider_returns_refusal(tmp_path):
+    from llm.backends import REFUSAL_ANSWER, OpenAIBackend, generate
+
+    backend = OpenAIBackend(gateway=_gateway(FakeProvider(failures=10), max_retries=1))
+    result = generate("What was CET1?", "SOURCE [1] ...", "system", backend, cache_dir=tmp_path)
+
+    assert result["degraded"] is True and result["answer"] == REFUSAL_ANSWER
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_deadline_stops_retries():
+    provider = FakeProvider(failures=5)
+    gateway = _gateway(provider, max_retries=3)
+    gateway._backoff_s = lambda attempt, retry_after_s: 1.0
+
+    with pytest.raises(DeadlineExceeded):
+        gateway.request("/responses", {}, deadline=time.monotonic() + 0.5)
+    # One attempt; the 1 s backoff would overrun the 0.5 s deadline
+    assert provider.calls == 1
+
+    with pytest.raises(DeadlineExceeded):
+        gateway.request("/responses", {}, deadline=time.monotonic() - 1)
+    assert provider.calls == 1
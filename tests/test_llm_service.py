@@ -0,0 +1,96 @@
+import pytest
+
+from api.metrics import Metrics
+from api.services import llm_service
+from api.services.llm_service import LLMService, parse_cascade
+from llm.backends import REFUSAL_ANSWER
+
+CASCADE = [("local", "small"), ("openai", "large")]
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """
+    The small model answers unless the question contains "hard", where it
+    emits an unterminated <ANSWER> tag (parsed as a refusal). Returns
+    (models called, metrics).
+    """
+    calls, metrics = [], Metrics()
+
+    def generate_answer(question, evidence_context, model=None, backend=None, deadline=None):
+        calls.append(model)
+        if model == "small" and "hard" in question:
+            answer, raw_output = REFUSAL_ANSWER, "<ANSWER>\nI cannot tell"
+        else:
+            answer, raw_output = f"{model} answer", f"<ANSWER>{model} answer</ANSWER>"
+        return {"answer": answer, "raw_output": raw_output, "backend": backend, "model": model,
+                "usage": {"input_tokens": 10, "output_tokens": 2}, "cached": False}
+
+    monkeypatch.setattr(llm_service, "generate_answer", generate_answer)
+    monkeypatch.setattr(llm_service, "metrics", metrics)
+    return calls, metrics
+
+
+def test_parse_cascade():
+    assert parse_cascade("local:llama3.1:8b, openai") == [("local", "llama3.1:8b"), ("openai", None)]
+    assert parse_cascade("") == []
+
+
+def test_cheap_tier_answer_is_kept(fake_llm):
+    calls, metrics = fake_llm
+
+    assert LLMService(CASCADE).answer("easy?", "SOURCE [1]") == "small answer"
+    assert calls == ["small"]
+    assert metrics.counter("llm_cascade_answered", "local:small") == 1
+    assert metrics.counter("llm_cascade_cache", "local:small:miss") == 1
+    assert metrics.histogram("llm_tier_latency_ms:local:small")["count"] == 1
+
+
+def test_refusal_and_broken_tags_escalate(fake_llm):
+    calls, metrics = fake_llm
+
+    assert LLMService(CASCADE).answer("hard?", "SOURCE [1]") == "large answer"
+    assert calls == ["small", "large"]
+    assert metrics.counter("llm_cascade_escalations", "unparsable") == 1
+    assert metrics.counter("llm_cascade_answered", "openai:large") == 1
+
+
+def test_borderline_retrieval_and_explicit_backend_skip_cheap_tier(fake_llm):
+    calls, metrics = fake_llm
+    service = LLMService(CASCADE)
+
+    assert service.answer("easy?", "SOURCE [1]", borderline=True) == "large answer"
+    assert metrics.counter("llm_cascade_escalations", "borderline_retrieval") == 1
+
+    service.answer("easy?", "SOURCE [1]", backend="stub")
+    assert calls == ["large", None]
+
+
+def test_deadline_pressure_keeps_cheap_tier(fake_llm):
+    from api.deadline import Deadline
+
+    calls, metrics = fake_llm
+    deadline = Deadline(3000, metrics)
+
+    assert LLMService(CASCADE).answer("hard?", "SOURCE [1]", borderline=True, deadline=deadline) == REFUSAL_ANSWER
+    assert calls == ["small"]
+    assert deadline.degradations == ["fast_model", "skip_escalation"]
+
+
+def test_llm_timeout_gives_partial_answer(monkeypatch, tmp_path):
+    from api.deadline import PARTIAL_ANSWER, Deadline
+    from llm import backends
+
+    monkeypatch.setattr(llm_service, "metrics", Metrics())
+    monkeypatch.setattr(backends, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(
+        llm_service, "generate_answer",
+        lambda question, evidence_context, model=None, backend=None, deadline=None: backends.generate(
+            question, evidence_context, "system", backends.StubBackend(latency_s=5),
+            use_cache=False, deadline=deadline,
+        ),
+    )
+    deadline = Deadline(100, Metrics())
+
+    assert LLMService([]).answer("CET1?", "SOURCE [1]", deadline=deadline) == PARTIAL_ANSWER
+    assert deadline.partial and deadline.degradations == ["llm_timeout"]
@@ -0,0 +1,69 @@
+import json
+import logging
+import queue
+
+from api.logging import JsonFormatter, NonBlockingQueueHandler, SamplingFilter, TextFormatter
+from api.metrics import Metrics
+
+
+def make_record(msg="request_completed", level=logging.INFO, **extra):
+    record = logging.LogRecord("finance-dis", level, __file__, 1, msg, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_records_keep_extra_fields():
+    record = make_record(request_id="r1", latency_ms=12.5, filters={"company": "HSBC"})
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["message"] == "request_completed"
+    assert entry["level"] == "INFO"
+    assert entry["ts"].endswith("Z")
+    assert (entry["request_id"], entry["latency_ms"], entry["filters"]) == ("r1", 12.5, {"company": "HSBC"})
+
+    # The text format keeps them too
+    assert "request_id=r1" in TextFormatter().format(make_record(request_id="r1"))
+
+
+def test_queued_record_carries_message_and_traceback():
+    handler = NonBlockingQueueHandler(queue.Queue(), metrics=Metrics())
+    log = logging.getLogger("test_logging.queued")
+    log.propagate = False
+    log.addHandler(handler)
+    try:
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            log.exception("stage %s failed", "llm", extra={"request_id": "r2"})
+    finally:
+        log.removeHandler(handler)
+
+    entry = json.loads(JsonFormatter().format(handler.queue.get_nowait()))
+    assert entry["message"] == "stage llm failed"
+    assert entry["request_id"] == "r2"
+    assert "ValueError: boom" in entry["exception"]
+
+
+def test_full_queue_drops_instead_of_blocking():
+    metrics = Metrics()
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1), metrics=metrics)
+
+    handler.handle(make_record())
+    handler.handle(make_record())
+
+    assert handler.queue.qsize() == 1
+    assert metrics.counter("log_dropped", "INFO") == 1
+
+
+def test_sampling_applies_below_warning_only(monkeypatch):
+    monkeypatch.setattr("api.logging.random.random", lambda: 0.5)
+    sampler = SamplingFilter(debug_rate=0.1, rates={"request_completed": 0.2})
+
+    assert not sampler.filter(make_record("embed_batch", logging.DEBUG))
+    assert not sampler.filter(make_record("request_completed"))
+    assert sampler.filter(make_record("retrieve_completed"))
+    assert sampler.filter(make_record("request_completed", logging.WARNING))
+
+    # Kept when the draw falls under the rate
+    monkeypatch.setattr("api.logging.random.random", lambda: 0.05)
+    assert sampler.filter(make_record("embed_batch", logging.DEBUG))
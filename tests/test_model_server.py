@@ -0,0 +1,119 @@
+import socket
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from api.model_server import ModelServer, ModelServerClient, ModelServerError
+from api.services.rag_service import IndexState, RAGService
+
+CHUNKS = [
+    {"chunk_id": f"Barclays_2024_{i}", "company": "Barclays", "fiscal_year": 2024,
+     "report_type": "annual_report", "page_start": i, "page_end": i, "text": f"chunk {i}"}
+    for i in range(3)
+]
+
+
+class FakeEmbedder:
+    def embed(self, query):
+        return np.array([len(query), 1.0, 0.5], dtype=np.float32)
+
+    def embed_batch(self, queries):
+        return np.stack([self.embed(q) for q in queries])
+
+
+class FakeStore:
+    def catalog(self):
+        return {("Barclays", 2024)}
+
+    def search(self, query_embedding, top_k, filters):
+        assert query_embedding.shape == (3,)
+        return [{**c, "score": 0.9 - i / 10} for i, c in enumerate(CHUNKS)][:top_k]
+
+
+class FakeRAG:
+    def __init__(self):
+        self.embedder = FakeEmbedder()
+        self.index_state = IndexState(version="v1", store=FakeStore())
+        self.index_version = "v1"
+        self.index_manifest = {"model": "fake"}
+
+    def catalog(self):
+        return self.index_state.store.catalog()
+
+    def reload(self, version):
+        if version == "missing":
+            raise FileNotFoundError("no snapshot missing")
+        self.index_version = version or "v1"
+        return self.index_version
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    path = str(tmp_path / "model.sock")
+    server = ModelServer(path, FakeRAG())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield path
+    server.shutdown()
+    server.server_close()
+
+
+def test_embed_search_round_trip(socket_path):
+    client = ModelServerClient(socket_path)
+
+    assert client.embed("risk").tolist() == [4.0, 1.0, 0.5]
+    assert client.embed_batch(["a", "abc"])[:, 0].tolist() == [1.0, 3.0]
+
+    results = client.search(client.embed("risk"), top_k=2, filters={"company": "Barclays"})
+    assert [r["chunk_id"] for r in results] == ["Barclays_2024_0", "Barclays_2024_1"]
+    assert results[1]["score"] == pytest.approx(0.8)
+
+    info = client.info()
+    assert info["version"] == "v1" and info["catalog"] == [["Barclays", 2024]]
+
+
+def test_server_errors_are_reported(socket_path):
+    client = ModelServerClient(socket_path)
+
+    with pytest.raises(ModelServerError, match="no snapshot"):
+        client.reload("missing")
+
+    # The connection stays usable after an error
+    assert client.reload("v2") == "v2"
+
+
+def test_rag_service_retrieves_through_model_server(socket_path):
+    rag = RAGService(model_server_socket=socket_path)
+
+    assert rag.index_version == "v1" and rag.catalog() == {("Barclays", 2024)}
+
+    result = rag.retrieve("liquidity risk", {"company": "Barclays"}, top_k=2)
+    assert [c["chunk_id"] for c in result["raw_chunks"]] == ["Barclays_2024_0", "Barclays_2024_1"]
+    assert "SOURCE [1]" in result["evidence_context"]
+
+
+def test_unresponsive_server_times_out(tmp_path):
+    # Connections are queued by the kernel but never answered
+    path = str(tmp_path / "hung.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen()
+
+    client = ModelServerClient(path, timeout_s=0.3)
+    try:
+        start = time.monotonic()
+        with pytest.raises(ModelServerError, match="did not answer"):
+            client.embed("risk")
+        assert time.monotonic() - start < 1
+
+        # The request deadline shortens the timeout
+        start = time.monotonic()
+        with pytest.raises(ModelServerError):
+            client.search(np.zeros(3, dtype=np.float32), deadline=time.monotonic() + 0.05)
+        assert time.monotonic() - start < 0.2
+
+        with pytest.raises(ModelServerError, match="deadline passed"):
+            client.embed("risk", deadline=time.monotonic() - 1)
+    finally:
+        listener.close()
@@ -0,0 +1,63 @@
+import pytest
+
+from processing.normalize_text import (
+    INPUT_DIR,
+    OUTPUT_DIR,
+    Normalizer,
+    normalize_text,
+    rules_for,
+)
+
+RAW = (
+    "\n\n"
+    "--- PAGE 1 ---\n"
+    "  Barclays Annual Report 2024  \n"
+    "Strategic report\n"
+    "\n\n\n\n"
+    "Net interest income rose.\t\n"
+    "© Barclays PLC 2024\n"
+    "text before --- page 2 --- text after\n"
+    "\n"
+)
+
+
+def test_normalize_text_rules():
+    assert normalize_text(RAW) == (
+        "[PAGE 1]\n"
+        "\n"
+        "Strategic report\n"
+        "\n"
+        "Net interest income rose.\n"
+        "text before\n"
+        "[PAGE 2]\n"
+        "text after"
+    )
+
+
+def test_hit_counts_per_rule():
+    normalizer = Normalizer()
+    normalizer.normalize(RAW)
+
+    assert normalizer.hits == {"page_marker": 2, "annual_report_header": 1, "copyright_footer": 1}
+
+
+def test_company_rules_are_opt_in():
+    assert rules_for("HSBC") == rules_for("Barclays")
+
+    normalizer = Normalizer(rules_for("HSBC", use_company_rules=True))
+    assert normalizer.normalize("Strategic\nreport\nRisk appetite") == "Risk appetite"
+    assert normalizer.hits["side_tab_fragment"] == 2
+
+
+@pytest.mark.parametrize(
+    "raw_path", sorted(INPUT_DIR.rglob("*.txt")), ids=lambda p: p.parts[-3]
+)
+def test_streaming_matches_existing_clean_text(raw_path, tmp_path):
+    expected = OUTPUT_DIR / raw_path.relative_to(INPUT_DIR)
+    if not expected.exists():
+        pytest.skip(f"{expected} not generated")
+
+    output_path = tmp_path / "clean.txt"
+    Normalizer().normalize_file(raw_path, output_path)
+
+    assert output_path.read_bytes() == expected.read_bytes()
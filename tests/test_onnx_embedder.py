@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from retrieval.onnx_embedder import (
+    FP32_COSINE_TOLERANCE,
+    FP32_MODEL_FILENAME,
+    INT8_COSINE_TOLERANCE,
+    ONNX_MODEL_DIR,
+    ONNXQueryEmbedder,
+)
+
+QUERIES = [
+    "What funding and liquidity risks did Barclays highlight in 2024?",
+    "What was NatWest's CET1 ratio?",
+    "climate transition risk",
+]
+
+pytestmark = pytest.mark.skipif(
+    not (ONNX_MODEL_DIR / FP32_MODEL_FILENAME).exists(),
+    reason="ONNX model not exported (python -m retrieval.export_onnx)",
+)
+
+
+@pytest.fixture(scope="module")
+def reference():
+    from retrieval.embed_query import QueryEmbedder
+
+    return QueryEmbedder("all-MiniLM-L6-v2").embed_batch(QUERIES)
+
+
+@pytest.mark.parametrize(
+    "quantized, tolerance",
+    [(False, FP32_COSINE_TOLERANCE), (True, INT8_COSINE_TOLERANCE)],
+)
+def test_onnx_embeddings_match_sentence_transformers(reference, quantized, tolerance):
+    embedder = ONNXQueryEmbedder(quantized=quantized)
+
+    embeddings = embedder.embed_batch(QUERIES)
+    cosine = np.sum(embeddings * reference, axis=1)
+
+    assert embeddings.shape == reference.shape
+    assert cosine.min() >= tolerance, cosine
+
+    # Single-query path must agree with the batched one
+    np.testing.assert_allclose(embedder.embed(QUERIES[1]), embeddings[1], atol=1e-5)
@@ -0,0 +1,71 @@
+from processing.chunk_documents import chunk_pages, split_by_pages
+from processing.page_index import PageIndexBuilder, PageStore
+
+TEXT = (
+    "[PAGE 1]\n"
+    "Chairman’s statement — £1.2bn returned to shareholders.\n"
+    "[PAGE 2]\n"
+    "\n"
+    "[PAGE 3]\n"
+    "Risk review\n" + "Liquidity coverage ratio 165%. " * 60 + "\n"
+    "[PAGE 4]\n"
+    "Glossary"
+)
+
+METADATA = {
+    "company": "Barclays",
+    "fiscal_year": 2024,
+    "report_type": "annual_report",
+    "document_id": "Barclays_2024_annual_report",
+}
+
+
+def _build(tmp_path):
+    text_path = tmp_path / "clean.txt"
+    text_path.write_text(TEXT, encoding="utf-8")
+
+    pages = split_by_pages(TEXT)
+    chunks = chunk_pages(pages, METADATA)
+
+    builder = PageIndexBuilder(tmp_path / "page_index")
+    builder.add_document(METADATA, text_path, TEXT, pages, chunks)
+    builder.write()
+
+    return PageStore(tmp_path / "page_index"), pages, chunks
+
+
+def test_pages_round_trip(tmp_path):
+    store, pages, _ = _build(tmp_path)
+
+    for page in pages:
+        result = store.page("Barclays_2024_annual_report", page["page_number"])
+        assert result["text"] == page["text"]
+
+    assert store.page("Barclays_2024_annual_report", 1)["page_count"] == 4
+
+
+def test_chunk_ids_cover_page(tmp_path):
+    store, _, chunks = _build(tmp_path)
+
+    for page_number in (1, 3, 4):
+        expected = [
+            c["chunk_id"] for c in chunks
+            if c["page_start"] <= page_number <= c["page_end"]
+        ]
+        assert store.page("Barclays_2024_annual_report", page_number)["chunk_ids"] == expected
+
+
+def test_missing_pages(tmp_path):
+    store, _, _ = _build(tmp_path)
+
+    # Page 2 has no text
+    assert store.page("Barclays_2024_annual_report", 2) is None
+    assert store.page("Barclays_2024_annual_report", 0) is None
+    assert store.page("Barclays_2024_annual_report", 5) is None
+    assert store.page("HSBC_2024_annual_report", 1) is None
+
+
+def test_page_endpoint_not_found(client):
+    response = client.get("/documents/Unknown_2024_annual_report/pages/1")
+
+    assert response.status_code in (404, 503)
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from vectorstore.quantization import (
+    BinaryRescoreIndex,
+    build_index,
+    read_index,
+    resident_bytes,
+    storage_name,
+    write_index,
+)
+
+
+def _embeddings(n=500, dim=64):
+    rng = np.random.default_rng(1)
+    embeddings = rng.standard_normal((n, dim)).astype("float32")
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+
+def _recall(index, embeddings, queries, k=10):
+    exact = np.argsort(-(queries @ embeddings.T), axis=1)[:, :k]
+    _, found = index.search(queries, k)
+    return np.mean([len(set(e) & set(f)) / k for e, f in zip(exact, found)])
+
+
+@pytest.mark.parametrize("storage, max_fraction", [("float16", 0.55), ("int8", 0.3)])
+def test_scalar_quantized_storage_keeps_recall_and_shrinks_memory(tmp_path, storage, max_fraction):
+    embeddings = _embeddings()
+    queries = embeddings[:20]
+
+    flat = build_index(embeddings, "flat")
+    write_index(build_index(embeddings, storage), tmp_path / "faiss.index")
+    index = read_index(tmp_path / "faiss.index")
+
+    assert storage_name(index) == storage
+    assert _recall(index, embeddings, queries) >= 0.9
+    assert resident_bytes(index) < resident_bytes(flat) * max_fraction
+
+
+def test_binary_rescoring_returns_float16_scores(tmp_path):
+    embeddings = _embeddings()
+    index = build_index(embeddings, "binary")
+    assert isinstance(index, BinaryRescoreIndex)
+
+    write_index(index, tmp_path / "faiss.index")
+    loaded = read_index(tmp_path / "faiss.index")
+
+    scores, ids = loaded.search(embeddings[:5], 5)
+
+    assert list(ids[:, 0]) == [0, 1, 2, 3, 4]
+    for row, (s, i) in enumerate(zip(scores, ids)):
+        exact = embeddings[i] @ embeddings[row]
+        np.testing.assert_allclose(s, exact, atol=1e-3)
+        assert list(s) == sorted(s, reverse=True)
@@ -0,0 +1,315 @@
+import pytest
+
+from api.metrics import Metrics
+from api.services.query_router import REFUSAL_ANSWER, QueryRouter
+
+CHUNK = {"company": "Barclays", "fiscal_year": 2024, "text": "..."}
+
+
+class FakeRAG:
+    def __init__(self, scores=(0.8, 0.6), result=None):
+        self.calls = 0
+        self.scores = scores
+        self.result = result
+
+    def catalog(self):
+        return {("Barclays", 2024), ("HSBC", 2024)}
+
+    def retrieve(self, query, filters, top_k, deadline=None):
+        self.calls += 1
+        self.filters = filters
+        if self.result is not None:
+            return self.result
+        chunks = [{**CHUNK, "score": s} for s in self.scores]
+        return {"raw_chunks": chunks, "evidence_context": "SOURCE [1] ..." if chunks else ""}
+
+    def retrieve_many(self, query, targets, top_k, deadline=None):
+        self.calls += 1
+        self.targets = targets
+        chunks = [{**t, "text": "...", "score": s} for t in targets for s in self.scores]
+        return {"raw_chunks": chunks[:top_k], "evidence_context": "SOURCE [1] ..."}
+
+
+class FakeLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def answer(self, question, evidence_context, backend=None, borderline=False, deadline=None):
+        self.borderline = borderline
+        self.evidence_context = evidence_context
+        self.calls += 1
+        self.question = question
+        return "generated"
+
+
+def _router(**rag_kwargs):
+    rag, llm, metrics = FakeRAG(**rag_kwargs), FakeLLM(), Metrics()
+    return QueryRouter(rag, llm, metrics), rag, llm, metrics
+
+
+def test_catalog_miss_refuses_without_retrieval():
+    router, rag, llm, metrics = _router()
+
+    result = router.run("AI governance failures?", {"company": "Lloyds Banking Group", "fiscal_year": 2015}, 1)
+    router.run("risks?", {"company": "Barclays", "fiscal_year": 2015}, 1)
+
+    assert result == {"answer": REFUSAL_ANSWER, "raw_chunks": [], "route": "catalog_miss",
+                      "partial": False, "degradations": []}
+    assert rag.calls == 0 and llm.calls == 0
+    assert metrics.counter("router_rule_hits", "catalog_miss") == 2
+    assert metrics.counter("router_saved_calls", "embedding") == 2
+    assert metrics.counter("router_saved_calls", "llm") == 2
+
+
+def test_known_filters_run_full_pipeline():
+    router, rag, llm, metrics = _router()
+
+    result = router.run("risks?", {"company": "Barclays", "fiscal_year": 2024, "report_type": "annual_report"}, 2)
+    router.run("risks?", {"fiscal_year": 2024}, 2)
+    router.run("risks?", {}, 2)
+
+    assert result["answer"] == "generated" and result["route"] == "full"
+    assert rag.calls == 3 and llm.calls == 3
+    assert metrics.snapshot()["counters"] == {}
+
+
+def test_weak_retrieval_skips_llm():
+    router, _, llm, metrics = _router(scores=(0.3, 0.2))
+
+    result = router.run("risks?", {"company": "Barclays"}, 2)
+
+    assert result["answer"] == REFUSAL_ANSWER
+    assert len(result["raw_chunks"]) == 2
+    assert llm.calls == 0
+    assert metrics.counter("router_rule_hits", "weak_retrieval") == 1
+    assert metrics.counter("router_saved_calls", "llm") == 1
+
+
+def test_single_confident_result_is_answered():
+    router, _, llm, _ = _router(scores=(0.7,))
+
+    assert router.run("risks?", {"company": "Barclays"}, 1)["answer"] == "generated"
+    assert llm.calls == 1
+
+
+def test_direct_facts_answer():
+    facts_result = {
+        "raw_chunks": [CHUNK],
+        "evidence_context": "SOURCE [1] ...",
+        "facts": [{}],
+        "answer": "CET1 ratio for Barclays in 2024 was 14.2%",
+    }
+    router, _, llm, metrics = _router(result=facts_result)
+
+    result = router.run("CET1 ratio?", {"company": "Barclays"}, 5)
+
+    assert result["route"] == "facts_direct" and result["answer"] == facts_result["answer"]
+    assert llm.calls == 0
+    assert metrics.counter("router_saved_calls", "search") == 1
+
+
+def test_filters_detected_in_query_are_applied():
+    router, rag, _, metrics = _router()
+
+    router.run("HSBC 2024 liquidity risk", {"report_type": "annual_report"}, 2)
+
+    assert rag.filters == {"report_type": "annual_report", "company": "HSBC", "fiscal_year": 2024}
+    assert metrics.counter("query_auto_filters", "company") == 1
+
+
+def test_detected_unknown_company_year_is_refused():
+    router, rag, _, _ = _router()
+
+    # Detected company + explicit year: Barclays has no 2023 report indexed
+    result = router.run("Barclays risks", {"fiscal_year": 2023}, 2)
+
+    assert result["route"] == "catalog_miss" and rag.calls == 0
+
+
+def test_companies_named_in_query_are_compared():
+    router, rag, llm, metrics = _router()
+
+    result = router.run("Compare Barclays and HSBC liquidity risk in 2024", {}, 4)
+
+    assert rag.targets == [
+        {"company": "Barclays", "fiscal_year": 2024},
+        {"company": "HSBC", "fiscal_year": 2024},
+    ]
+    assert result["route"] == "full" and llm.calls == 1
+    assert "Barclays 2024, HSBC 2024" in llm.question
+    assert metrics.counter("query_auto_filters", "companies") == 1
+
+
+def test_unknown_comparison_targets_are_dropped():
+    router, rag, _, metrics = _router()
+
+    router.run("risks?", {"fiscal_year": 2024}, 4, companies=["Barclays", "Shell"])
+    assert rag.filters == {"company": "Barclays", "fiscal_year": 2024}
+    assert metrics.counter("router_dropped_targets") == 1
+
+    result = router.run("risks?", {}, 4, companies=["Shell", "BP"])
+    assert result["route"] == "catalog_miss"
+
+
+def test_too_many_targets_rejected():
+    router, _, _, _ = _router()
+
+    with pytest.raises(ValueError):
+        router.run("risks?", {}, 4, companies=["Barclays", "HSBC"], fiscal_years=[2020, 2021, 2022, 2023])
+
+
+def test_retrieve_many_shares_budget_round_robin():
+    from concurrent.futures import ThreadPoolExecutor
+    from api.services.rag_service import IndexState, RAGService
+
+    class Store:
+        def search(self, query_embedding, top_k, filters):
+            count = {"Barclays": 5, "HSBC": 1}[filters["company"]]
+            return [
+                {"company": filters["company"], "chunk_id": f"{filters['company']}_{i}",
+                 "report_type": "annual_report", "fiscal_year": 2024, "page_start": 1,
+                 "page_end": 1, "text": "...", "score": 0.9 - i / 10}
+                for i in range(count)
+            ]
+
+    class Embedder:
+        def embed(self, query):
+            return [0.0]
+
+    rag = RAGService.__new__(RAGService)
+    rag.embedder, rag._state = Embedder(), IndexState(version="v1", store=Store())
+    rag._executor = ThreadPoolExecutor(max_workers=2)
+
+    result = rag.retrieve_many("risks?", [{"company": "Barclays"}, {"company": "HSBC"}], top_k=4)
+
+    # Chosen round-robin, then presented in chunk_id order for the prompt
+    assert [c["chunk_id"] for c in result["raw_chunks"]] == ["Barclays_0", "Barclays_1", "Barclays_2", "HSBC_0"]
+
+
+def test_adaptive_cutoff_follows_score_curve():
+    from retrieval.confidence import adaptive_cutoff
+
+    def scored(*scores):
+        return [{"score": s} for s in scores]
+
+    # One chunk well ahead of the rest
+    assert adaptive_cutoff(scored(0.82, 0.61, 0.60, 0.58)) == 1
+    # Flat curve: everything is equally relevant
+    assert adaptive_cutoff(scored(0.70, 0.68, 0.66, 0.65)) == 4
+    # Elbow after the second chunk
+    assert adaptive_cutoff(scored(0.74, 0.72, 0.62, 0.61)) == 2
+    # Slow decay still stops at the relative floor
+    assert adaptive_cutoff(scored(0.80, 0.76, 0.72, 0.68, 0.64), min_relative_score=0.85) == 4
+    assert adaptive_cutoff(scored(0.80, 0.50), min_k=2) == 2
+    assert adaptive_cutoff([]) == 0
+
+
+def test_adaptive_selection_trims_evidence_and_keeps_candidates(monkeypatch):
+    from api.services import rag_service
+    from api.services.rag_service import IndexState, RAGService
+
+    monkeypatch.setattr(rag_service, "EVIDENCE_SELECTION", "adaptive")
+    metrics = Metrics()
+    monkeypatch.setattr(rag_service, "metrics", metrics)
+
+    class Store:
+        def search(self, query_embedding, top_k, filters):
+            return [
+                {"company": "Barclays", "chunk_id": f"Barclays_{i}", "report_type": "annual_report",
+                 "fiscal_year": 2024, "page_start": 1, "page_end": 1, "text": "x" * 400, "score": s}
+                for i, s in enumerate((0.82, 0.61, 0.60, 0.58))
+            ]
+
+    class Embedder:
+        def embed(self, query):
+            return [0.0]
+
+    rag = RAGService.__new__(RAGService)
+    rag.embedder, rag._state, rag.facts = Embedder(), IndexState(version="v1", store=Store()), None
+
+    result = rag.retrieve("CET1 ratio?", {"company": "Barclays"}, top_k=4)
+
+    assert [c["chunk_id"] for c in result["raw_chunks"]] == ["Barclays_0"]
+    assert len(result["candidates"]) == 4
+    assert "SOURCE [2]" not in result["evidence_context"]
+    assert metrics.counter("evidence_tokens_saved") > 300
+
+
+
+def test_router_judges_confidence_on_all_candidates():
+    # The kept chunks alone look flat; the full curve has spread
+    kept = [{**CHUNK, "score": s} for s in (0.72, 0.70)]
+    result = {"raw_chunks": kept, "candidates": kept + [{**CHUNK, "score": 0.5}], "evidence_context": "SOURCE [1] ..."}
+    router, _, llm, _ = _router(result=result)
+
+    assert router.run("risks?", {"company": "Barclays"}, 3)["answer"] == "generated"
+    assert llm.calls == 1
+
+
+def test_borderline_retrieval_is_flagged_to_llm():
+    router, _, llm, _ = _router(scores=(0.6, 0.4))
+    router.run("risks?", {"company": "Barclays"}, 2)
+    assert llm.borderline
+
+    router, _, llm, _ = _router(scores=(0.8, 0.6))
+    router.run("risks?", {"company": "Barclays"}, 2)
+    assert not llm.borderline
+
+
+def test_deadline_degrades_before_llm():
+    from api.deadline import PARTIAL_ANSWER, Deadline
+
+    chunks = [{**CHUNK, "chunk_id": f"Barclays_{i}", "report_type": "annual_report", "page_start": 1,
+               "page_end": 1, "score": s} for i, s in enumerate((0.7, 0.9, 0.8))]
+    retrieved = {"raw_chunks": chunks, "evidence_context": "SOURCE [1] ..."}
+
+    # Almost out of time: evidence only, no LLM call
+    router, _, llm, _ = _router(result=retrieved)
+    result = router.run("risks?", {"company": "Barclays"}, 3, deadline=Deadline(1000, Metrics()))
+    assert result["answer"] == PARTIAL_ANSWER and result["partial"]
+    assert result["degradations"] == ["evidence_only"] and len(result["raw_chunks"]) == 3
+    assert llm.calls == 0
+
+    # Short on time: the two best chunks only
+    router, _, llm, _ = _router(result=retrieved)
+    deadline = Deadline(4000, Metrics())
+    result = router.run("risks?", {"company": "Barclays"}, 3, deadline=deadline)
+    assert result["answer"] == "generated" and not result["partial"]
+    assert [c["chunk_id"] for c in result["raw_chunks"]] == ["Barclays_1", "Barclays_2"]
+    assert "SOURCE [3]" not in llm.evidence_context
+    assert deadline.metrics.counter("deadline_degraded", "shrink_evidence") == 1
+
+    # Plenty of time: untouched
+    router, _, llm, _ = _router(result=retrieved)
+    result = router.run("risks?", {"company": "Barclays"}, 3, deadline=Deadline(60000, Metrics()))
+    assert result["degradations"] == [] and len(result["raw_chunks"]) == 3
+
+
+def test_injected_facts_are_answered_by_llm():
+    # Fact chunks (retrieval/facts_index.fact_to_chunk) carry no score
+    facts_result = {
+        "raw_chunks": [{**CHUNK, "chunk_id": "Barclays_2024_annual_report_fact_12"}],
+        "evidence_context": "SOURCE [1] ...",
+        "facts": [{}],
+    }
+    router, _, llm, metrics = _router(result=facts_result)
+
+    result = router.run("CET1 ratio?", {"company": "Barclays"}, 5)
+
+    assert result["route"] == "facts_inject" and result["answer"] == "generated"
+    assert llm.calls == 1 and not llm.borderline
+    assert metrics.counter("router_rule_hits", "facts_inject") == 1
+
+
+def test_deadline_shrinks_injected_facts():
+    from api.deadline import Deadline
+
+    chunks = [{**CHUNK, "chunk_id": f"Barclays_2024_annual_report_fact_{i}", "report_type": "annual_report",
+               "page_start": i, "page_end": i} for i in (7, 3, 9)]
+    router, _, llm, _ = _router(result={"raw_chunks": chunks, "evidence_context": "SOURCE [1] ...", "facts": [{}]})
+
+    result = router.run("CET1 ratio?", {"company": "Barclays"}, 3, deadline=Deadline(4000, Metrics()))
+
+    assert result["degradations"] == ["shrink_evidence"] and llm.calls == 1
+    # The two best matches, in prompt (chunk_id) order
+    assert [c["page_start"] for c in result["raw_chunks"]] == [3, 7]
@@ -0,0 +1,90 @@
+import json
+
+import numpy as np
+import pytest
+
+from retrieval.query_understanding import AhoCorasick, QueryMatcher
+from vectorstore.faiss_store import FAISSVectorStore
+from vectorstore.quantization import STORAGE_MODES, build_index, write_index
+
+CATALOG = {
+    ("Barclays", 2024),
+    ("NatWest Group", 2024),
+    ("Lloyds Banking Group", 2024),
+    ("BP", 2024),
+    ("HSBC", 2023),
+    ("HSBC", 2024),
+}
+TICKERS = {"BARC": "Barclays", "NWG": "NatWest Group", "BP": "BP", "HSBA": "HSBC"}
+
+
+@pytest.fixture
+def matcher():
+    return QueryMatcher(
+        companies=[c for c, _ in CATALOG],
+        tickers=TICKERS,
+        fiscal_years=[y for _, y in CATALOG],
+    )
+
+
+def test_aho_corasick_word_boundaries():
+    automaton = AhoCorasick()
+    automaton.add("shell", "Shell")
+    automaton.add("he", "He")
+    automaton.build()
+
+    assert [v for _, _, v in automaton.finditer("Shell's results")] == ["Shell"]
+    assert list(automaton.finditer("shellfish")) == []
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("Barclays 2024 liquidity risk", {"companies": ["Barclays"], "fiscal_years": [2024]}),
+        ("What was NatWest's CET1 ratio in FY24?", {"companies": ["NatWest Group"], "fiscal_years": [2024]}),
+        ("Lloyds' strategy", {"companies": ["Lloyds Banking Group"], "fiscal_years": []}),
+        ("BARC vs HSBA 2023", {"companies": ["Barclays", "HSBC"], "fiscal_years": [2023]}),
+        ("BP net zero", {"companies": ["BP"], "fiscal_years": []}),
+        ("hsbc net zero", {"companies": ["HSBC"], "fiscal_years": []}),
+        # Lowercase "bp" is basis points, not BP
+        ("How many bp did the NIM fall?", {"companies": [], "fiscal_years": []}),
+        # Tickers are case-sensitive; 2015 is not indexed
+        ("barc results in 2015", {"companies": [], "fiscal_years": []}),
+    ],
+)
+def test_detect(matcher, query, expected):
+    assert matcher.detect(query) == expected
+
+
+def test_apply_fills_only_missing_single_values(matcher):
+    filters, applied = matcher.apply("Barclays 2024 liquidity risk", {"report_type": "annual_report"})
+    assert filters == {"report_type": "annual_report", "company": "Barclays", "fiscal_year": 2024}
+    assert applied == {"company": "Barclays", "fiscal_year": 2024}
+
+    # Explicit filters win; two companies are ambiguous
+    filters, applied = matcher.apply("Barclays vs HSBC 2024", {"company": "HSBC"})
+    assert filters == {"company": "HSBC", "fiscal_year": 2024}
+    assert matcher.apply("Barclays vs HSBC", {})[1] == {}
+
+
+@pytest.mark.parametrize("storage", STORAGE_MODES)
+def test_faiss_store_pre_filters(tmp_path, storage):
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((60, 16)).astype("float32")
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    companies = ["Barclays", "HSBC", "Shell"]
+    metadata = [
+        {"chunk_id": str(i), "company": companies[i % 3], "fiscal_year": 2024}
+        for i in range(60)
+    ]
+
+    write_index(build_index(embeddings, storage), tmp_path / "faiss.index")
+    (tmp_path / "metadata.json").write_text(json.dumps(metadata))
+    store = FAISSVectorStore(tmp_path / "faiss.index", tmp_path / "metadata.json")
+
+    results = store.search(embeddings[4], top_k=5, filters={"company": "HSBC"})
+
+    assert len(results) == 5
+    assert all(r["company"] == "HSBC" for r in results)
+    assert results[0]["chunk_id"] == "4"
+    assert store.search(embeddings[4], top_k=5, filters={"company": "Tesco"}) == []
@@ -0,0 +1,67 @@
+import anyio
+import anyio.to_thread
+import faiss
+
+from api import runtime
+from api.runtime import (
+    ThreadBudget,
+    apply_request_threads,
+    apply_thread_budget,
+    available_cores,
+    compute_thread_budget,
+)
+
+
+def test_budget_splits_cores_between_workers(monkeypatch):
+    for name in ("RUNTIME_CORES", "SERVE_WORKERS", "WEB_CONCURRENCY", "EMBED_THREADS", "FAISS_THREADS", "REQUEST_THREADS"):
+        monkeypatch.delenv(name, raising=False)
+
+    budget = compute_thread_budget(cores=8, workers=3)
+    assert (budget.embed_threads, budget.faiss_threads) == (2, 1)
+    assert budget.request_threads == runtime.DEFAULT_REQUEST_THREADS
+
+    # More workers than cores still leaves each one a thread
+    assert compute_thread_budget(cores=2, workers=4).embed_threads == 1
+
+    monkeypatch.setenv("SERVE_WORKERS", "2")
+    monkeypatch.setenv("FAISS_THREADS", "3")
+    budget = compute_thread_budget(cores=8)
+    assert (budget.workers, budget.embed_threads, budget.faiss_threads) == (2, 4, 3)
+
+
+def test_available_cores_respects_cgroup_quota(monkeypatch, tmp_path):
+    cpu_max = tmp_path / "cpu.max"
+    monkeypatch.setattr(runtime, "CGROUP_CPU_MAX", cpu_max)
+    monkeypatch.setattr(runtime.os, "sched_getaffinity", lambda pid: set(range(16)))
+
+    assert available_cores() == 16
+
+    cpu_max.write_text("max 100000\n")
+    assert available_cores() == 16
+
+    cpu_max.write_text("250000 100000\n")
+    assert available_cores() == 2
+
+    cpu_max.write_text("50000 100000\n")
+    assert available_cores() == 1
+
+
+def test_apply_sets_library_thread_pools(monkeypatch):
+    # apply_thread_budget only fills these in when unset
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        monkeypatch.setenv(name, "1")
+    monkeypatch.setattr("retrieval.embed_query.EMBEDDER_BACKEND", "onnx")
+
+    budget = ThreadBudget(cores=4, workers=1, embed_threads=4, faiss_threads=2, request_threads=8)
+    previous = faiss.omp_get_max_threads()
+    try:
+        apply_thread_budget(budget)
+        assert faiss.omp_get_max_threads() == 2
+    finally:
+        faiss.omp_set_num_threads(previous)
+
+    async def request_threads():
+        apply_request_threads(budget)
+        return anyio.to_thread.current_default_thread_limiter().total_tokens
+
+    assert anyio.run(request_threads) == 8
@@ -0,0 +1,84 @@
+from collections import Counter
+import os
+import signal
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from api import runtime, serve
+from api.serve import memory_report, smaps_rollup
+from api.services.job_service import JobService, SQLiteJobStore
+from retrieval.embed_batcher import EmbeddingBatcher
+
+pytestmark = pytest.mark.skipif(
+    not sys.platform.startswith("linux") or not Path("/proc/self/smaps_rollup").exists(),
+    reason="fork + /proc/<pid>/smaps_rollup (Linux)",
+)
+
+
+class FakeEmbedder:
+    def embed_batch(self, queries):
+        return np.ones((len(queries), 2), dtype=np.float32)
+
+
+def _run_in_child(fn) -> int:
+    pid = os.fork()
+    if pid == 0:
+        signal.alarm(5)  # a dead background thread would hang forever
+        try:
+            fn()
+            os._exit(0)
+        except BaseException:
+            os._exit(1)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status)
+
+
+def test_batcher_thread_restarted_after_fork():
+    batcher = EmbeddingBatcher(FakeEmbedder(), max_wait_ms=1)
+    batcher.embed("warm up in parent")
+
+    assert _run_in_child(lambda: batcher.embed("in worker")) == 0
+
+
+def _job_threads() -> Counter:
+    # Other tests' services may have started job threads of their own
+    return Counter(t.name for t in threading.enumerate() if t.name.startswith("job-"))
+
+
+def test_preloading_parent_leaves_job_threads_to_workers(monkeypatch, tmp_path):
+    before = _job_threads()
+
+    monkeypatch.setattr(runtime, "SERVE_PRELOAD", True)
+    JobService(SQLiteJobStore(tmp_path / "jobs.db"), lambda request: request, workers=2)
+
+    assert _job_threads() == before
+
+    def run_worker(app, sock):
+        assert _job_threads() - before == Counter(["job-worker-0", "job-worker-1", "job-leases"])
+
+    monkeypatch.setattr(serve, "run_worker", run_worker)
+    _, status = os.waitpid(serve.spawn(None, None), 0)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert _job_threads() == before
+
+
+def test_memory_report_lists_workers():
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.read(read_end, 1)  # stay alive until the report is taken
+        os._exit(0)
+
+    try:
+        report = memory_report(os.getpid())
+    finally:
+        os.write(write_end, b"x")
+        os.waitpid(pid, 0)
+
+    assert ["worker", str(pid)] in [line.split()[:2] for line in report.splitlines() if line]
+    assert smaps_rollup(os.getpid())["Rss"] > 0
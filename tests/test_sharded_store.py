@@ -0,0 +1,53 @@
+import numpy as np
+
+from vectorstore.quantization import build_index
+from vectorstore.sharded_store import ShardedVectorStore, write_shards
+
+
+def _corpus(n=60, dim=16):
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((n, dim)).astype("float32")
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+    companies = ["Barclays", "HSBC", "Shell"]
+    metadata = [
+        {
+            "chunk_id": f"{companies[i % 3]}_2024_{i}",
+            "company": companies[i % 3],
+            "fiscal_year": 2024,
+            "report_type": "annual_report",
+        }
+        for i in range(n)
+    ]
+    return embeddings, metadata
+
+
+def test_fan_out_matches_single_index(tmp_path):
+    embeddings, metadata = _corpus()
+    write_shards(embeddings, metadata, tmp_path, "company", build_index)
+
+    store = ShardedVectorStore(tmp_path, lazy=True)
+    query = embeddings[7]
+
+    sharded = store.search(query, top_k=10)
+
+    scores = embeddings @ query
+    expected = [metadata[i]["chunk_id"] for i in np.argsort(-scores)[:10]]
+
+    assert [r["chunk_id"] for r in sharded] == expected
+
+
+def test_filtered_query_loads_only_matching_shard(tmp_path):
+    embeddings, metadata = _corpus()
+    write_shards(embeddings, metadata, tmp_path, "company", build_index)
+
+    store = ShardedVectorStore(tmp_path, lazy=True)
+    assert store.loaded_shards == []
+
+    results = store.search(
+        embeddings[0], top_k=5, filters={"company": "HSBC", "fiscal_year": 2024}
+    )
+
+    assert store.loaded_shards == ["HSBC"]
+    assert results and all(r["company"] == "HSBC" for r in results)
+    assert store.search(embeddings[0], top_k=5, filters={"fiscal_year": 2015}) == []
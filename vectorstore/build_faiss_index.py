@@ -1,26 +1,94 @@
 from pathlib import Path
 import numpy as np
-import faiss
 import json
+import os
+import shutil
+
+from processing.chunk_documents import TARGET_CHARS, OVERLAP_CHARS
+from vectorstore.quantization import INDEX_STORAGE, build_index, storage_name, write_index
+from vectorstore.sharded_store import SHARDS_DIR, write_shards
+from vectorstore.snapshots import build_manifest, new_version, publish_snapshot
 
 EMBEDDINGS_PATH = Path("data/embeddings/embeddings.npy")
 METADATA_PATH = Path("data/embeddings/metadata.json")
 INDEX_PATH = Path("data/embeddings/faiss.index")
 
-def build_faiss_index():
+# "company" or "fiscal_year" to build one index per shard; empty for a single index
+SHARD_BY = os.getenv("SHARD_BY", "")
+
+
+def snapshot_manifest(vectors: int, dim: int, index_type: str):
+    from embedding.embed_chunks import MODEL_NAME
+
+    return build_manifest(
+        version=new_version(),
+        model_name=MODEL_NAME,
+        chunking={
+            "target_chars": TARGET_CHARS,
+            "overlap_chars": OVERLAP_CHARS,
+        },
+        vectors=vectors,
+        dimension=dim,
+        index_type=index_type,
+    )
+
+
+def build_faiss_index(publish: bool = True, storage: str = INDEX_STORAGE):
+    # embeddings.npy may be stored as float16; indexes are built from float32
     embeddings = np.load(EMBEDDINGS_PATH).astype("float32")
 
     dim = embeddings.shape[1]
-    index = faiss.IndexFlatIP(dim)
+    index = build_index(embeddings, storage)
 
-    index.add(embeddings)
+    write_index(index, INDEX_PATH)
 
-    faiss.write_index(index, str(INDEX_PATH))
-
-    print(f"FAISS index built")
+    print(f"FAISS index built ({storage_name(index)} storage)")
     print(f"Vectors indexed: {index.ntotal}")
     print(f"Embedding dimension: {dim}")
     print(f"Saved to: {INDEX_PATH}")
 
+    if publish:
+        manifest = snapshot_manifest(index.ntotal, dim, storage_name(index))
+        snapshot_dir = publish_snapshot(INDEX_PATH, METADATA_PATH, manifest)
+        print(f"Published snapshot: {snapshot_dir}")
+
+
+def build_sharded_index(
+    shard_by: str,
+    publish: bool = True,
+    storage: str = INDEX_STORAGE,
+):
+    embeddings = np.load(EMBEDDINGS_PATH).astype("float32")
+    with open(METADATA_PATH, "r") as f:
+        metadata = json.load(f)
+
+    if SHARDS_DIR.exists():
+        shutil.rmtree(SHARDS_DIR)
+    SHARDS_DIR.mkdir(parents=True)
+
+    shards_manifest = write_shards(
+        embeddings, metadata, SHARDS_DIR, shard_by,
+        lambda shard_embeddings: build_index(shard_embeddings, storage),
+    )
+
+    print(f"Sharded FAISS index built (by {shard_by}, {storage} storage)")
+    for shard in shards_manifest["shards"]:
+        print(f"  {shard['key']}: {shard['vectors']} vectors")
+    print(f"Saved to: {SHARDS_DIR}")
+
+    if publish:
+        manifest = snapshot_manifest(
+            len(metadata), embeddings.shape[1], f"sharded:{storage}"
+        )
+        manifest["shard_by"] = shard_by
+        snapshot_dir = publish_snapshot(
+            None, None, manifest, shards_dir=SHARDS_DIR
+        )
+        print(f"Published snapshot: {snapshot_dir}")
+
+
 if __name__ == "__main__":
-    build_faiss_index()
\ No newline at end of file
+    if SHARD_BY:
+        build_sharded_index(SHARD_BY)
+    else:
+        build_faiss_index()
@@ -1,26 +1,70 @@
 from pathlib import Path
-import faiss
+from typing import Dict, Optional, Set, Tuple
 import numpy as np
 import json
 
+from retrieval.similarity_search import search
+from vectorstore.quantization import read_index
+
 INDEX_PATH = Path("data/embeddings/faiss.index")
 METADATA_PATH = Path("data/embeddings/metadata.json")
 
 class FAISSVectorStore:
-    def __init__(self):
-        self.index = faiss.read_index(str(INDEX_PATH))
-        with open(METADATA_PATH, "r") as f:
+    def __init__(self, index_path: Path = INDEX_PATH, metadata_path: Path = METADATA_PATH):
+        self.index = read_index(index_path)
+        with open(metadata_path, "r") as f:
             self.metadata = json.load(f)
 
-    def search(self, query_embedding: np.ndarray, top_k: int = 5):
-        query_embedding = query_embedding.astype("float32").reshape(1, -1)
+        # (company, fiscal_year) -> vector ids, for pre-filtered search
+        ids_by_key: Dict[Tuple[str, int], list] = {}
+        for i, m in enumerate(self.metadata):
+            ids_by_key.setdefault((m["company"], m["fiscal_year"]), []).append(i)
+        self._ids_by_key = {
+            key: np.array(ids, dtype="int64") for key, ids in ids_by_key.items()
+        }
+
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal
+
+    def catalog(self) -> Set[Tuple[str, int]]:
+        """
+        (company, fiscal_year) pairs present in the index.
+        """
+        return set(self._ids_by_key)
+
+    def select_ids(self, filters: Optional[Dict] = None) -> Optional[np.ndarray]:
+        """
+        Vector ids matching the company / fiscal_year filters, or None when
+        neither is set. Other filter keys are left to the caller's post-filter.
+        """
+        filters = filters or {}
+        company = filters.get("company")
+        fiscal_year = filters.get("fiscal_year")
 
-        scores, indices = self.index.search(query_embedding, top_k)
+        if company in (None, "") and fiscal_year in (None, ""):
+            return None
+
+        selected = [
+            ids for (c, y), ids in self._ids_by_key.items()
+            if company in (None, "", c) and fiscal_year in (None, "", y)
+        ]
+        if not selected:
+            return np.empty(0, dtype="int64")
+
+        return np.concatenate(selected)
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int = 5,
+        filters: Optional[Dict] = None,
+    ):
+        query_embedding = query_embedding.astype("float32").reshape(1, -1)
 
-        results = []
-        for score, idx in zip(scores[0], indices[0]):
-            item = self.metadata[idx]
-            item["score"] = float(score)
-            results.append(item)
+        # Pre-filter: only vectors of the requested company / year are scored
+        ids = self.select_ids(filters)
+        if ids is not None and len(ids) == 0:
+            return []
 
-        return results
\ No newline at end of file
+        return search(self.index, self.metadata, query_embedding, top_k=top_k, ids=ids)
@@ -0,0 +1,201 @@
+"""
+Compressed index storage.
+
+Storage modes (per vector, MiniLM d=384):
+- flat     float32 IndexFlatIP                       1536 bytes
+- float16  IndexScalarQuantizer(QT_fp16)              768 bytes
+- int8     IndexScalarQuantizer(QT_8bit)              384 bytes
+- binary   sign-bit codes, Hamming search, then        48 bytes resident
+           float16 rescoring of a shortlist against
+           vectors memory-mapped from disk
+
+All modes search by inner product on L2-normalised embeddings, so scores
+stay comparable with the thresholds in retrieval/confidence.py. Only flat
+scores are exact: binary scores come from the float16 rescoring vectors
+(within about 1e-3 of float32) and scalar-quantized scores are approximate.
+"""
+
+from pathlib import Path
+import os
+
+import faiss
+import numpy as np
+
+STORAGE_MODES = ("flat", "float16", "int8", "binary")
+
+INDEX_STORAGE = os.getenv("INDEX_STORAGE", "flat")
+
+# Binary mode: Hamming shortlist size = top_k * RESCORE_FACTOR
+RESCORE_FACTOR = int(os.getenv("BINARY_RESCORE_FACTOR", "10"))
+
+RESCORE_SUFFIX = ".rescore.npy"
+
+
+class BinaryRescoreIndex:
+    """
+    Hamming search over sign bits followed by inner-product rescoring
+    against float16 copies of the vectors. Exposes the subset of the faiss.Index API used by search():
+    ntotal, d and search(queries, k) -> (scores, ids).
+    """
+
+    def __init__(self, binary_index, vectors: np.ndarray, rescore_factor: int = RESCORE_FACTOR):
+        self.binary_index = binary_index
+        self.vectors = vectors
+        self.rescore_factor = rescore_factor
+
+    @classmethod
+    def from_embeddings(cls, embeddings: np.ndarray, rescore_factor: int = RESCORE_FACTOR):
+        dim = embeddings.shape[1]
+        if dim % 8:
+            raise ValueError(f"Binary storage needs a dimension divisible by 8, got {dim}")
+
+        binary_index = faiss.IndexBinaryFlat(dim)
+        binary_index.add(binarize(embeddings))
+
+        return cls(binary_index, embeddings.astype("float16"), rescore_factor)
+
+    @property
+    def ntotal(self) -> int:
+        return self.binary_index.ntotal
+
+    @property
+    def d(self) -> int:
+        return self.binary_index.d
+
+    def search(self, queries: np.ndarray, k: int):
+        queries = np.atleast_2d(queries).astype("float32")
+        shortlist = min(max(k * self.rescore_factor, k), self.ntotal)
+
+        _, candidates = self.binary_index.search(binarize(queries), shortlist)
+
+        all_scores = np.full((len(queries), k), -np.inf, dtype="float32")
+        all_ids = np.full((len(queries), k), -1, dtype="int64")
+
+        for row, (query, ids) in enumerate(zip(queries, candidates)):
+            ids = ids[ids >= 0]
+            scores = self.vectors[ids].astype("float32") @ query
+
+            order = np.argsort(-scores)[:k]
+            all_scores[row, :len(order)] = scores[order]
+            all_ids[row, :len(order)] = ids[order]
+
+        return all_scores, all_ids
+
+    def search_subset(self, queries: np.ndarray, k: int, ids: np.ndarray):
+        """
+        Brute-force inner-product search restricted to `ids`. Subsets are small
+        (one company / year), so the float16 vectors are scored directly.
+        """
+        queries = np.atleast_2d(queries).astype("float32")
+        scores = queries @ self.vectors[ids].astype("float32").T
+
+        all_scores = np.full((len(queries), k), -np.inf, dtype="float32")
+        all_ids = np.full((len(queries), k), -1, dtype="int64")
+
+        for row in range(len(queries)):
+            order = np.argsort(-scores[row])[:k]
+            all_scores[row, :len(order)] = scores[row, order]
+            all_ids[row, :len(order)] = ids[order]
+
+        return all_scores, all_ids
+
+
+def search_subset(index, queries: np.ndarray, k: int, ids: np.ndarray):
+    """
+    index.search restricted to the vector ids in `ids` (pre-filtering).
+    """
+    ids = np.asarray(ids, dtype="int64")
+
+    if isinstance(index, BinaryRescoreIndex):
+        return index.search_subset(queries, k, ids)
+
+    selector = faiss.IDSelectorBatch(ids)
+    params = faiss.SearchParameters(sel=selector)
+    return index.search(np.atleast_2d(queries).astype("float32"), k, params=params)
+
+
+def binarize(embeddings: np.ndarray) -> np.ndarray:
+    return np.packbits(embeddings > 0, axis=1)
+
+
+def build_index(embeddings: np.ndarray, storage: str = INDEX_STORAGE):
+    """
+    Build an inner-product index over float32 embeddings in `storage` mode.
+    """
+    if storage not in STORAGE_MODES:
+        raise ValueError(f"Unsupported index storage: {storage}")
+
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    dim = embeddings.shape[1]
+
+    if storage == "binary":
+        return BinaryRescoreIndex.from_embeddings(embeddings)
+
+    if storage == "flat":
+        index = faiss.IndexFlatIP(dim)
+    else:
+        qtype = {
+            "float16": faiss.ScalarQuantizer.QT_fp16,
+            "int8": faiss.ScalarQuantizer.QT_8bit,
+        }[storage]
+        index = faiss.IndexScalarQuantizer(dim, qtype, faiss.METRIC_INNER_PRODUCT)
+        index.train(embeddings)
+
+    index.add(embeddings)
+    return index
+
+
+def storage_name(index) -> str:
+    if isinstance(index, BinaryRescoreIndex):
+        return "binary"
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        return "int8" if index.sq.qtype == faiss.ScalarQuantizer.QT_8bit else "float16"
+    return "flat"
+
+
+def rescore_path(index_path: Path) -> Path:
+    return index_path.with_name(index_path.name + RESCORE_SUFFIX)
+
+
+def write_index(index, index_path: Path) -> None:
+    if isinstance(index, BinaryRescoreIndex):
+        faiss.write_index_binary(index.binary_index, str(index_path))
+        np.save(rescore_path(index_path), index.vectors)
+    else:
+        faiss.write_index(index, str(index_path))
+
+
+def read_index(index_path: Path, mmap_vectors: bool = True):
+    """
+    Read an index written by write_index. Binary indexes are recognised
+    by their rescoring sidecar; its float16 vectors are memory-mapped so
+    they only occupy page cache for rows that are actually rescored.
+    """
+    index_path = Path(index_path)
+    sidecar = rescore_path(index_path)
+
+    if sidecar.exists():
+        binary_index = faiss.read_index_binary(str(index_path))
+        vectors = np.load(sidecar, mmap_mode="r" if mmap_vectors else None)
+        return BinaryRescoreIndex(binary_index, vectors)
+
+    return faiss.read_index(str(index_path))
+
+
+def resident_bytes(index) -> int:
+    """
+    Approximate bytes held in RAM by an index (codes only).
+    """
+    if isinstance(index, BinaryRescoreIndex):
+        resident = index.ntotal * index.binary_index.code_size
+        if not isinstance(index.vectors, np.memmap):
+            resident += index.vectors.nbytes
+        return resident
+
+    return faiss.serialize_index(index).nbytes
+
+
+def on_disk_bytes(index) -> int:
+    if isinstance(index, BinaryRescoreIndex):
+        return index.ntotal * index.binary_index.code_size + index.vectors.nbytes
+    return faiss.serialize_index(index).nbytes
@@ -0,0 +1,114 @@
+"""
+Compare index storage modes against the flat float32 baseline.
+
+Reports, per mode:
+- resident memory (what each API replica holds in RAM)
+- on-disk size
+- build time
+- mean / p95 search latency for top-k
+- recall@k against exact flat search
+
+Usage:
+    python -m vectorstore.quantization_benchmark [num_queries] [top_k]
+"""
+
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from vectorstore.quantization import (
+    STORAGE_MODES,
+    build_index,
+    on_disk_bytes,
+    read_index,
+    resident_bytes,
+    write_index,
+)
+
+EMBEDDINGS_PATH = Path("data/embeddings/embeddings.npy")
+
+
+def recall_at_k(expected: np.ndarray, found: np.ndarray) -> float:
+    hits = sum(
+        len(set(e) & set(f[f >= 0]))
+        for e, f in zip(expected, found)
+    )
+    return hits / expected.size
+
+
+def benchmark(num_queries: int = 200, top_k: int = 10):
+    embeddings = np.load(EMBEDDINGS_PATH).astype("float32")
+
+    rng = np.random.default_rng(0)
+    query_rows = rng.choice(len(embeddings), size=min(num_queries, len(embeddings)), replace=False)
+
+    # Perturb chunk embeddings so queries are near, not identical to, a row
+    queries = embeddings[query_rows] + rng.normal(0, 0.05, (len(query_rows), embeddings.shape[1])).astype("float32")
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    print(f"Vectors: {len(embeddings)}  dim: {embeddings.shape[1]}  queries: {len(queries)}  top_k: {top_k}\n")
+
+    baseline_ids = None
+    baseline_memory = None
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+
+        for storage in STORAGE_MODES:
+            start = time.perf_counter()
+            index = build_index(embeddings, storage)
+            build_ms = (time.perf_counter() - start) * 1000
+
+            # Measure the index as the API loads it (binary vectors memory-mapped)
+            write_index(index, tmp_dir / f"{storage}.index")
+            index = read_index(tmp_dir / f"{storage}.index")
+
+            latencies = []
+            found = []
+            for query in queries:
+                start = time.perf_counter()
+                _, ids = index.search(query.reshape(1, -1), top_k)
+                latencies.append((time.perf_counter() - start) * 1000)
+                found.append(ids[0])
+            found = np.array(found)
+
+            if baseline_ids is None:
+                baseline_ids = found
+                baseline_memory = resident_bytes(index)
+
+            rows.append({
+                "storage": storage,
+                "resident_mb": resident_bytes(index) / 1e6,
+                "disk_mb": on_disk_bytes(index) / 1e6,
+                "vs_flat": resident_bytes(index) / baseline_memory,
+                "build_ms": build_ms,
+                "mean_ms": float(np.mean(latencies)),
+                "p95_ms": float(np.percentile(latencies, 95)),
+                "recall": recall_at_k(baseline_ids, found),
+            })
+
+    print(
+        f"{'storage':<10}{'RAM MB':>9}{'disk MB':>9}{'vs flat':>9}"
+        f"{'build ms':>10}{'mean ms':>9}{'p95 ms':>9}{'recall@' + str(top_k):>11}"
+    )
+    for r in rows:
+        print(
+            f"{r['storage']:<10}{r['resident_mb']:>9.2f}{r['disk_mb']:>9.2f}{r['vs_flat']:>9.2f}"
+            f"{r['build_ms']:>10.1f}{r['mean_ms']:>9.3f}{r['p95_ms']:>9.3f}{r['recall']:>11.3f}"
+        )
+
+    print(
+        "\nbinary RAM counts sign-bit codes only: rescoring vectors are "
+        "memory-mapped and only rescored rows are paged in."
+    )
+
+    return rows
+
+
+if __name__ == "__main__":
+    num_queries = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    top_k = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    benchmark(num_queries, top_k)
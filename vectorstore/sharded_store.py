@@ -0,0 +1,208 @@
+"""
+Sharded FAISS vector store.
+
+The corpus is split into independent shards (one per company or per
+fiscal year), each with its own index and metadata:
+
+data/embeddings/shards/
+├── shards.json
+├── Barclays/
+│   ├── faiss.index
+│   └── metadata.json
+└── HSBC/
+    └── ...
+
+shards.json records which companies and fiscal years each shard holds, so
+a filtered query can be routed to the matching shards without opening
+the others. Shards are searched in parallel threads (FAISS releases the
+GIL during search) and the per-shard top-k lists are merged.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+import heapq
+import json
+import os
+import threading
+
+import numpy as np
+
+from vectorstore.faiss_store import FAISSVectorStore
+from vectorstore.quantization import write_index
+
+SHARDS_DIR = Path("data/embeddings/shards")
+SHARDS_MANIFEST = "shards.json"
+SHARD_INDEX_FILENAME = "faiss.index"
+SHARD_METADATA_FILENAME = "metadata.json"
+
+SHARD_KEYS = ("company", "fiscal_year")
+
+# Load shards on first access instead of at startup
+SHARD_LAZY_LOAD = os.getenv("SHARD_LAZY_LOAD", "1") == "1"
+
+
+def shard_key(chunk: Dict, shard_by: str) -> str:
+    if shard_by not in SHARD_KEYS:
+        raise ValueError(f"Unsupported shard key: {shard_by}")
+    return str(chunk[shard_by])
+
+
+def write_shards(
+    embeddings: np.ndarray,
+    metadata: List[Dict],
+    output_dir: Path,
+    shard_by: str,
+    build_index,
+) -> Dict:
+    """
+    Split embeddings + metadata by `shard_by` and write one index per shard.
+
+    build_index: callable(np.ndarray) -> index (see quantization.build_index)
+    Returns the shards manifest.
+    """
+    groups: Dict[str, List[int]] = {}
+    for row, chunk in enumerate(metadata):
+        groups.setdefault(shard_key(chunk, shard_by), []).append(row)
+
+    shards = []
+    for key, rows in sorted(groups.items()):
+        shard_dir = output_dir / key
+        shard_dir.mkdir(parents=True, exist_ok=True)
+
+        index = build_index(embeddings[rows])
+        write_index(index, shard_dir / SHARD_INDEX_FILENAME)
+
+        shard_metadata = [metadata[row] for row in rows]
+        with open(shard_dir / SHARD_METADATA_FILENAME, "w") as f:
+            json.dump(shard_metadata, f)
+
+        shards.append({
+            "key": key,
+            "path": key,
+            "vectors": len(rows),
+            "companies": sorted({m["company"] for m in shard_metadata}),
+            "fiscal_years": sorted({m["fiscal_year"] for m in shard_metadata}),
+        })
+
+    manifest = {"shard_by": shard_by, "shards": shards}
+    (output_dir / SHARDS_MANIFEST).write_text(
+        json.dumps(manifest, indent=2), encoding="utf-8"
+    )
+
+    return manifest
+
+
+def is_sharded(directory: Path) -> bool:
+    return (directory / SHARDS_MANIFEST).exists()
+
+
+class ShardedVectorStore:
+    def __init__(
+        self,
+        shards_dir: Path = SHARDS_DIR,
+        lazy: bool = SHARD_LAZY_LOAD,
+        max_workers: Optional[int] = None,
+    ):
+        self.shards_dir = shards_dir
+        self.manifest = json.loads(
+            (shards_dir / SHARDS_MANIFEST).read_text(encoding="utf-8")
+        )
+        self.shards: List[Dict] = self.manifest["shards"]
+
+        self._stores: Dict[str, FAISSVectorStore] = {}
+        self._load_locks = {s["key"]: threading.Lock() for s in self.shards}
+
+        workers = max_workers or min(len(self.shards), os.cpu_count() or 1)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(workers, 1),
+            thread_name_prefix="shard-search",
+        )
+
+        if not lazy:
+            for shard in self.shards:
+                self._store(shard)
+
+    @property
+    def ntotal(self) -> int:
+        return sum(s["vectors"] for s in self.shards)
+
+    @property
+    def loaded_shards(self) -> List[str]:
+        return sorted(self._stores)
+
+    def catalog(self) -> Set[Tuple[str, int]]:
+        """
+        (company, fiscal_year) pairs, read from the manifest only.
+
+        A shard holding several companies and years reports their cross
+        product, which may include pairs that have no chunks.
+        """
+        return {
+            (company, year)
+            for s in self.shards
+            for company in s["companies"]
+            for year in s["fiscal_years"]
+        }
+
+    def select_shards(self, filters: Optional[Dict] = None) -> List[Dict]:
+        """
+        Shards that can contain chunks matching the company / fiscal_year
+        filters. Other filter keys are left to the caller's post-filter.
+        """
+        filters = filters or {}
+        company = filters.get("company")
+        fiscal_year = filters.get("fiscal_year")
+
+        selected = []
+        for shard in self.shards:
+            if company not in (None, "") and company not in shard["companies"]:
+                continue
+            if fiscal_year not in (None, "") and fiscal_year not in shard["fiscal_years"]:
+                continue
+            selected.append(shard)
+
+        return selected
+
+    def _store(self, shard: Dict) -> FAISSVectorStore:
+        key = shard["key"]
+        store = self._stores.get(key)
+        if store is not None:
+            return store
+
+        with self._load_locks[key]:
+            store = self._stores.get(key)
+            if store is None:
+                shard_dir = self.shards_dir / shard["path"]
+                store = FAISSVectorStore(
+                    shard_dir / SHARD_INDEX_FILENAME,
+                    shard_dir / SHARD_METADATA_FILENAME,
+                )
+                self._stores[key] = store
+
+        return store
+
+    def _search_shard(self, shard: Dict, query_embedding: np.ndarray, top_k: int, filters=None):
+        return self._store(shard).search(query_embedding, top_k=top_k, filters=filters)
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int = 5,
+        filters: Optional[Dict] = None,
+    ) -> List[Dict]:
+        shards = self.select_shards(filters)
+
+        if not shards:
+            return []
+
+        if len(shards) == 1:
+            return self._search_shard(shards[0], query_embedding, top_k, filters)
+
+        per_shard = self._executor.map(
+            lambda shard: self._search_shard(shard, query_embedding, top_k, filters),
+            shards,
+        )
+
+        merged = [r for results in per_shard for r in results]
+        return heapq.nlargest(top_k, merged, key=lambda r: r["score"])
@@ -0,0 +1,219 @@
+"""
+Versioned index snapshots.
+
+A snapshot is an immutable directory holding everything the API needs to
+serve a corpus. The active snapshot is named by the CURRENT pointer file,
+which is replaced atomically so readers never see a half-written value.
+
+data/embeddings/snapshots/
+├── CURRENT
+└── 20241231T120000Z/
+    ├── faiss.index
+    ├── metadata.json
+    ├── manifest.json
+    └── shards/          # sharded snapshots only, see sharded_store
+"""
+
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+import json
+import os
+import shutil
+
+SNAPSHOTS_DIR = Path("data/embeddings/snapshots")
+
+INDEX_FILENAME = "faiss.index"
+METADATA_FILENAME = "metadata.json"
+MANIFEST_FILENAME = "manifest.json"
+SHARDS_DIRNAME = "shards"
+CURRENT_FILENAME = "CURRENT"
+
+
+def build_manifest(
+    *,
+    version: str,
+    model_name: str,
+    chunking: Dict,
+    vectors: int,
+    dimension: int,
+    index_type: str,
+) -> Dict:
+    """
+    Build the manifest describing how a snapshot was produced.
+    """
+    return {
+        "version": version,
+        "model_name": model_name,
+        "chunking": chunking,
+        "vectors": vectors,
+        "dimension": dimension,
+        "index_type": index_type,
+        "built_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def new_version() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def publish_snapshot(
+    index_path: Optional[Path],
+    metadata_path: Optional[Path],
+    manifest: Dict,
+    snapshots_dir: Path = SNAPSHOTS_DIR,
+    activate: bool = True,
+    shards_dir: Optional[Path] = None,
+) -> Path:
+    """
+    Copy a freshly built index + metadata (and/or a shards directory)
+    into a new versioned snapshot.
+
+    The snapshot is assembled in a temporary directory and renamed into
+    place, so a watcher never observes a partially copied snapshot.
+    """
+    version = manifest["version"]
+    snapshot_dir = snapshots_dir / version
+
+    if snapshot_dir.exists():
+        raise FileExistsError(f"Snapshot already exists: {snapshot_dir}")
+
+    staging_dir = snapshots_dir / f".{version}.tmp"
+    if staging_dir.exists():
+        shutil.rmtree(staging_dir)
+    staging_dir.mkdir(parents=True)
+
+    if index_path is not None:
+        shutil.copy2(index_path, staging_dir / INDEX_FILENAME)
+        # Sidecars such as the binary index rescoring vectors
+        for sidecar in index_path.parent.glob(index_path.name + ".*"):
+            suffix = sidecar.name[len(index_path.name):]
+            shutil.copy2(sidecar, staging_dir / (INDEX_FILENAME + suffix))
+    if metadata_path is not None:
+        shutil.copy2(metadata_path, staging_dir / METADATA_FILENAME)
+    if shards_dir is not None:
+        shutil.copytree(shards_dir, staging_dir / SHARDS_DIRNAME)
+    (staging_dir / MANIFEST_FILENAME).write_text(
+        json.dumps(manifest, indent=2), encoding="utf-8"
+    )
+
+    os.replace(staging_dir, snapshot_dir)
+
+    if activate:
+        set_current_version(version, snapshots_dir)
+
+    return snapshot_dir
+
+
+def read_manifest(snapshot_dir: Path) -> Dict:
+    manifest_path = snapshot_dir / MANIFEST_FILENAME
+    if not manifest_path.exists():
+        raise FileNotFoundError(f"Snapshot manifest not found: {manifest_path}")
+    return json.loads(manifest_path.read_text(encoding="utf-8"))
+
+
+def list_snapshots(snapshots_dir: Path = SNAPSHOTS_DIR) -> List[Dict]:
+    """
+    Return manifests of all complete snapshots, oldest first.
+    """
+    if not snapshots_dir.exists():
+        return []
+
+    manifests = []
+    for path in snapshots_dir.iterdir():
+        if not path.is_dir() or path.name.startswith("."):
+            continue
+        if not (path / MANIFEST_FILENAME).exists():
+            continue
+        manifests.append(read_manifest(path))
+
+    return sorted(manifests, key=lambda m: (m["built_at"], m["version"]))
+
+
+def current_version(snapshots_dir: Path = SNAPSHOTS_DIR) -> Optional[str]:
+    current_path = snapshots_dir / CURRENT_FILENAME
+    if not current_path.exists():
+        return None
+    version = current_path.read_text(encoding="utf-8").strip()
+    return version or None
+
+
+def set_current_version(version: str, snapshots_dir: Path = SNAPSHOTS_DIR) -> None:
+    """
+    Point CURRENT at an existing snapshot (atomic rename).
+    """
+    if not (snapshots_dir / version / MANIFEST_FILENAME).exists():
+        raise FileNotFoundError(f"Unknown snapshot version: {version}")
+
+    tmp_path = snapshots_dir / f".{CURRENT_FILENAME}.tmp"
+    tmp_path.write_text(version + "\n", encoding="utf-8")
+    os.replace(tmp_path, snapshots_dir / CURRENT_FILENAME)
+
+
+def previous_version(
+    version: str,
+    snapshots_dir: Path = SNAPSHOTS_DIR,
+) -> Optional[str]:
+    """
+    Return the snapshot built immediately before `version`, if any.
+    """
+    versions = [m["version"] for m in list_snapshots(snapshots_dir)]
+    if version not in versions:
+        return None
+    position = versions.index(version)
+    return versions[position - 1] if position > 0 else None
+
+
+def resolve_snapshot(
+    version: Optional[str] = None,
+    snapshots_dir: Path = SNAPSHOTS_DIR,
+) -> Optional[Path]:
+    """
+    Resolve a version (or CURRENT when omitted) to its snapshot directory.
+    Returns None when no snapshot has been published yet.
+    """
+    version = version or current_version(snapshots_dir)
+    if version is None:
+        return None
+
+    snapshot_dir = snapshots_dir / version
+    if not (snapshot_dir / MANIFEST_FILENAME).exists():
+        raise FileNotFoundError(f"Unknown snapshot version: {version}")
+
+    return snapshot_dir
+
+
+# -----------------------------
+# Entry Point
+# -----------------------------
+
+if __name__ == "__main__":
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+
+    if command == "list":
+        active = current_version()
+        for manifest in list_snapshots():
+            marker = "*" if manifest["version"] == active else " "
+            print(
+                f"{marker} {manifest['version']}  "
+                f"{manifest['vectors']} vectors  "
+                f"{manifest['model_name']}  "
+                f"built {manifest['built_at']}"
+            )
+
+    elif command == "activate":
+        set_current_version(sys.argv[2])
+        print(f"CURRENT -> {sys.argv[2]}")
+
+    elif command == "rollback":
+        active = current_version()
+        target = previous_version(active) if active else None
+        if target is None:
+            raise SystemExit("No previous snapshot to roll back to")
+        set_current_version(target)
+        print(f"CURRENT -> {target}")
+
+    else:
+        raise SystemExit(f"Unknown command: {command}")